@@ -1,8 +1,56 @@
+import argparse
+import asyncio
+import bisect
+import contextlib
+import csv
+import datetime as dt
+import functools
+import gc
+import heapq
+import inspect
+import itertools
+import json
+import mmap
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import re
+import shutil
+import signal
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
 from abc import ABC, abstractmethod
-from typing import List
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+CLASS_TYPES = ("Economy", "Business")
+ALLOWED_BAGGAGE_WEIGHT = 23
+EXCESS_BAGGAGE_FEE_PER_KG = 10
+
+
+def normalize_class_type(class_type) -> Optional[str]:
+    class_type = str(class_type).strip().capitalize()
+    return class_type if class_type in CLASS_TYPES else None
+
+
+def is_valid_place(place) -> bool:
+    return str(place).isalpha()
+
 
 # Abstract Base Class for User
 class User(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def view_details(self):
         pass
@@ -10,6 +58,8 @@ class User(ABC):
 
 # Passenger Class inheriting from User
 class Passenger(User):
+    __slots__ = ("__name", "__age", "__phone", "__address", "__passport_no")
+
     def __init__(self, name: str, age: int, phone: str, address: str, passport_no: str):
         self.__name = name
         self.__age = age
@@ -26,9 +76,15 @@ class Passenger(User):
     def get_passport_no(self):
         return self.__passport_no
 
+    def to_dict(self) -> dict:
+        return {"name": self.__name, "age": self.__age, "phone": self.__phone,
+                "address": self.__address, "passport_no": self.__passport_no}
+
 
 # Abstract Base Class for Airline Entities
 class AirlineEntity(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def display_details(self):
         pass
@@ -36,6 +92,8 @@ class AirlineEntity(ABC):
 
 # Baggage Class inheriting from AirlineEntity
 class Baggage(AirlineEntity):
+    __slots__ = ("__baggage_id", "__weight", "__status")
+
     def __init__(self, baggage_id: int, weight: float):
         try:
             self.__baggage_id = int(baggage_id)
@@ -62,12 +120,22 @@ class Baggage(AirlineEntity):
     def get_weight(self):
         return self.__weight
 
+    def get_status(self):
+        return self.__status
+
+    def to_dict(self) -> dict:
+        return {"baggage_id": self.__baggage_id, "weight": self.__weight, "status": self.__status}
+
+    def excess_fee(self, allowed_weight: float):
+        # Returns (excess weight in kg, extra fee in $); both are 0 within the allowance
+        excess_weight = max(self.__weight - float(allowed_weight), 0.0)
+        return excess_weight, excess_weight * EXCESS_BAGGAGE_FEE_PER_KG
+
     def check_weight(self, allowed_weight: float):
         try:
             allowed_weight = float(allowed_weight)
             if self.__weight > allowed_weight:
-                excess_weight = self.__weight - allowed_weight
-                extra_fee = excess_weight * 10
+                excess_weight, extra_fee = self.excess_fee(allowed_weight)
                 print(f"Baggage ID {self.__baggage_id}: Your baggage exceeds the limit.\n"
                       f"Excess Weight: {excess_weight} kg | Extra Fee: ${extra_fee}")
             else:
@@ -88,12 +156,16 @@ class Baggage(AirlineEntity):
 
 # Seat Class
 class Seat:
+    __slots__ = ("__seat_number", "__class_type", "__price", "__available", "__inventory", "__slot")
+
     def __init__(self, seat_number: int, class_type: str, price: float):
         try:
             self.__seat_number = int(seat_number)
-            self.__class_type = str(class_type)
+            self.__class_type = sys.intern(str(class_type))
             self.__price = float(price)
             self.__available = True
+            self.__inventory = None
+            self.__slot = -1
         except ValueError:
             print("Error: Invalid value for seat number, class type, or price.")
         except TypeError:
@@ -102,24 +174,57 @@ class Seat:
             print("An unexpected error occurred during seat initialization:", e)
 
     def book_seat(self):
-            if self.__available:
-                self.__available = False
-                return True
-            return False
+            inventory = self.__inventory
+            if inventory is None:
+                return self._set_available(False)
+            # Check-then-set under the flight's lock so two sessions cannot both win the seat
+            with inventory.get_lock():
+                return self._set_available(False)
         
 
     def get_seat_number(self):
             return self.__seat_number
         
 
+    def get_class_type(self):
+        return self.__class_type
+
+    def get_price(self):
+        return self.__price
+
     def is_available(self):
             return self.__available
         
 
     def make_available(self):
-            self.__available = True
+            inventory = self.__inventory
+            if inventory is None:
+                return self._set_available(True)
+            with inventory.get_lock():
+                return self._set_available(True)
+
+    def _set_available(self, available: bool) -> bool:
+        # Returns False when the seat is already in the requested state
+        if self.is_available() == available:
+            return False
+        self._store_available(available)
+        if self.__inventory is not None:
+            self.__inventory.seat_changed(self.__slot, available)
+        return True
+
+    def _store_available(self, available: bool):
+        self.__available = available
+
+    def _attach(self, inventory, slot: int):
+        # Called by SeatInventory so availability changes keep its bitmaps in sync
+        self.__inventory = inventory
+        self.__slot = slot
         
 
+    def to_dict(self) -> dict:
+        return {"seat_number": self.__seat_number, "class_type": self.__class_type,
+                "price": self.__price, "available": self.__available}
+
     def __str__(self):
         try:
             status = "Available" if self.__available else "Booked"
@@ -128,49 +233,278 @@ class Seat:
             return f"An unexpected error occurred while generating seat string: {e}"
 
 
+# Seat Inventory: seat number -> slot mapping plus per-class availability bitmaps
+class SeatInventory:
+    def __init__(self):
+        self.__seats: List[Seat] = []
+        self.__slots: Dict[int, int] = {}
+        self.__class_mask: Dict[str, int] = {}   # class type -> bitmap of all its slots
+        self.__free_mask: Dict[str, int] = {}    # class type -> bitmap of free slots
+        self.__free_all = 0
+        self.__free_count: Dict[str, int] = {}   # class type -> free seats, kept in step with the bitmaps
+        self.__free_total = 0
+        # class type -> min-heap of (price, slot) pushed when a seat becomes free; booked seats are
+        # dropped lazily when they reach the top
+        self.__fare_heaps: Dict[str, list] = {}
+        # One lock per flight: seat changes are atomic, and flights never contend
+        self.__lock = threading.RLock()
+        self.__watchers = []  # Called with no arguments whenever seats are added or change state
+
+    def get_lock(self):
+        return self.__lock
+
+    def watch(self, callback):
+        self.__watchers.append(callback)
+
+    def _notify(self):
+        for callback in self.__watchers:
+            callback()
+
+    def add(self, seat: Seat) -> int:
+        with self.__lock:
+            seat_number = seat.get_seat_number()
+            if seat_number in self.__slots:
+                raise ValueError(f"Seat {seat_number} already exists.")
+            slot = len(self.__seats)
+            bit = 1 << slot
+            class_type = seat.get_class_type()
+            self.__seats.append(seat)
+            self.__slots[seat_number] = slot
+            self.__class_mask[class_type] = self.__class_mask.get(class_type, 0) | bit
+            self.__free_mask.setdefault(class_type, 0)
+            self.__free_count.setdefault(class_type, 0)
+            self.__fare_heaps.setdefault(class_type, [])
+            seat._attach(self, slot)
+            if seat.is_available():
+                self.__free_mask[class_type] |= bit
+                self.__free_all |= bit
+                self._seat_freed(class_type, slot)
+            if self.__watchers:
+                self._notify()
+            return slot
+
+    def seat_changed(self, slot: int, available: bool):
+        bit = 1 << slot
+        class_type = self.__seats[slot].get_class_type()
+        if available:
+            self.__free_mask[class_type] |= bit
+            self.__free_all |= bit
+            self._seat_freed(class_type, slot)
+        else:
+            self.__free_mask[class_type] &= ~bit
+            self.__free_all &= ~bit
+            self.__free_count[class_type] -= 1
+            self.__free_total -= 1
+        if self.__watchers:
+            self._notify()
+
+    def _seat_freed(self, class_type: str, slot: int):
+        self.__free_count[class_type] += 1
+        self.__free_total += 1
+        heap = self.__fare_heaps[class_type]
+        heapq.heappush(heap, (self.__seats[slot].get_price(), slot))
+        if len(heap) > 2 * self.__class_mask[class_type].bit_count() + 64:
+            # Mostly stale entries from seats booked and released again: rebuild from the free seats
+            heap[:] = [(self.__seats[free].get_price(), free) for free in self._slots(self.__free_mask[class_type])]
+            heapq.heapify(heap)
+
+    def _slots(self, mask: int):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def _mask(self, class_type: Optional[str]) -> int:
+        if class_type is None:
+            return self.__free_all
+        return self.__free_mask.get(class_type, 0)
+
+    def get(self, seat_number: int) -> Optional[Seat]:
+        slot = self.__slots.get(seat_number)
+        return None if slot is None else self.__seats[slot]
+
+    def is_free(self, seat_number: int) -> bool:
+        slot = self.__slots.get(seat_number)
+        return slot is not None and bool(self.__free_all >> slot & 1)
+
+    def lowest_free_price(self, class_type: Optional[str] = None) -> Optional[float]:
+        if class_type is None:
+            prices = [price for price in map(self.lowest_free_price, self.__fare_heaps) if price is not None]
+            return min(prices) if prices else None
+        heap = self.__fare_heaps.get(class_type)
+        if not heap:
+            return None
+        with self.__lock:
+            free = self.__free_mask[class_type]
+            while heap and not free >> heap[0][1] & 1:
+                heapq.heappop(heap)
+            return heap[0][0] if heap else None
+
+    def count_free(self, class_type: Optional[str] = None) -> int:
+        if class_type is None:
+            return self.__free_total
+        return self.__free_count.get(class_type, 0)
+
+    def summary(self) -> Dict[str, dict]:
+        # Per class: free and total seats plus the lowest free fare, without touching individual seats
+        return {class_type: {"free": self.count_free(class_type), "total": self.count_seats(class_type),
+                             "lowest_fare": self.lowest_free_price(class_type)}
+                for class_type in self.__class_mask}
+
+    def count_seats(self, class_type: Optional[str] = None) -> int:
+        if class_type is None:
+            return len(self.__seats)
+        return self.__class_mask.get(class_type, 0).bit_count()
+
+    def class_types(self) -> List[str]:
+        return list(self.__class_mask)
+
+    def first_free(self, class_type: Optional[str] = None) -> Optional[Seat]:
+        mask = self._mask(class_type)
+        if not mask:
+            return None
+        return self.__seats[(mask & -mask).bit_length() - 1]
+
+    def next_free(self, class_type: Optional[str], after_seat_number: int) -> Optional[Seat]:
+        # "Next" follows the order seats were added to the flight
+        slot = self.__slots.get(after_seat_number)
+        if slot is None:
+            return self.first_free(class_type)
+        mask = self._mask(class_type) >> (slot + 1)
+        if not mask:
+            return None
+        return self.__seats[(mask & -mask).bit_length() + slot]
+
+    def iter_free(self, class_type: Optional[str] = None):
+        for slot in self._slots(self._mask(class_type)):
+            yield self.__seats[slot]
+
+    def get_seats(self) -> List[Seat]:
+        return self.__seats
+
+    def __contains__(self, seat_number) -> bool:
+        return seat_number in self.__slots
+
+    def __len__(self) -> int:
+        return len(self.__seats)
+
+    def __iter__(self):
+        return iter(self.__seats)
+
+
 # Flight Class
 class Flight(AirlineEntity):
-    def __init__(self, flight_number: int, origin: str, destination: str, departure_time: str):
+    def __init__(self, flight_number: int, origin: str, destination: str, departure_time: str,
+                 arrival_time: Optional[str] = None, seat_loader=None, seat_summary=None):
         self.__flight_number = flight_number
         self.__origin = origin
         self.__destination = destination
         self.__departure_time = departure_time
-        self.__seats: List[Seat] = []
+        self.__arrival_time = arrival_time
+        self.__seats = SeatInventory()
+        # Optional callable returning the flight's Seat objects; run on first inventory access
+        self.__seat_loader = seat_loader
+        # Optional callable giving SeatInventory.summary() from storage while the seats are unloaded
+        self.__seat_summary = seat_summary
 
     def add_seat(self, seat: Seat):
-        self.__seats.append(seat)
+        self.get_inventory().add(seat)
 
-    def display_details(self):
+    def display_details(self, seat_lines=None):
+        # seat_lines: pre-rendered seat rows (e.g. from a QueryCache); rendered here when omitted
         print(f"\n ✈️ Flight {self.__flight_number} — {self.__origin} ➡ {self.__destination}")
         print(f"Departure Time: {self.__departure_time}")
+        if self.__arrival_time:
+            print(f"Arrival Time: {self.__arrival_time}")
         print("Available Seats:")
-        for seat in self.__seats:
+        if seat_lines is not None:
+            print("\n".join(seat_lines))
+            return
+        for seat in self.iter_seats():
             print(seat)
     
     def get_flights(self):
         return self.__flight_number
     
+    def get_origin(self):
+        return self.__origin
+
     def get_destination(self):
         return self.__destination
+
+    def get_departure_time(self):
+        return self.__departure_time
+
+    def get_arrival_time(self):
+        return self.__arrival_time
     
 
     def book_seat(self, seat_number: int):
-        for seat in self.__seats:
-            if seat.get_seat_number() == seat_number:
-                if seat.book_seat():
-                    return seat
-                else:
-                    print(f"❌ Seat {seat_number} is already booked.")
-                    return None
-        print(f"Seat {seat_number} not found.")
+        seat = self.get_inventory().get(seat_number)
+        if seat is None:
+            print(f"Seat {seat_number} not found.")
+            return None
+        if seat.book_seat():
+            return seat
+        print(f"❌ Seat {seat_number} is already booked.")
         return None
     
     def get_seats(self):    
+        return self.get_inventory().get_seats()
+
+    def get_seat(self, seat_number: int) -> Optional[Seat]:
+        return self.get_inventory().get(seat_number)
+
+    def iter_seats(self):
+        # Unloaded flights stream their seats straight from storage without hydrating the inventory
+        loader = self.__seat_loader
+        return iter(self.__seats) if loader is None else loader()
+
+    def is_loaded(self) -> bool:
+        return self.__seat_loader is None
+
+    def get_lock(self):
+        # The inventory's lock, without loading the seats
+        return self.__seats.get_lock()
+
+    def get_inventory(self) -> SeatInventory:
+        if self.__seat_loader is not None:
+            with self.__seats.get_lock():
+                loader = self.__seat_loader
+                if loader is not None:
+                    for seat in loader():
+                        self.__seats.add(seat)
+                    self.__seat_loader = None
         return self.__seats
+
+    def get_seat_summary(self) -> Dict[str, dict]:
+        # Per class free/total/lowest fare; unloaded flights answer from storage when they can
+        if self.__seat_loader is not None and self.__seat_summary is not None:
+            return self.__seat_summary()
+        return self.get_inventory().summary()
+
+    def summary(self) -> dict:
+        # One listing row: schedule plus per-class free counts and lowest fares
+        return {"flight_number": self.__flight_number, "origin": self.__origin,
+                "destination": self.__destination, "departure_time": self.__departure_time,
+                "arrival_time": self.__arrival_time, "classes": self.get_seat_summary()}
+
+    def to_dict(self) -> dict:
+        # Summary only; seats are fetched separately so large flights stay cheap to list
+        if self.__seat_loader is None:
+            free, total = self.__seats.count_free(), len(self.__seats)
+        else:
+            classes = self.get_seat_summary().values()
+            free, total = sum(entry["free"] for entry in classes), sum(entry["total"] for entry in classes)
+        return {"flight_number": self.__flight_number, "origin": self.__origin,
+                "destination": self.__destination, "departure_time": self.__departure_time,
+                "arrival_time": self.__arrival_time, "free_seats": free, "total_seats": total}
  
 
 # Ticket Class
 class Ticket(AirlineEntity):
+    __slots__ = ("__ticket_number", "__passenger", "__flight", "__seat", "__baggage", "__payment_status", "__payment")
+
     def __init__(self, ticket_number: int, passenger: Passenger, flight: Flight, seat: Seat, baggage: Baggage = None, payment_status: bool = False):
         try:
             self.__ticket_number = int(ticket_number)
@@ -195,9 +529,32 @@ class Ticket(AirlineEntity):
             return self.__passenger
         
 
+    def get_flight(self):
+        return self.__flight
+
+    def get_payment_status(self):
+        return self.__payment_status
+
+
     def set_baggage(self, baggage: Baggage):
         self.__baggage = baggage
 
+    def get_baggage(self):
+        return self.__baggage
+
+    def get_payment(self):
+        return self.__payment
+
+    def to_dict(self) -> dict:
+        return {"ticket_number": self.__ticket_number,
+                "passport_no": self.__passenger.get_passport_no(),
+                "flight_number": self.__flight.get_flights(),
+                "seat_number": self.__seat.get_seat_number(),
+                "class_type": self.__seat.get_class_type(),
+                "price": self.__seat.get_price(),
+                "payment_status": self.__payment_status,
+                "baggage_id": self.__baggage.get_baggage_id() if self.__baggage else None}
+
     def get_seat(self):
             return self.__seat
         
@@ -233,6 +590,8 @@ class Ticket(AirlineEntity):
 
 
 class Payment:
+    __slots__ = ("__ticket", "__amount", "__payment_status", "__card_number")
+
     def __init__(self, ticket: Ticket, amount: float, card_number: int):
         if amount <= 0:
             raise ValueError("Amount must be a positive number.")
@@ -243,19 +602,29 @@ class Payment:
         self.__payment_status = False
         self.__card_number = str(card_number)
     
-    def is_valid_card_number(self, card_number: str) -> bool:
+    @staticmethod
+    def is_valid_card_number(card_number: str) -> bool:
         return card_number.isdigit() and len(card_number) == 16
     
+    def get_masked_card(self):
+        return "**** **** **** " + self.__card_number[-4:]
+
+    def settle(self) -> bool:
+        # Marks the payment and its ticket as paid; False if it was already settled
+        if self.__payment_status:
+            return False
+        self.__payment_status = True
+        self.__ticket.update_payment_status(True)
+        return True
+
     def make_payment(self):
         if self.__payment_status:
             print(f"⚠️ Payment already made for ticket {self.__ticket.get_ticket_number()}.")
             return
 
         try:
-            masked_card = "**** **** **** " + self.__card_number[-4:]
-            print(f"Processing Card payment of ${self.__amount} using card ending with {masked_card}...")
-            self.__payment_status = True
-            self.__ticket.update_payment_status(True)
+            print(f"Processing Card payment of ${self.__amount} using card ending with {self.get_masked_card()}...")
+            self.settle()
             print(f"✅ Card payment successful for Ticket {self.__ticket.get_ticket_number()}.")
         except Exception as e:
             print(f"❌ Payment failed due to: {e}")
@@ -269,6 +638,10 @@ class Payment:
     def get_ticket(self):
         return self.__ticket
 
+    def to_dict(self) -> dict:
+        return {"ticket_number": self.__ticket.get_ticket_number(), "amount": self.__amount,
+                "payment_status": self.__payment_status, "card": self.get_masked_card()}
+
 
 # Airline Class
 class Airline(AirlineEntity):
@@ -282,292 +655,2438 @@ class Airline(AirlineEntity):
         print(f"\nAirline Details:\nName: {self.__name}\nCountry: {self.__country}\nFleet Size: {self.__fleet_size}\nIATA Code: {self.__iata_code}")
 
 
-# Airline Management System
-class AirlineManagementSystem:
+# Flight Registry: flights keyed by number, with origin/destination/route indexes
+class FlightRegistry:
     def __init__(self):
-        self.__passengers = []
-        self.__flights = []
-        self.__tickets = []
-        self.__baggage = []
-        self.__current_passenger = None
-        self.__admin_username = "admin"
-        self.__admin_password = "admin"
+        self.__by_number: Dict[int, Flight] = {}
+        self.__by_origin: Dict[str, Dict[int, Flight]] = {}
+        self.__by_destination: Dict[str, Dict[int, Flight]] = {}
+        self.__by_route: Dict[tuple, Dict[int, Flight]] = {}
 
-    def get_flights(self):
-        return self.__flights
+    @staticmethod
+    def _key(place: str) -> str:
+        return str(place).strip().casefold()
 
-    def admin_menu(self):
-        while True:
-            print("\nAdmin Panel")
-            print("1. Add New Flight")
-            print("2. Add Seats to Flight")
-            print("3. View All Flights")
-            print("4. View All Bookings")
-            print("5. View Registered Passengers")
-            print("6. Cancel a Ticket")
-            print("7. Logout")
+    @staticmethod
+    def _index(index: dict, key, flight: Flight):
+        index.setdefault(key, {})[flight.get_flights()] = flight
 
-            choice = self.get_valid_input("Enter your choice: ", int)
+    @staticmethod
+    def _unindex(index: dict, key, flight_number: int):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(flight_number, None)
+            if not bucket:
+                del index[key]
 
-            if choice == 1:
-                self.add_new_flight()
-            elif choice == 2:
-                self.add_seats_to_flight()
-            elif choice == 3:
-                self.view_flights()
-            elif choice == 4:
-                self.view_all_bookings()
-            elif choice == 5:
-                self.view_all_passengers()
-            elif choice == 6:
-                ticket_number = self.get_valid_input("Enter Ticket Number to Cancel: ", int)
-                self.cancel_ticket(ticket_number)
-            elif choice == 7:
-                print("Logged out from Admin Panel.")
-                break
-            else:
-                print("Invalid choice. Please try again.")
+    def add(self, flight: Flight):
+        flight_number = flight.get_flights()
+        if flight_number in self.__by_number:
+            raise ValueError(f"Flight {flight_number} already exists.")
+        origin = self._key(flight.get_origin())
+        destination = self._key(flight.get_destination())
+        self.__by_number[flight_number] = flight
+        self._index(self.__by_origin, origin, flight)
+        self._index(self.__by_destination, destination, flight)
+        self._index(self.__by_route, (origin, destination), flight)
 
-    def add_new_flight(self):
-        print("\nAdd New Flight")
-        flight_number = self.get_valid_input("Enter Flight Number: ", int)
+    def remove(self, flight_number: int) -> Optional[Flight]:
+        flight = self.__by_number.pop(flight_number, None)
+        if flight is None:
+            return None
+        origin = self._key(flight.get_origin())
+        destination = self._key(flight.get_destination())
+        self._unindex(self.__by_origin, origin, flight_number)
+        self._unindex(self.__by_destination, destination, flight_number)
+        self._unindex(self.__by_route, (origin, destination), flight_number)
+        return flight
 
-        for flight in self.get_flights():
-            if flight.get_flights() == flight_number:
-                print("❌ Flight with this number already exists.")
-                return
+    def get(self, flight_number: int) -> Optional[Flight]:
+        return self.__by_number.get(flight_number)
 
-        while True:
-            origin = self.get_valid_input("Enter Origin: ", str)
-            if origin.isalpha():
-                break
-            else:
-                print("Invalid Input")
-                
-        while True:
-            destination = self.get_valid_input("Enter Destination: ", str)
-            if destination.isalpha():
-                break
-            else:
-                print("Invalid Input")
-                
-        departure_time = self.get_valid_input("Enter Departure Time: ", str)
-        flight = Flight(flight_number, origin, destination, departure_time)
-        self.__flights.append(flight)
-        print("✅ New flight added successfully.")
+    def get_flights(self) -> List[Flight]:
+        return list(self.__by_number.values())
 
-    def add_seats_to_flight(self):
-        flight_number = self.get_valid_input("Enter Flight Number to Add Seats: ", int)
+    def by_origin(self, origin: str) -> List[Flight]:
+        return list(self.__by_origin.get(self._key(origin), {}).values())
 
-        for flight in self.__flights:
-            if flight.get_flights() == flight_number:
-                while True:
-                    # Loop until user provides a unique seat number
-                    while True:
-                        seat_number = self.get_valid_input("Enter Seat Number: ", int)
-
-                        # Check if seat number already exists in flight
-                        existing_seat = None
-                        for seat in flight.get_seats():
-                            if seat.get_seat_number() == seat_number:
-                                existing_seat = seat
-                                break
-
-                        if existing_seat:
-                            print(f"❌ Seat number {seat_number} already exists. Please enter a different seat number.")
-                        else:
-                            break  # Valid seat number
-
-                    # Validate class type input
-                    while True:   
-                        class_type = input("Enter Class Type (Economy or Business): ").strip().capitalize()
-                        if class_type in ["Economy", "Business"]:
-                            break
-                        print("❌ Invalid class type. Please enter 'Economy' or 'Business'.")
-
-                    price = self.get_valid_input("Enter Price: ", float)
-
-                    # Create and add the seat
-                    new_seat = Seat(seat_number, class_type, price)
-                    flight.add_seat(new_seat)
-                    print("✅ Seat added.")
-
-                    more = input("Add another seat? (y/n): ").lower()
-                    if more != 'y':
-                        break
-                return
+    def by_destination(self, destination: str) -> List[Flight]:
+        return list(self.__by_destination.get(self._key(destination), {}).values())
 
-        print("❌ Flight not found.")
+    def by_route(self, origin: str, destination: str) -> List[Flight]:
+        key = (self._key(origin), self._key(destination))
+        return list(self.__by_route.get(key, {}).values())
 
-    def cancel_ticket(self, ticket_number: int):
-        for ticket in self.__tickets:
-            if ticket.get_ticket_number() == ticket_number:
-                # Make the seat available again
-                ticket.get_seat().make_available()
-                self.__tickets.remove(ticket)
-                print(f"✅ Ticket {ticket_number} has been successfully canceled.")
-                return
-        print(f"❌ Ticket {ticket_number} not found.")
+    def __contains__(self, flight_number) -> bool:
+        return flight_number in self.__by_number
 
-    def view_all_bookings(self):
-        if not self.__tickets:
-            print("No bookings available.")
-        else:
-            for ticket in self.__tickets:
-                ticket.view_ticket()
+    def __len__(self) -> int:
+        return len(self.__by_number)
 
-    def view_all_passengers(self):
-        if not self.__passengers:
-            print("No registered passengers.")
-        else:
-            for passenger in self.__passengers:
-                passenger.view_details()
+    def __iter__(self):
+        return iter(self.__by_number.values())
 
-    def main_menu(self):
-        while True:
-            print("\nAirline Management System")
-            print("1. Register or Login")
-            print("2. Admin Panel")
-            print("3. Exit")
 
-            choice = self.get_valid_input("Enter your choice: ", int)
+# Passenger Directory: registered passengers keyed by passport number
+class PassengerDirectory:
+    def __init__(self):
+        self.__by_passport: Dict[str, Passenger] = {}
 
-            if choice == 1:
-                self.auth_menu()
-            elif choice == 2:
-                self.admin_login()
-            elif choice == 3:
-                print("Thank you for using the Airline Management System!")
-                break
+    def register(self, passenger: Passenger):
+        passport_no = passenger.get_passport_no()
+        # setdefault is atomic, so concurrent registrations of one passport cannot both succeed
+        if self.__by_passport.setdefault(passport_no, passenger) is not passenger:
+            raise ValueError(f"Passport number {passport_no} is already registered.")
+
+    def register_many(self, passengers) -> List[Passenger]:
+        # Bulk load for migrations; duplicates are skipped and returned to the caller
+        rejected = []
+        directory = self.__by_passport
+        for passenger in passengers:
+            passport_no = passenger.get_passport_no()
+            if passport_no in directory:
+                rejected.append(passenger)
             else:
-                print("Invalid choice. Please enter a valid option.")
+                directory[passport_no] = passenger
+        return rejected
 
-    def admin_login(self):
-        username = input("Enter Admin Username: ")
-        password = input("Enter Admin Password: ")
+    def get(self, passport_no: str) -> Optional[Passenger]:
+        return self.__by_passport.get(passport_no)
 
-        if username == self.__admin_username and password == self.__admin_password:
-            print("✅ Admin login successful.")
-            self.admin_menu()
-        else:
-            print("❌ Invalid credentials. Access denied.")
+    def remove(self, passport_no: str) -> Optional[Passenger]:
+        return self.__by_passport.pop(passport_no, None)
 
-    def auth_menu(self):
-        while True:
-            print("\n1. Register Passenger")
-            print("2. Login Passenger")
-            choice = self.get_valid_input("Enter your choice: ", int)
-            if choice == 1:
-                self.register_passenger()
-                self.logged_in_menu()
-                break
-            elif choice == 2:
-                self.login_passenger()
-                if self.__current_passenger:
-                    self.logged_in_menu()
-                break
-            else:
-                print("Invalid choice. Please try again.")
+    def get_passengers(self) -> List[Passenger]:
+        return list(self.__by_passport.values())
 
-    def logged_in_menu(self):
-        while True:
-            print("\n1. View Your Details")
-            print("2. View Flights and Book a Seat")
-            print("3. View Your Tickets")
-            print("4. Manage Baggage")
-            print("5. View Airline Info")
-            print("6. Cancel a Ticket")
-            print("7. Make Payment for Ticket")
-            print("8. Logout")
+    def __contains__(self, passport_no) -> bool:
+        return passport_no in self.__by_passport
 
-            choice = self.get_valid_input("Enter your choice: ", int)
+    def __len__(self) -> int:
+        return len(self.__by_passport)
 
-            if choice == 1:
-                self.view_passenger_details()
-            elif choice == 2:
-                self.view_flights()
-                self.book_seat()
-            elif choice == 3:
-                self.view_tickets()
-            elif choice == 4:
-                self.manage_baggage()
-            elif choice == 5:
-                self.view_airline_details()
-            elif choice == 6:
-                ticket_number = self.get_valid_input("Enter your Ticket Number to cancel: ", int)
-                found = False
-                for ticket in self.__tickets:
-                    if ticket.get_ticket_number() == ticket_number and ticket.get_passenger() == self.__current_passenger:
-                        self.cancel_ticket(ticket_number)
-                        found = True
-                        break
-                if not found:
-                    print("❌ Ticket not found or does not belong to you.")
-            elif choice == 7:
-                self.make_payment_for_ticket()
-            elif choice == 8:
-                self.__current_passenger = None
-                print("Logged out successfully.")
-                break
-            else:
-                print("Invalid choice. Please try again.")
+    def __iter__(self):
+        return iter(self.__by_passport.values())
 
-    def book_seat(self):
-        if not self.__current_passenger:
-            print("Please login to book a seat.")
-            return
 
-        flight_number = self.get_valid_input("Enter Flight Number to Book Seat: ", int)
-        found_flight = None
-        
-        # Find the flight
-        for flight in self.__flights:
-            if flight.get_flights() == flight_number:
-                found_flight = flight
-                break
-        
-        if not found_flight:
-            print("Flight not found.")
-            return
+# Ticket Store: tickets keyed by number, indexed by passenger passport
+class TicketStore:
+    def __init__(self, first_ticket_number: int = 1, step: int = 1):
+        # With step > 1 only first_ticket_number + k * step is handed out, so several stores
+        # (e.g. one per shard) can allocate without ever colliding
+        self.__tickets: Dict[int, Ticket] = {}
+        self.__by_passenger: Dict[str, Dict[int, Ticket]] = {}
+        self.__by_flight: Dict[int, Dict[int, Ticket]] = {}
+        self.__first_number = first_ticket_number
+        self.__step = step
+        self.__next_number = first_ticket_number
+        self.__lock = threading.Lock()
 
-        # Display available seats
-        print("\nAvailable Seats:")
-        available_seats = [seat for seat in found_flight.get_seats() if seat.is_available()]
-        if not available_seats:
-            print("No available seats on this flight.")
-            return
-        
-        for seat in available_seats:
-            print(seat)
+    def _align(self, number: int) -> int:
+        # Smallest number >= `number` that this store may allocate
+        return number + (self.__first_number - number) % self.__step
 
-        # Get seat number to book
-        while True:
-            seat_number = self.get_valid_input("\nEnter Seat Number to book (or 0 to cancel): ", int)
-            if seat_number == 0:
-                return
-            
-            # Find the seat
-            selected_seat = None
-            for seat in found_flight.get_seats():
-                if seat.get_seat_number() == seat_number:
-                    selected_seat = seat
-                    break
-            
-            if not selected_seat:
-                print("Seat not found. Please try again.")
-                continue
-                
-            if not selected_seat.is_available():
-                print("Seat is already booked. Please choose another seat.")
-                continue
-                
-            # Book the seat
-            if selected_seat.book_seat():
-                # Create ticket
-                ticket = Ticket(len(self.__tickets) + 1, self.__current_passenger, found_flight, selected_seat,None)  # No baggage initially
-                self.__tickets.append(ticket)
-                print("\nSeat booked successfully!")
+    def next_ticket_number(self) -> int:
+        # Monotonic, so numbers freed by cancellations are never handed out again
+        with self.__lock:
+            ticket_number = self.__next_number
+            self.__next_number += self.__step
+            return ticket_number
+
+    def add(self, ticket: Ticket):
+        ticket_number = ticket.get_ticket_number()
+        passport_no = ticket.get_passenger().get_passport_no()
+        with self.__lock:
+            if ticket_number in self.__tickets:
+                raise ValueError(f"Ticket {ticket_number} already exists.")
+            self.__tickets[ticket_number] = ticket
+            self.__by_passenger.setdefault(passport_no, {})[ticket_number] = ticket
+            self.__by_flight.setdefault(ticket.get_flight().get_flights(), {})[ticket_number] = ticket
+            if ticket_number >= self.__next_number:
+                self.__next_number = self._align(ticket_number + 1)
+
+    def peek_next_ticket_number(self) -> int:
+        return self.__next_number
+
+    def advance_to(self, next_ticket_number: int):
+        # Used on recovery so numbers of tickets cancelled before a snapshot stay retired
+        with self.__lock:
+            self.__next_number = max(self.__next_number, self._align(next_ticket_number))
+
+    def get(self, ticket_number: int) -> Optional[Ticket]:
+        return self.__tickets.get(ticket_number)
+
+    def remove(self, ticket_number: int) -> Optional[Ticket]:
+        with self.__lock:
+            ticket = self.__tickets.pop(ticket_number, None)
+            if ticket is None:
+                return None
+            passport_no = ticket.get_passenger().get_passport_no()
+            for index, key in ((self.__by_passenger, passport_no),
+                               (self.__by_flight, ticket.get_flight().get_flights())):
+                bucket = index.get(key)
+                if bucket is not None:
+                    bucket.pop(ticket_number, None)
+                    if not bucket:
+                        del index[key]
+            return ticket
+
+    def for_passenger(self, passenger: Passenger) -> List[Ticket]:
+        return list(self.__by_passenger.get(passenger.get_passport_no(), {}).values())
+
+    def for_flight(self, flight_number: int) -> List[Ticket]:
+        return list(self.__by_flight.get(flight_number, {}).values())
+
+    def get_tickets(self) -> List[Ticket]:
+        return list(self.__tickets.values())
+
+    def __contains__(self, ticket_number) -> bool:
+        return ticket_number in self.__tickets
+
+    def __len__(self) -> int:
+        return len(self.__tickets)
+
+    def __iter__(self):
+        return iter(self.__tickets.values())
+
+
+# Baggage Registry: bags keyed by ID, with bag -> ticket/flight links and per-flight weight arrays
+class BaggageRegistry:
+    """
+    Each flight keeps its bag IDs in a list with a parallel array('d') of weights, so fees for a
+    whole flight are one pass over contiguous doubles (numpy when installed). A bag's position is
+    indexed so leaving a flight is an O(1) swap with the last bag. Bags whose ticket is cancelled
+    stay registered by ID but leave the flight.
+    """
+
+    def __init__(self):
+        self.__by_id: Dict[int, Baggage] = {}
+        self.__ticket_of: Dict[int, int] = {}          # baggage ID -> ticket number
+        self.__flight_of: Dict[int, int] = {}          # baggage ID -> flight number
+        self.__flight_ids: Dict[int, List[int]] = {}   # flight number -> baggage IDs
+        self.__flight_weights: Dict[int, object] = {}  # flight number -> array('d') aligned with the IDs
+        self.__position_of: Dict[int, int] = {}        # baggage ID -> index in its flight's IDs and weights
+        self.__lock = threading.Lock()
+
+    def add(self, baggage: Baggage, ticket: Optional[Ticket] = None):
+        baggage_id = baggage.get_baggage_id()
+        with self.__lock:
+            if baggage_id in self.__by_id:
+                raise ValueError(f"Baggage {baggage_id} already exists.")
+            self.__by_id[baggage_id] = baggage
+            if ticket is not None:
+                self._link_locked(baggage, ticket)
+
+    def link(self, baggage_id: int, ticket: Ticket):
+        with self.__lock:
+            self._unlink_locked(baggage_id)
+            self._link_locked(self.__by_id[baggage_id], ticket)
+
+    def _link_locked(self, baggage: Baggage, ticket: Ticket):
+        baggage_id = baggage.get_baggage_id()
+        flight_number = ticket.get_flight().get_flights()
+        self.__ticket_of[baggage_id] = ticket.get_ticket_number()
+        self.__flight_of[baggage_id] = flight_number
+        ids = self.__flight_ids.setdefault(flight_number, [])
+        self.__position_of[baggage_id] = len(ids)
+        ids.append(baggage_id)
+        self.__flight_weights.setdefault(flight_number, array("d")).append(baggage.get_weight())
+
+    def unlink(self, baggage_id: int):
+        with self.__lock:
+            self._unlink_locked(baggage_id)
+
+    def _unlink_locked(self, baggage_id: int):
+        self.__ticket_of.pop(baggage_id, None)
+        flight_number = self.__flight_of.pop(baggage_id, None)
+        if flight_number is None:
+            return
+        ids = self.__flight_ids[flight_number]
+        weights = self.__flight_weights[flight_number]
+        position = self.__position_of.pop(baggage_id)
+        # Swap-remove: the last bag takes the leaving bag's slot
+        last_id, last_weight = ids.pop(), weights.pop()
+        if position < len(ids):
+            ids[position], weights[position] = last_id, last_weight
+            self.__position_of[last_id] = position
+        if not ids:
+            del self.__flight_ids[flight_number], self.__flight_weights[flight_number]
+
+    def get(self, baggage_id: int) -> Optional[Baggage]:
+        return self.__by_id.get(baggage_id)
+
+    def ticket_for(self, baggage_id: int) -> Optional[int]:
+        return self.__ticket_of.get(baggage_id)
+
+    def flight_for(self, baggage_id: int) -> Optional[int]:
+        return self.__flight_of.get(baggage_id)
+
+    def for_flight(self, flight_number: int) -> List[Baggage]:
+        return [self.__by_id[baggage_id] for baggage_id in self.__flight_ids.get(flight_number, ())]
+
+    def update_status(self, baggage_ids, status: str) -> List[int]:
+        # Returns the IDs that were found and updated
+        updated = []
+        with self.__lock:
+            for baggage_id in baggage_ids:
+                baggage = self.__by_id.get(baggage_id)
+                if baggage is not None:
+                    baggage.update_status(status)
+                    updated.append(baggage_id)
+        return updated
+
+    def update_flight_status(self, flight_number: int, status: str) -> List[int]:
+        return self.update_status(list(self.__flight_ids.get(flight_number, ())), status)
+
+    def excess_fees(self, flight_number: int, allowed_weight: float = ALLOWED_BAGGAGE_WEIGHT,
+                    fee_per_kg: float = EXCESS_BAGGAGE_FEE_PER_KG) -> dict:
+        # Same arithmetic as Baggage.excess_fee, for every bag on the flight at once
+        with self.__lock:
+            ids = list(self.__flight_ids.get(flight_number, ()))
+            weights = array("d", self.__flight_weights.get(flight_number, ()))
+        allowed_weight, fee_per_kg = float(allowed_weight), float(fee_per_kg)
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        if numpy is not None:
+            excess = numpy.maximum(numpy.frombuffer(weights, dtype=numpy.float64) - allowed_weight, 0.0)
+            fees = excess * fee_per_kg
+            excess_weights, fee_list, total = excess.tolist(), fees.tolist(), float(fees.sum())
+            overweight = int(numpy.count_nonzero(excess))
+        else:
+            # Whole-column passes over the unboxed weights; counting zeros stays in C
+            excess_weights = [weight - allowed_weight if weight > allowed_weight else 0.0
+                              for weight in weights.tolist()]
+            fee_list = [weight * fee_per_kg for weight in excess_weights]
+            total = sum(fee_list)
+            overweight = len(excess_weights) - excess_weights.count(0.0)
+        return {"flight_number": flight_number, "allowed_weight": allowed_weight, "baggage_ids": ids,
+                "excess_weights": excess_weights, "fees": fee_list, "total_fee": total,
+                "overweight": overweight}
+
+    def get_baggage(self) -> List[Baggage]:
+        return list(self.__by_id.values())
+
+    def __contains__(self, baggage_id) -> bool:
+        return baggage_id in self.__by_id
+
+    def __len__(self) -> int:
+        return len(self.__by_id)
+
+    def __iter__(self):
+        return iter(list(self.__by_id.values()))
+
+
+# Seat Holds: unpaid tickets expire after a TTL, tracked in a min-heap of deadlines
+class SeatHoldScheduler:
+    """
+    hold() pushes (deadline, ticket number) onto a heap and records the deadline in a dict;
+    confirming or discarding a hold only drops the dict entry, and stale heap entries are skipped
+    when they reach the top (lazy deletion). Every operation is O(log n) in outstanding holds.
+    The heap is rebuilt from the dict when stale entries outnumber live ones.
+    """
+
+    def __init__(self, ttl: float = 900.0, clock=time.monotonic):
+        self.__ttl = float(ttl)
+        self.__clock = clock
+        self.__heap: List[tuple] = []
+        self.__deadlines: Dict[int, float] = {}
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Condition(self.__lock)
+        self.__expired = 0
+        self.__confirmed = 0
+        self.__stop = False
+        self.__worker = None
+
+    def get_ttl(self) -> float:
+        return self.__ttl
+
+    def hold(self, ticket_number: int, now: Optional[float] = None, deadline: Optional[float] = None) -> float:
+        # `deadline` restores an earlier hold as it was instead of starting a fresh TTL
+        if deadline is None:
+            deadline = (self.__clock() if now is None else now) + self.__ttl
+        with self.__lock:
+            self.__deadlines[ticket_number] = deadline
+            heapq.heappush(self.__heap, (deadline, ticket_number))
+            if self.__heap[0][1] == ticket_number:
+                self.__wakeup.notify()  # New earliest deadline; the worker may be sleeping past it
+        return deadline
+
+    def confirm(self, ticket_number: int) -> bool:
+        # Paid: the ticket keeps its seat for good
+        with self.__lock:
+            if self.__deadlines.pop(ticket_number, None) is None:
+                return False
+            self.__confirmed += 1
+            self._compact_locked()
+            return True
+
+    def discard(self, ticket_number: int):
+        # Cancelled: the seat was released some other way
+        with self.__lock:
+            if self.__deadlines.pop(ticket_number, None) is not None:
+                self._compact_locked()
+
+    def _compact_locked(self):
+        if len(self.__heap) > 1024 and len(self.__heap) > 2 * len(self.__deadlines):
+            self.__heap = [(deadline, number) for number, deadline in self.__deadlines.items()]
+            heapq.heapify(self.__heap)
+
+    def deadline(self, ticket_number: int) -> Optional[float]:
+        return self.__deadlines.get(ticket_number)
+
+    def is_expired(self, ticket_number: int, now: Optional[float] = None) -> bool:
+        deadline = self.__deadlines.get(ticket_number)
+        return deadline is not None and deadline <= (self.__clock() if now is None else now)
+
+    def next_deadline(self) -> Optional[float]:
+        with self.__lock:
+            self._drop_stale_locked()
+            return self.__heap[0][0] if self.__heap else None
+
+    def _drop_stale_locked(self):
+        heap = self.__heap
+        while heap and self.__deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def pop_expired(self, now: Optional[float] = None) -> List[int]:
+        # Removes and returns every ticket whose hold has run out
+        now = self.__clock() if now is None else now
+        expired = []
+        with self.__lock:
+            heap = self.__heap
+            while heap and heap[0][0] <= now:
+                deadline, ticket_number = heapq.heappop(heap)
+                if self.__deadlines.get(ticket_number) == deadline:
+                    del self.__deadlines[ticket_number]
+                    expired.append(ticket_number)
+            self.__expired += len(expired)
+        return expired
+
+    # Background expiry
+    def start(self, release):
+        # release(now) is called whenever the earliest deadline passes, e.g. BookingService.release_expired_holds
+        if self.__worker is None:
+            self.__stop = False
+            self.__worker = threading.Thread(target=self._expiry_loop, args=(release,), daemon=True)
+            self.__worker.start()
+
+    def _expiry_loop(self, release):
+        while True:
+            with self.__lock:
+                while not self.__stop:
+                    self._drop_stale_locked()
+                    delay = self.__heap[0][0] - self.__clock() if self.__heap else None
+                    if delay is not None and delay <= 0:
+                        break
+                    self.__wakeup.wait(delay)
+                if self.__stop:
+                    return
+            release(self.__clock())
+
+    def close(self):
+        with self.__lock:
+            self.__stop = True
+            self.__wakeup.notify()
+        if self.__worker is not None:
+            self.__worker.join()
+            self.__worker = None
+
+    def get_stats(self) -> dict:
+        return {"outstanding": len(self.__deadlines), "heap_entries": len(self.__heap),
+                "expired": self.__expired, "confirmed": self.__confirmed, "ttl": self.__ttl}
+
+    def __len__(self) -> int:
+        return len(self.__deadlines)
+
+    def __contains__(self, ticket_number) -> bool:
+        return ticket_number in self.__deadlines
+
+
+# Waitlists: per-flight, per-class priority queues of passengers waiting for a seat
+class Waitlists:
+    """
+    One heap per (flight, class type), plus one per flight for passengers who take any class.
+    Entries are ordered by (-loyalty tier, fare class, join order): higher tiers first, then
+    Business before Economy before "any", then first come first served. Leaving only drops the
+    entry from an index; stale heap entries are skipped when they surface (lazy deletion).
+    """
+
+    FARE_RANK = {"Business": 0, "Economy": 1, None: 2}
+    TIER_BOOKINGS = (1, 3, 10)  # Paid bookings needed for loyalty tiers 1, 2 and 3
+
+    def __init__(self):
+        self.__heaps: Dict[tuple, list] = {}
+        self.__entries: Dict[tuple, tuple] = {}   # (flight number, passport no) -> live heap entry
+        self.__sequence = 0
+        self.__lock = threading.Lock()
+
+    def add(self, flight_number: int, passport_no: str, class_type: Optional[str] = None, tier: int = 0,
+            sequence: Optional[int] = None) -> dict:
+        with self.__lock:
+            if (flight_number, passport_no) in self.__entries:
+                raise ValueError(f"Passenger {passport_no} is already waitlisted on flight {flight_number}.")
+            if sequence is None:
+                self.__sequence += 1
+                sequence = self.__sequence
+            else:
+                self.__sequence = max(self.__sequence, sequence)  # Replayed joins keep their place
+            entry = (-int(tier), self.FARE_RANK.get(class_type, 2), sequence, passport_no, class_type)
+            self.__entries[(flight_number, passport_no)] = entry
+            heapq.heappush(self.__heaps.setdefault((flight_number, class_type), []), entry)
+            return self._to_dict(flight_number, entry)
+
+    def remove(self, flight_number: int, passport_no: str) -> bool:
+        with self.__lock:
+            return self.__entries.pop((flight_number, passport_no), None) is not None
+
+    def _head_locked(self, flight_number: int, class_type: Optional[str]):
+        heap = self.__heaps.get((flight_number, class_type))
+        while heap and self.__entries.get((flight_number, heap[0][3])) is not heap[0]:
+            heapq.heappop(heap)
+        if heap is not None and not heap:
+            del self.__heaps[(flight_number, class_type)]
+            return None
+        return heap[0] if heap else None
+
+    def pop_next(self, flight_number: int, class_type: str) -> Optional[dict]:
+        # Highest-priority passenger who can take a seat of class_type; removed from the waitlist
+        with self.__lock:
+            candidates = [entry for entry in (self._head_locked(flight_number, class_type),
+                                              self._head_locked(flight_number, None)) if entry is not None]
+            if not candidates:
+                return None
+            entry = min(candidates)
+            heapq.heappop(self.__heaps[(flight_number, entry[4])])
+            del self.__entries[(flight_number, entry[3])]
+            return self._to_dict(flight_number, entry)
+
+    def for_flight(self, flight_number: int) -> List[dict]:
+        # In promotion order across all classes (an "any class" entry can still lose a seat to a class match)
+        with self.__lock:
+            entries = [entry for (number, _), entry in self.__entries.items() if number == flight_number]
+        return [self._to_dict(flight_number, entry) for entry in sorted(entries)]
+
+    def get_entries(self) -> List[dict]:
+        with self.__lock:
+            items = list(self.__entries.items())
+        return [self._to_dict(flight_number, entry) for (flight_number, _), entry in sorted(items, key=lambda i: i[1][2])]
+
+    @staticmethod
+    def _to_dict(flight_number: int, entry: tuple) -> dict:
+        return {"flight_number": flight_number, "passport_no": entry[3], "class_type": entry[4],
+                "tier": -entry[0], "sequence": entry[2]}
+
+    def __contains__(self, key) -> bool:
+        # key: (flight number, passport no)
+        return key in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+# Service Results: structured outcomes returned by BookingService instead of printing
+class ServiceResult:
+    __slots__ = ("ok", "value", "error", "message")
+
+    def __init__(self, ok: bool, value=None, error: Optional[str] = None, message: str = ""):
+        self.ok = ok
+        self.value = value
+        self.error = error
+        self.message = message
+
+    @classmethod
+    def success(cls, value=None, message: str = ""):
+        return cls(True, value, None, message)
+
+    @classmethod
+    def failure(cls, error: str, message: str):
+        return cls(False, None, error, message)
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"ServiceResult(ok, {self.value!r})"
+        return f"ServiceResult({self.error}: {self.message})"
+
+
+# Error codes carried by failed ServiceResults
+INVALID_INPUT = "INVALID_INPUT"
+PASSENGER_EXISTS = "PASSENGER_EXISTS"
+PASSENGER_NOT_FOUND = "PASSENGER_NOT_FOUND"
+FLIGHT_EXISTS = "FLIGHT_EXISTS"
+FLIGHT_NOT_FOUND = "FLIGHT_NOT_FOUND"
+SEAT_EXISTS = "SEAT_EXISTS"
+SEAT_NOT_FOUND = "SEAT_NOT_FOUND"
+SEAT_TAKEN = "SEAT_TAKEN"
+NO_SEATS = "NO_SEATS"
+TICKET_NOT_FOUND = "TICKET_NOT_FOUND"
+NOT_TICKET_OWNER = "NOT_TICKET_OWNER"
+ALREADY_PAID = "ALREADY_PAID"
+BAGGAGE_EXISTS = "BAGGAGE_EXISTS"
+BAGGAGE_NOT_FOUND = "BAGGAGE_NOT_FOUND"
+HOLD_EXPIRED = "HOLD_EXPIRED"
+ALREADY_WAITLISTED = "ALREADY_WAITLISTED"
+NOT_WAITLISTED = "NOT_WAITLISTED"
+SEATS_AVAILABLE = "SEATS_AVAILABLE"
+PAYMENT_DECLINED = "PAYMENT_DECLINED"
+GATEWAY_ERROR = "GATEWAY_ERROR"
+PAYMENT_PENDING = "PAYMENT_PENDING"
+SERVER_ERROR = "SERVER_ERROR"
+
+
+# Booking Service: headless API over the flight, passenger and ticket stores
+class BookingService:
+    """
+    Every state change is announced to listeners as (event, data), where data is a plain
+    dict; apply_event() replays such events, which is how snapshots and logs are restored.
+    """
+
+    def __init__(self, first_ticket_number: int = 1, ticket_step: int = 1):
+        self.__passengers = PassengerDirectory()
+        self.__flights = FlightRegistry()
+        self.__tickets = TicketStore(first_ticket_number, ticket_step)
+        self.__baggage = BaggageRegistry()
+        self.__waitlists = Waitlists()
+        self.__listeners = []
+        self.__cache = None
+        self.__holds = None
+        self.__aggregates = None
+        self.__charging = set()  # Ticket numbers with a gateway charge in flight (see prepare_payment)
+
+    def get_passenger_directory(self) -> PassengerDirectory:
+        return self.__passengers
+
+    def get_flight_registry(self) -> FlightRegistry:
+        return self.__flights
+
+    def get_ticket_store(self) -> TicketStore:
+        return self.__tickets
+
+    def get_baggage(self) -> List[Baggage]:
+        return self.__baggage.get_baggage()
+
+    def get_baggage_registry(self) -> BaggageRegistry:
+        return self.__baggage
+
+    def get_waitlists(self) -> Waitlists:
+        return self.__waitlists
+
+    def get_cache(self) -> Optional["QueryCache"]:
+        return self.__cache
+
+    def set_cache(self, cache: Optional["QueryCache"]):
+        self.__cache = cache
+
+    def get_hold_scheduler(self) -> Optional[SeatHoldScheduler]:
+        return self.__holds
+
+    def get_aggregates(self) -> Optional["RevenueAggregates"]:
+        return self.__aggregates
+
+    def set_aggregates(self, aggregates: Optional["RevenueAggregates"]):
+        # Seeded from the current state here; events keep it current from then on
+        if self.__aggregates is not None:
+            self.__aggregates.detach()
+        self.__aggregates = aggregates
+        if aggregates is not None:
+            aggregates.attach(self)
+
+    def set_hold_scheduler(self, holds: Optional[SeatHoldScheduler]):
+        # Unpaid tickets (including ones already restored from storage) get a hold starting now
+        self.__holds = holds
+        if holds is not None:
+            for ticket in self.__tickets.get_tickets():
+                if not ticket.get_payment_status():
+                    holds.hold(ticket.get_ticket_number())
+
+    # Events
+    def add_listener(self, listener):
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.__listeners.remove(listener)
+
+    def _emit(self, event: str, data: dict):
+        for listener in self.__listeners:
+            listener(event, data)
+
+    # Passengers
+    def register_passenger(self, name: str, age: int, phone: str, address: str, passport_no: str) -> ServiceResult:
+        try:
+            age = int(age)
+        except (TypeError, ValueError):
+            return ServiceResult.failure(INVALID_INPUT, "Age must be a whole number.")
+        phone, passport_no = str(phone), str(passport_no)
+        if age < 18:
+            return ServiceResult.failure(INVALID_INPUT, "You must be 18 or older to register.")
+        if not phone.isdigit():
+            return ServiceResult.failure(INVALID_INPUT, "Invalid phone number! Please enter digits only.")
+        if not passport_no.isdigit():
+            return ServiceResult.failure(INVALID_INPUT, "Invalid passport number! Please enter digits only.")
+        passenger = Passenger(name, age, phone, address, passport_no)
+        try:
+            self.__passengers.register(passenger)
+        except ValueError:
+            return ServiceResult.failure(PASSENGER_EXISTS, "A passenger with this passport number is already registered.")
+        if self.__listeners:
+            self._emit("passenger_registered", passenger.to_dict())
+        return ServiceResult.success(passenger, f"Passenger {name} registered successfully!")
+
+    def is_registered(self, passport_no: str) -> bool:
+        return passport_no in self.__passengers
+
+    def login(self, passport_no: str) -> ServiceResult:
+        passenger = self.__passengers.get(str(passport_no))
+        if passenger is None:
+            return ServiceResult.failure(PASSENGER_NOT_FOUND, "Passenger not found! Please register.")
+        return ServiceResult.success(passenger, f"Welcome, {passenger.get_name()}!")
+
+    # Flights and seats
+    def add_flight(self, flight: Flight) -> ServiceResult:
+        try:
+            self.__flights.add(flight)
+        except ValueError:
+            return ServiceResult.failure(FLIGHT_EXISTS, "Flight with this number already exists.")
+        if self.__cache is not None:
+            self.__cache.flight_added(flight)
+        if self.__listeners:
+            self._emit("flight_added", _flight_event(flight))
+        return ServiceResult.success(flight, "New flight added successfully.")
+
+    def create_flight(self, flight_number: int, origin: str, destination: str, departure_time: str,
+                      arrival_time: Optional[str] = None) -> ServiceResult:
+        if not is_valid_place(origin) or not is_valid_place(destination):
+            return ServiceResult.failure(INVALID_INPUT, "Origin and destination must be alphabetic.")
+        try:
+            flight_number = int(flight_number)
+        except (TypeError, ValueError, OverflowError):
+            return ServiceResult.failure(INVALID_INPUT, "Flight number must be a whole number.")
+        return self.add_flight(Flight(flight_number, origin, destination, departure_time, arrival_time))
+
+    def add_seat(self, flight_number: int, seat_number: int, class_type: str, price: float) -> ServiceResult:
+        flight = self.__flights.get(flight_number)
+        if flight is None:
+            return ServiceResult.failure(FLIGHT_NOT_FOUND, "Flight not found.")
+        normalized = normalize_class_type(class_type)
+        if normalized is None:
+            return ServiceResult.failure(INVALID_INPUT, "Invalid class type. Please enter 'Economy' or 'Business'.")
+        seat = Seat(seat_number, normalized, price)
+        try:
+            flight.add_seat(seat)
+        except ValueError:
+            return ServiceResult.failure(SEAT_EXISTS, f"Seat number {seat_number} already exists.")
+        if self.__listeners:
+            self._emit("seat_added", dict(seat.to_dict(), flight_number=flight_number))
+        return ServiceResult.success(seat, "Seat added.")
+
+    def add_seats(self, flight_number: int, seats: List[Seat]) -> ServiceResult:
+        # Bulk path for schedule loads: seats are pre-validated and announced as one event
+        flight = self.__flights.get(flight_number)
+        if flight is None:
+            return ServiceResult.failure(FLIGHT_NOT_FOUND, "Flight not found.")
+        added = []
+        for seat in seats:
+            try:
+                flight.add_seat(seat)
+            except ValueError:
+                continue
+            added.append(seat)
+        if self.__listeners and added:
+            self._emit("seats_added", {"flight_number": flight_number, "seats": [seat.to_dict() for seat in added]})
+        return ServiceResult.success(added, f"{len(added)} seats added.")
+
+    def get_flight(self, flight_number: int) -> Optional[Flight]:
+        return self.__flights.get(flight_number)
+
+    def search_flights(self, origin: Optional[str] = None, destination: Optional[str] = None) -> List[Flight]:
+        if origin and destination:
+            return self.__flights.by_route(origin, destination)
+        if origin:
+            return self.__flights.by_origin(origin)
+        if destination:
+            return self.__flights.by_destination(destination)
+        return self.__flights.get_flights()
+
+    def list_flights(self, destination: Optional[str] = None, page: int = 1, page_size: int = 20) -> ServiceResult:
+        # One page of flight summaries (optionally to one destination); only that page's flights are read
+        if page < 1 or page_size < 1:
+            return ServiceResult.failure(INVALID_INPUT, "Page and page size must be positive.")
+        flights = self.__flights.by_destination(destination) if destination else self.__flights
+        total = len(flights)
+        start = (page - 1) * page_size
+        rows = [flight.summary() for flight in itertools.islice(flights, start, start + page_size)]
+        return ServiceResult.success({"page": page, "page_size": page_size, "total": total,
+                                      "pages": max(1, -(-total // page_size)), "flights": rows})
+
+    def available_seats(self, flight_number: int, class_type: Optional[str] = None) -> ServiceResult:
+        flight = self.__flights.get(flight_number)
+        if flight is None:
+            return ServiceResult.failure(FLIGHT_NOT_FOUND, "Flight not found.")
+        if class_type:
+            class_type = normalize_class_type(class_type)
+            if class_type is None:
+                return ServiceResult.failure(INVALID_INPUT, "Invalid class type. Please enter 'Economy' or 'Business'.")
+        if self.__cache is not None:
+            return ServiceResult.success(list(self.__cache.free_seats(flight, class_type)))
+        return ServiceResult.success(list(flight.get_inventory().iter_free(class_type)))
+
+    def route_fares(self, origin: str, destination: str, class_type: Optional[str] = None) -> List[dict]:
+        # Flights on the route that still have seats (of class_type), with free counts and lowest fares
+        class_type = normalize_class_type(class_type) if class_type else None
+        if self.__cache is not None:
+            return list(self.__cache.route_fares(self.__flights, origin, destination, class_type))
+        return _route_fares(self.__flights, origin, destination, class_type)
+
+    # Tickets
+    def find_ticket(self, ticket_number: int, passenger: Optional[Passenger] = None) -> ServiceResult:
+        ticket = self.__tickets.get(ticket_number)
+        if ticket is None:
+            return ServiceResult.failure(TICKET_NOT_FOUND, f"Ticket {ticket_number} not found.")
+        if passenger is not None and ticket.get_passenger().get_passport_no() != passenger.get_passport_no():
+            return ServiceResult.failure(NOT_TICKET_OWNER, f"Ticket {ticket_number} does not belong to you.")
+        return ServiceResult.success(ticket)
+
+    def tickets_for(self, passenger: Passenger) -> List[Ticket]:
+        return self.__tickets.for_passenger(passenger)
+
+    def book_seat(self, passenger: Passenger, flight_number: int, seat_number: Optional[int] = None,
+                  class_type: Optional[str] = None) -> ServiceResult:
+        # With no seat number, the first free seat (optionally of class_type) is booked
+        flight = self.__flights.get(flight_number)
+        if flight is None:
+            return ServiceResult.failure(FLIGHT_NOT_FOUND, "Flight not found.")
+        if class_type:
+            class_type = normalize_class_type(class_type)
+            if class_type is None:
+                return ServiceResult.failure(INVALID_INPUT, "Invalid class type. Please enter 'Economy' or 'Business'.")
+        inventory = flight.get_inventory()
+        # Held across ticket creation so events for one flight are emitted in the order they happened
+        with inventory.get_lock():
+            if seat_number is None:
+                seat = inventory.first_free(class_type)
+                if seat is None:
+                    return ServiceResult.failure(NO_SEATS, "No available seats on this flight.")
+            else:
+                seat = inventory.get(seat_number)
+                if seat is None:
+                    return ServiceResult.failure(SEAT_NOT_FOUND, f"Seat {seat_number} not found.")
+            if not seat.book_seat():
+                return ServiceResult.failure(SEAT_TAKEN, f"Seat {seat.get_seat_number()} is already booked.")
+            ticket = Ticket(self.__tickets.next_ticket_number(), passenger, flight, seat, None)  # No baggage initially
+            self.__tickets.add(ticket)
+            if self.__holds is not None:
+                self.__holds.hold(ticket.get_ticket_number())
+            if self.__listeners:
+                self._emit("seat_booked", {"ticket_number": ticket.get_ticket_number(),
+                                           "passport_no": passenger.get_passport_no(),
+                                           "flight_number": flight_number,
+                                           "seat_number": seat.get_seat_number()})
+        return ServiceResult.success(ticket, "Seat booked successfully!")
+
+    def book_batch(self, flight_number: int, bookings) -> List[ServiceResult]:
+        # bookings: iterable of (passenger, seat_number or None, class_type or None), applied in order
+        flight = self.__flights.get(flight_number)
+        if flight is None:
+            return [ServiceResult.failure(FLIGHT_NOT_FOUND, "Flight not found.") for _ in bookings]
+        with flight.get_inventory().get_lock():
+            return [self.book_seat(passenger, flight_number, seat_number, class_type)
+                    for passenger, seat_number, class_type in bookings]
+
+    def cancel_ticket(self, ticket_number: int, passenger: Optional[Passenger] = None,
+                      reason: Optional[str] = None) -> ServiceResult:
+        found = self.find_ticket(ticket_number, passenger)
+        if not found:
+            return found
+        with found.value.get_flight().get_inventory().get_lock():
+            ticket = self.__tickets.remove(ticket_number)
+            if ticket is None:
+                # Cancelled concurrently by another session
+                return ServiceResult.failure(TICKET_NOT_FOUND, f"Ticket {ticket_number} not found.")
+            # Make the seat available again
+            ticket.get_seat().make_available()
+            if ticket.get_baggage() is not None:
+                self.__baggage.unlink(ticket.get_baggage().get_baggage_id())
+            if self.__holds is not None:
+                self.__holds.discard(ticket_number)
+            if self.__listeners:
+                event = {"ticket_number": ticket_number}
+                if reason:
+                    event["reason"] = reason
+                self._emit("ticket_cancelled", event)
+            # Still under the flight lock, so no other booking can take the seat first
+            self._promote_waitlisted(ticket.get_flight(), ticket.get_seat())
+        return ServiceResult.success(ticket, f"Ticket {ticket_number} has been successfully canceled.")
+
+    def _promote_waitlisted(self, flight: Flight, seat: Seat) -> Optional[Ticket]:
+        flight_number = flight.get_flights()
+        while True:
+            entry = self.__waitlists.pop_next(flight_number, seat.get_class_type())
+            if entry is None:
+                return None
+            passenger = self.__passengers.get(entry["passport_no"])
+            booked = self.book_seat(passenger, flight_number, seat.get_seat_number()) if passenger else None
+            if self.__listeners:
+                self._emit("waitlist_left", {"flight_number": flight_number, "passport_no": entry["passport_no"],
+                                             "ticket_number": booked.value.get_ticket_number() if booked else None})
+            if booked:
+                return booked.value
+
+    # Waitlists
+    def loyalty_tier(self, passenger: Passenger) -> int:
+        # Earned from the passenger's paid bookings held here, never taken from the caller
+        paid = sum(1 for ticket in self.__tickets.for_passenger(passenger) if ticket.get_payment_status())
+        return bisect.bisect_right(Waitlists.TIER_BOOKINGS, paid)
+
+    def join_waitlist(self, passenger: Passenger, flight_number: int, class_type: Optional[str] = None) -> ServiceResult:
+        flight = self.__flights.get(flight_number)
+        if flight is None:
+            return ServiceResult.failure(FLIGHT_NOT_FOUND, "Flight not found.")
+        if class_type:
+            class_type = normalize_class_type(class_type)
+            if class_type is None:
+                return ServiceResult.failure(INVALID_INPUT, "Invalid class type. Please enter 'Economy' or 'Business'.")
+        with flight.get_inventory().get_lock():
+            if flight.get_inventory().count_free(class_type):
+                return ServiceResult.failure(SEATS_AVAILABLE, "Seats are still available on this flight.")
+            try:
+                entry = self.__waitlists.add(flight_number, passenger.get_passport_no(), class_type,
+                                             self.loyalty_tier(passenger))
+            except ValueError:
+                return ServiceResult.failure(ALREADY_WAITLISTED, "You are already on the waitlist for this flight.")
+            if self.__listeners:
+                self._emit("waitlist_joined", entry)
+        return ServiceResult.success(entry, f"Added to the waitlist for flight {flight_number}. "
+                                            f"You will be booked automatically when a seat frees up.")
+
+    def leave_waitlist(self, passenger: Passenger, flight_number: int) -> ServiceResult:
+        if not self.__waitlists.remove(flight_number, passenger.get_passport_no()):
+            return ServiceResult.failure(NOT_WAITLISTED, "You are not on the waitlist for this flight.")
+        if self.__listeners:
+            self._emit("waitlist_left", {"flight_number": flight_number, "passport_no": passenger.get_passport_no(),
+                                         "ticket_number": None})
+        return ServiceResult.success(None, f"Removed from the waitlist for flight {flight_number}.")
+
+    def waitlist_for(self, flight_number: int) -> List[dict]:
+        return self.__waitlists.for_flight(flight_number)
+
+    def release_expired_holds(self, now: Optional[float] = None) -> List[int]:
+        # Cancels unpaid tickets whose hold has run out; returns the released ticket numbers
+        if self.__holds is None:
+            return []
+        return [ticket_number for ticket_number in self.__holds.pop_expired(now)
+                if self._release_hold(ticket_number)]
+
+    def _release_hold(self, ticket_number: int) -> bool:
+        ticket = self.__tickets.get(ticket_number)
+        if ticket is None:
+            return False
+        with ticket.get_flight().get_inventory().get_lock():
+            # A payment that won the flight lock first keeps the seat
+            if ticket.get_payment_status():
+                return False
+            return bool(self.cancel_ticket(ticket_number, reason="hold_expired"))
+
+    def pay_for_ticket(self, ticket_number: int, card_number: str, passenger: Optional[Passenger] = None) -> ServiceResult:
+        found = self.find_ticket(ticket_number, passenger)
+        if not found:
+            return found
+        with found.value.get_flight().get_inventory().get_lock():
+            prepared = self.prepare_payment(ticket_number, card_number, passenger)
+            if not prepared:
+                return prepared
+            return self.record_payment(ticket_number, card_number)
+
+    def prepare_payment(self, ticket_number: int, card_number: str, passenger: Optional[Passenger] = None,
+                        reserve: bool = False) -> ServiceResult:
+        """
+        Checks that the ticket can be paid for right now without charging anything; value is the ticket.
+        With `reserve`, the ticket is also marked as being charged elsewhere (e.g. by a gateway) and
+        every other payment for it is refused until end_payment().
+        """
+        found = self.find_ticket(ticket_number, passenger)
+        if not found:
+            return found
+        ticket = found.value
+        with ticket.get_flight().get_inventory().get_lock():
+            if ticket.get_payment_status():
+                return ServiceResult.failure(ALREADY_PAID, f"Payment for Ticket {ticket_number} is already completed.")
+            if ticket_number in self.__charging:
+                return ServiceResult.failure(PAYMENT_PENDING, f"Payment for Ticket {ticket_number} is in progress.")
+            if self.__holds is not None and self.__holds.is_expired(ticket_number):
+                # The expiry worker may lag behind the deadline; the hold is over either way
+                self.cancel_ticket(ticket_number, reason="hold_expired")
+                return ServiceResult.failure(HOLD_EXPIRED, f"The hold on Ticket {ticket_number} has expired "
+                                                           f"and its seat was released.")
+            if not Payment.is_valid_card_number(str(card_number).strip()):
+                return ServiceResult.failure(INVALID_INPUT, "Invalid card number. It must be 16 digits.")
+            if reserve:
+                self.__charging.add(ticket_number)
+        return ServiceResult.success(ticket)
+
+    def end_payment(self, ticket_number: int):
+        # The charge reserved by prepare_payment(reserve=True) was recorded, refunded or abandoned
+        self.__charging.discard(ticket_number)
+
+    def record_payment(self, ticket_number: int, card_number: str) -> ServiceResult:
+        # Marks an already-charged ticket as paid (the synchronous path charges nothing external)
+        ticket = self.__tickets.get(ticket_number)
+        if ticket is None:
+            return ServiceResult.failure(TICKET_NOT_FOUND, f"Ticket {ticket_number} not found.")
+        with ticket.get_flight().get_inventory().get_lock():
+            if self.__tickets.get(ticket_number) is None:
+                return ServiceResult.failure(TICKET_NOT_FOUND, f"Ticket {ticket_number} not found.")
+            if ticket.get_payment_status():
+                return ServiceResult.failure(ALREADY_PAID, f"Payment for Ticket {ticket_number} is already completed.")
+            try:
+                payment = ticket.create_payment(ticket.get_seat().get_price(), str(card_number).strip())
+            except ValueError as e:
+                return ServiceResult.failure(INVALID_INPUT, str(e))
+            payment.settle()
+            if self.__holds is not None:
+                self.__holds.confirm(ticket_number)
+            if self.__listeners:
+                self._emit("payment_completed", _payment_event(payment))
+        return ServiceResult.success(payment, f"Card payment successful for Ticket {ticket_number}.")
+
+    # Baggage
+    def add_baggage(self, baggage_id: int, weight: float) -> ServiceResult:
+        return self._store_baggage(baggage_id, weight, None)
+
+    def attach_baggage(self, ticket_number: int, baggage_id: int, weight: float,
+                       passenger: Optional[Passenger] = None) -> ServiceResult:
+        found = self.find_ticket(ticket_number, passenger)
+        if not found:
+            return found
+        added = self._store_baggage(baggage_id, weight, found.value)
+        if not added:
+            return added
+        return ServiceResult.success(added.value, "Baggage added to ticket successfully!")
+
+    def _store_baggage(self, baggage_id: int, weight: float, ticket: Optional[Ticket]) -> ServiceResult:
+        try:
+            baggage = Baggage(int(baggage_id), float(weight))
+        except (TypeError, ValueError):
+            return ServiceResult.failure(INVALID_INPUT, "Invalid data type for baggage ID or weight.")
+        try:
+            self.__baggage.add(baggage, ticket)
+        except ValueError:
+            return ServiceResult.failure(BAGGAGE_EXISTS, f"Baggage ID {baggage_id} is already registered.")
+        if ticket is not None:
+            previous = ticket.get_baggage()
+            if previous is not None:
+                self.__baggage.unlink(previous.get_baggage_id())  # A ticket carries one bag
+            ticket.set_baggage(baggage)
+        if self.__listeners:
+            self._emit("baggage_added", dict(baggage.to_dict(),
+                                             ticket_number=ticket.get_ticket_number() if ticket else None))
+        return ServiceResult.success(baggage, "Baggage added successfully!")
+
+    def find_baggage(self, baggage_id: int) -> ServiceResult:
+        baggage = self.__baggage.get(baggage_id)
+        if baggage is None:
+            return ServiceResult.failure(BAGGAGE_NOT_FOUND, f"Baggage ID {baggage_id} not found.")
+        return ServiceResult.success(baggage)
+
+    def update_baggage_status(self, baggage_id: int, status: str) -> ServiceResult:
+        if baggage_id not in self.__baggage:
+            return ServiceResult.failure(BAGGAGE_NOT_FOUND, f"Baggage ID {baggage_id} not found.")
+        updated = self.__baggage.update_status([baggage_id], status)
+        if self.__listeners:
+            self._emit("baggage_status", {"baggage_ids": updated, "status": status})
+        return ServiceResult.success(self.__baggage.get(baggage_id), f"Baggage ID {baggage_id} status updated to: {status}")
+
+    def update_flight_baggage_status(self, flight_number: int, status: str) -> ServiceResult:
+        # e.g. every bag on flight 452 -> "loaded"; value is the list of updated baggage IDs
+        if flight_number not in self.__flights:
+            return ServiceResult.failure(FLIGHT_NOT_FOUND, "Flight not found.")
+        updated = self.__baggage.update_flight_status(flight_number, status)
+        if self.__listeners and updated:
+            self._emit("baggage_status", {"baggage_ids": updated, "status": status})
+        return ServiceResult.success(updated, f"{len(updated)} bags on flight {flight_number} marked {status}.")
+
+    def baggage_fees(self, flight_number: int, allowed_weight: float = ALLOWED_BAGGAGE_WEIGHT) -> ServiceResult:
+        if flight_number not in self.__flights:
+            return ServiceResult.failure(FLIGHT_NOT_FOUND, "Flight not found.")
+        return ServiceResult.success(self.__baggage.excess_fees(flight_number, allowed_weight))
+
+    @contextlib.contextmanager
+    def quiesce(self):
+        # Holds every flight's lock (in flight-number order, so two callers cannot deadlock): no seat,
+        # ticket or payment changes until the block exits
+        with contextlib.ExitStack() as stack:
+            for flight in sorted(self.__flights, key=lambda flight: flight.get_flights()):
+                stack.enter_context(flight.get_lock())
+            yield
+
+    # Replay
+    def export_events(self):
+        # Yields a compacted event stream that rebuilds the current state through apply_event()
+        for passenger in self.__passengers.get_passengers():
+            yield "passenger_registered", passenger.to_dict()
+        for flight in self.__flights.get_flights():
+            yield "flight_added", _flight_event(flight)
+        for ticket in self.__tickets.get_tickets():
+            yield "seat_booked", {"ticket_number": ticket.get_ticket_number(),
+                                  "passport_no": ticket.get_passenger().get_passport_no(),
+                                  "flight_number": ticket.get_flight().get_flights(),
+                                  "seat_number": ticket.get_seat().get_seat_number()}
+            if ticket.get_payment_status() and ticket.get_payment() is not None:
+                yield "payment_completed", _payment_event(ticket.get_payment())
+        for baggage in self.__baggage:
+            yield "baggage_added", dict(baggage.to_dict(),
+                                        ticket_number=self.__baggage.ticket_for(baggage.get_baggage_id()))
+        for entry in self.__waitlists.get_entries():
+            yield "waitlist_joined", entry
+        yield "ticket_counter", {"next_ticket_number": self.__tickets.peek_next_ticket_number()}
+
+    def apply_event(self, event: str, data: dict):
+        # Idempotent: events whose effect is already present (e.g. in a snapshot) are skipped
+        if event == "passenger_registered":
+            if data["passport_no"] not in self.__passengers:
+                self.__passengers.register(Passenger(data["name"], data["age"], data["phone"],
+                                                     data["address"], data["passport_no"]))
+        elif event == "flight_added":
+            if data["flight_number"] not in self.__flights:
+                flight = Flight(data["flight_number"], data["origin"], data["destination"], data["departure_time"],
+                                data.get("arrival_time"))
+                for seat_data in data["seats"]:
+                    seat = Seat(seat_data["seat_number"], seat_data["class_type"], seat_data["price"])
+                    if not seat_data["available"]:
+                        seat.book_seat()
+                    flight.add_seat(seat)
+                self.__flights.add(flight)
+                if self.__cache is not None:
+                    self.__cache.flight_added(flight)
+        elif event == "seat_added":
+            flight = self.__flights.get(data["flight_number"])
+            if flight is not None and data["seat_number"] not in flight.get_inventory():
+                flight.add_seat(Seat(data["seat_number"], data["class_type"], data["price"]))
+        elif event == "seats_added":
+            flight = self.__flights.get(data["flight_number"])
+            if flight is not None:
+                inventory = flight.get_inventory()
+                for seat_data in data["seats"]:
+                    if seat_data["seat_number"] not in inventory:
+                        flight.add_seat(Seat(seat_data["seat_number"], seat_data["class_type"], seat_data["price"]))
+        elif event == "seat_booked":
+            if data["ticket_number"] not in self.__tickets:
+                flight = self.__flights.get(data["flight_number"])
+                seat = flight.get_seat(data["seat_number"])
+                seat.book_seat()
+                passenger = self.__passengers.get(data["passport_no"])
+                self.__tickets.add(Ticket(data["ticket_number"], passenger, flight, seat))
+        elif event == "ticket_cancelled":
+            ticket = self.__tickets.remove(data["ticket_number"])
+            if ticket is not None:
+                ticket.get_seat().make_available()
+                if ticket.get_baggage() is not None:
+                    self.__baggage.unlink(ticket.get_baggage().get_baggage_id())
+        elif event == "payment_completed":
+            ticket = self.__tickets.get(data["ticket_number"])
+            if ticket is not None and not ticket.get_payment_status():
+                # Only the last four card digits are ever persisted
+                ticket.create_payment(data["amount"], "0" * 12 + data["card_last4"]).settle()
+        elif event == "baggage_added":
+            if data["baggage_id"] not in self.__baggage:
+                baggage = Baggage(data["baggage_id"], data["weight"])
+                baggage.update_status(data.get("status", "in transit"))
+                ticket = self.__tickets.get(data["ticket_number"]) if data.get("ticket_number") else None
+                self.__baggage.add(baggage, ticket)
+                if ticket is not None:
+                    previous = ticket.get_baggage()
+                    if previous is not None:
+                        self.__baggage.unlink(previous.get_baggage_id())
+                    ticket.set_baggage(baggage)
+        elif event == "baggage_status":
+            self.__baggage.update_status(data["baggage_ids"], data["status"])
+        elif event == "waitlist_joined":
+            if (data["flight_number"], data["passport_no"]) not in self.__waitlists:
+                self.__waitlists.add(data["flight_number"], data["passport_no"], data["class_type"], data["tier"],
+                                     data["sequence"])
+        elif event == "waitlist_left":
+            self.__waitlists.remove(data["flight_number"], data["passport_no"])
+        elif event == "ticket_counter":
+            self.__tickets.advance_to(data["next_ticket_number"])
+        else:
+            raise ValueError(f"Unknown event: {event}")
+
+
+def _flight_event(flight: Flight) -> dict:
+    data = flight.to_dict()
+    del data["free_seats"], data["total_seats"]
+    data["seats"] = [seat.to_dict() for seat in flight.get_seats()]
+    return data
+
+
+def _flight_fares(flight: Flight, class_type: Optional[str] = None) -> dict:
+    inventory = flight.get_inventory()
+    classes = [class_type] if class_type else inventory.class_types()
+    return {"flight_number": flight.get_flights(), "departure_time": flight.get_departure_time(),
+            "free_seats": inventory.count_free(class_type),
+            "lowest_fares": {name: inventory.lowest_free_price(name) for name in classes
+                             if inventory.count_free(name)}}
+
+
+def _route_fares(registry: FlightRegistry, origin: str, destination: str,
+                 class_type: Optional[str] = None) -> List[dict]:
+    fares = (_flight_fares(flight, class_type) for flight in registry.by_route(origin, destination))
+    return [entry for entry in fares if entry["free_seats"]]
+
+
+def _payment_event(payment: Payment) -> dict:
+    return {"ticket_number": payment.get_ticket().get_ticket_number(), "amount": payment.get_amount(),
+            "card_last4": payment.get_masked_card()[-4:]}
+
+
+# Query Cache: bounded LRU/TTL cache for availability and fare queries
+class QueryCache:
+    """
+    Entries record the flights (and routes) they were computed from and are dropped as soon as a
+    seat on one of those flights is booked, released or added; the TTL only bounds staleness for
+    changes the cache cannot observe. Values are computed outside the cache lock, and a value is
+    discarded instead of stored if its flight changed while it was being computed.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 30.0):
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__entries = OrderedDict()            # key -> (expires at, value, dependencies)
+        self.__dependents: Dict[tuple, set] = {}  # ("flight", n) / ("route", o, d) -> cache keys
+        self.__generations: Dict[int, int] = {}   # flight number -> invalidation count
+        self.__watched = set()
+        self.__lock = threading.Lock()
+        # Separate from __lock: watching may hydrate a flight under its own lock, and seat changes
+        # call back into the cache while holding that lock
+        self.__watch_lock = threading.Lock()
+        self.__hits = self.__misses = self.__evictions = self.__expirations = self.__invalidations = 0
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {"entries": len(self.__entries), "max_entries": self.__max_entries, "hits": self.__hits,
+                    "misses": self.__misses, "hit_rate": self.__hits / lookups if lookups else 0.0,
+                    "evictions": self.__evictions, "expirations": self.__expirations,
+                    "invalidations": self.__invalidations}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    # Queries
+    def free_seats(self, flight: Flight, class_type: Optional[str] = None) -> tuple:
+        return self._get(("free", flight.get_flights(), class_type), lambda: (flight,),
+                         lambda: tuple(flight.get_inventory().iter_free(class_type)))
+
+    def seat_map(self, flight: Flight) -> Optional[tuple]:
+        # Rendered seat rows for display; None for flights whose seats are still in storage
+        if not flight.is_loaded():
+            return None
+        return self._get(("seat_map", flight.get_flights()), lambda: (flight,),
+                         lambda: tuple(str(seat) for seat in flight.get_seats()))
+
+    def fares(self, flight: Flight, class_type: Optional[str] = None) -> dict:
+        return self._get(("fares", flight.get_flights(), class_type), lambda: (flight,),
+                         lambda: _flight_fares(flight, class_type))
+
+    def route_fares(self, registry: FlightRegistry, origin: str, destination: str,
+                    class_type: Optional[str] = None) -> tuple:
+        route = (FlightRegistry._key(origin), FlightRegistry._key(destination))
+        return self._get(("route",) + route + (class_type,), lambda: registry.by_route(origin, destination),
+                         lambda: self._compose_route(registry, origin, destination, class_type),
+                         (("route",) + route,))
+
+    def _compose_route(self, registry: FlightRegistry, origin: str, destination: str,
+                       class_type: Optional[str]) -> tuple:
+        # Built from per-flight entries, so one booking only recomputes that flight's fares
+        fares = (self.fares(flight, class_type) for flight in registry.by_route(origin, destination))
+        return tuple(entry for entry in fares if entry["free_seats"])
+
+    # Invalidation
+    def invalidate_flight(self, flight_number: int):
+        with self.__lock:
+            self.__generations[flight_number] = self.__generations.get(flight_number, 0) + 1
+            self._drop_dependents(("flight", flight_number))
+
+    def flight_added(self, flight: Flight):
+        # A new flight changes the answer for its route even though no seat changed
+        route = ("route", FlightRegistry._key(flight.get_origin()), FlightRegistry._key(flight.get_destination()))
+        with self.__lock:
+            self._drop_dependents(route)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__dependents.clear()
+
+    def _drop_dependents(self, dependency: tuple):
+        for key in self.__dependents.pop(dependency, ()):
+            if self._remove(key):
+                self.__invalidations += 1
+
+    def _remove(self, key) -> bool:
+        entry = self.__entries.pop(key, None)
+        if entry is None:
+            return False
+        for dependency in entry[2]:
+            keys = self.__dependents.get(dependency)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.__dependents[dependency]
+        return True
+
+    # Lookup
+    def _watch(self, flights):
+        with self.__watch_lock:
+            for flight in flights:
+                flight_number = flight.get_flights()
+                if flight_number not in self.__watched:
+                    flight.get_inventory().watch(lambda number=flight_number: self.invalidate_flight(number))
+                    self.__watched.add(flight_number)
+
+    def _get(self, key, flights_for, compute, extra_dependencies: tuple = ()):
+        # flights_for() lists the flights the value depends on; only called on a miss
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    return entry[1]
+                self._remove(key)
+                self.__expirations += 1
+            self.__misses += 1
+            flights = flights_for()
+            generations = [(flight.get_flights(), self.__generations.get(flight.get_flights(), 0))
+                           for flight in flights]
+        self._watch(flights)
+        value = compute()
+        with self.__lock:
+            if any(self.__generations.get(number, 0) != generation for number, generation in generations):
+                return value  # A seat changed mid-computation; serve it once but do not cache it
+            dependencies = tuple(("flight", number) for number, _ in generations) + extra_dependencies
+            self._remove(key)
+            self.__entries[key] = (now + self.__ttl, value, dependencies)
+            for dependency in dependencies:
+                self.__dependents.setdefault(dependency, set()).add(key)
+            while len(self.__entries) > self.__max_entries:
+                self._remove(next(iter(self.__entries)))
+                self.__evictions += 1
+        return value
+
+
+# Payment Settlement: queued, batched gateway charges with per-ticket idempotency keys
+class PaymentGateway(ABC):
+    """
+    A charge is a dict with idempotency_key, amount and card_number. A gateway must apply each
+    idempotency key at most once and answer repeats of an approved or declined key with the
+    original outcome. Results are ServiceResults: success(reference), failure(PAYMENT_DECLINED)
+    for a final decline, or failure(GATEWAY_ERROR) for anything worth retrying.
+    """
+
+    @abstractmethod
+    def charge_batch(self, charges: List[dict]) -> List[ServiceResult]:
+        pass
+
+    @abstractmethod
+    def refund(self, idempotency_key: str) -> ServiceResult:
+        pass
+
+
+class StubGateway(PaymentGateway):
+    # In-process gateway: `latency` seconds per batch round trip; `failure_rate` of charges hit a
+    # transient error (half of them after the money moved, i.e. a lost response), `decline_rate` are declined
+    def __init__(self, latency: float = 0.005, failure_rate: float = 0.0, decline_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.__latency = latency
+        self.__failure_rate = failure_rate
+        self.__decline_rate = decline_rate
+        self.__random = random.Random(seed)
+        self.__outcomes: Dict[str, ServiceResult] = {}
+        self.__charged: Dict[str, float] = {}   # idempotency key -> amount actually captured
+        self.__lock = threading.Lock()
+
+    def charge_batch(self, charges: List[dict]) -> List[ServiceResult]:
+        if self.__latency:
+            time.sleep(self.__latency)
+        with self.__lock:
+            return [self._charge_locked(charge) for charge in charges]
+
+    def _charge_locked(self, charge: dict) -> ServiceResult:
+        key = charge["idempotency_key"]
+        outcome = self.__outcomes.get(key)
+        if outcome is not None:
+            return outcome
+        roll = self.__random.random()
+        if roll < self.__failure_rate / 2:
+            return ServiceResult.failure(GATEWAY_ERROR, "Gateway timeout.")
+        if roll < self.__decline_rate + self.__failure_rate / 2:
+            outcome = ServiceResult.failure(PAYMENT_DECLINED, "Card declined.")
+        else:
+            self.__charged[key] = charge["amount"]
+            outcome = ServiceResult.success(f"ch_{len(self.__charged):08d}")
+            if roll < self.__decline_rate + self.__failure_rate:
+                self.__outcomes[key] = outcome
+                return ServiceResult.failure(GATEWAY_ERROR, "Connection reset after capture.")
+        self.__outcomes[key] = outcome
+        return outcome
+
+    def refund(self, idempotency_key: str) -> ServiceResult:
+        with self.__lock:
+            amount = self.__charged.pop(idempotency_key, None)
+            if amount is None:
+                return ServiceResult.failure(PAYMENT_DECLINED, "Nothing to refund.")
+            self.__outcomes[idempotency_key] = ServiceResult.failure(PAYMENT_DECLINED, "Refunded.")
+            return ServiceResult.success(amount)
+
+    def get_charged(self) -> Dict[str, float]:
+        with self.__lock:
+            return dict(self.__charged)
+
+
+class SettlementPipeline:
+    """
+    submit() validates a payment, pauses the ticket's seat hold and queues the charge; a dispatcher
+    groups queued charges into batches (up to `batch_size`, waiting at most `max_wait` seconds) and
+    hands each batch to a worker pool that calls the gateway. The idempotency key is derived from
+    the ticket number, so a retry or a duplicate submit can never charge twice. Approved charges are
+    recorded through BookingService.record_payment; a charge whose ticket vanished meanwhile is refunded.
+    Transient gateway errors are retried after `retry_backoff` seconds, doubling per attempt; a declined
+    ticket gets its original seat hold back, or is released at once if that hold ran out meanwhile.
+    """
+
+    def __init__(self, service: BookingService, gateway: PaymentGateway, batch_size: int = 64,
+                 workers: int = 8, max_wait: float = 0.002, max_attempts: int = 3, retry_backoff: float = 0.01):
+        self.__service = service
+        self.__gateway = gateway
+        self.__batch_size = max(1, batch_size)
+        self.__max_wait = max_wait
+        self.__max_attempts = max_attempts
+        self.__retry_backoff = retry_backoff
+        self.__queue = queue.Queue()
+        self.__pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="settlement")
+        self.__pending: Dict[int, object] = {}  # ticket number -> Future of a queued or in-flight payment
+        self.__lock = threading.Lock()
+        self.__drained = threading.Condition(self.__lock)  # Notified when nothing is pending any more
+        self.__latencies: List[float] = []
+        self.__stats = {"submitted": 0, "duplicates": 0, "batches": 0, "retries": 0, "settled": 0,
+                        "declined": 0, "failed": 0, "refunded": 0}
+        self.__dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self.__dispatcher.start()
+
+    @staticmethod
+    def idempotency_key(ticket_number: int) -> str:
+        # Ticket numbers are never reused, so one key per ticket is one charge per ticket
+        return f"ticket-{ticket_number}"
+
+    def submit(self, ticket_number: int, card_number: str, passenger: Optional[Passenger] = None):
+        # Returns a concurrent.futures.Future resolving to the payment's ServiceResult
+        with self.__lock:
+            pending = self.__pending.get(ticket_number)
+            if pending is not None:
+                self.__stats["duplicates"] += 1
+                return pending
+            future = Future()
+            prepared = self.__service.prepare_payment(ticket_number, card_number, passenger, reserve=True)
+            if not prepared:
+                future.set_result(prepared)
+                return future
+            self.__pending[ticket_number] = future
+            self.__stats["submitted"] += 1
+        holds = self.__service.get_hold_scheduler()
+        hold_deadline = None
+        if holds is not None:
+            hold_deadline = holds.deadline(ticket_number)
+            holds.discard(ticket_number)  # A payment in flight keeps the seat; restored on decline
+        card_number = str(card_number).strip()
+        self.__queue.put({"ticket_number": ticket_number, "card_number": card_number,
+                          "amount": prepared.value.get_seat().get_price(),
+                          "idempotency_key": self.idempotency_key(ticket_number),
+                          "hold_deadline": hold_deadline,
+                          "submitted": time.perf_counter(), "attempt": 1, "future": future})
+        return future
+
+    def pay(self, ticket_number: int, card_number: str, passenger: Optional[Passenger] = None) -> ServiceResult:
+        return self.submit(ticket_number, card_number, passenger).result()
+
+    def _dispatch_loop(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.__max_wait
+            stop = False
+            while len(batch) < self.__batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self.__queue.get(timeout=remaining) if remaining > 0 else self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            with self.__lock:
+                self.__stats["batches"] += 1
+            self.__pool.submit(self._settle_batch, batch)
+            if stop:
+                return
+
+    def _settle_batch(self, batch: List[dict]):
+        charges = [{"idempotency_key": item["idempotency_key"], "amount": item["amount"],
+                    "card_number": item["card_number"]} for item in batch]
+        handled = 0
+        try:
+            try:
+                outcomes = self.__gateway.charge_batch(charges)
+                if len(outcomes) != len(batch):
+                    raise ValueError(f"Gateway answered {len(outcomes)} of {len(batch)} charges.")
+            except Exception as e:
+                outcomes = [ServiceResult.failure(GATEWAY_ERROR, str(e))] * len(batch)
+            for item, outcome in zip(batch, outcomes):
+                self._settle(item, outcome)
+                handled += 1
+        finally:
+            # Nothing may leave a submitter waiting forever: whatever was not settled or requeued fails
+            for item in batch[handled:]:
+                if not item["future"].done():
+                    self._finish(item, ServiceResult.failure(GATEWAY_ERROR, "Settlement failed."), "failed")
+
+    def _settle(self, item: dict, outcome: ServiceResult):
+        if outcome:
+            result = self.__service.record_payment(item["ticket_number"], item["card_number"])
+            if not result:
+                # E.g. cancelled while the charge was in flight: the captured money goes back
+                self.__gateway.refund(item["idempotency_key"])
+                self._count("refunded")
+            self._finish(item, result, "settled" if result else "failed")
+        elif outcome.error == GATEWAY_ERROR and item["attempt"] < self.__max_attempts:
+            item["attempt"] += 1
+            self._count("retries")
+            # Same idempotency key: an earlier capture is reported, not repeated
+            retry = threading.Timer(self.__retry_backoff * 2 ** (item["attempt"] - 2), self.__queue.put, (item,))
+            retry.daemon = True
+            retry.start()
+        else:
+            self._restore_hold(item)
+            self._finish(item, ServiceResult.failure(outcome.error, outcome.message),
+                         "declined" if outcome.error == PAYMENT_DECLINED else "failed")
+
+    def _restore_hold(self, item: dict):
+        # The unpaid ticket is back on the clock it had before the payment was submitted
+        holds = self.__service.get_hold_scheduler()
+        if holds is None or item["hold_deadline"] is None:
+            return
+        if item["ticket_number"] in self.__service.get_ticket_store():
+            holds.hold(item["ticket_number"], deadline=item["hold_deadline"])
+            if holds.is_expired(item["ticket_number"]):
+                self.__service.release_expired_holds()
+
+    def _count(self, name: str):
+        with self.__lock:
+            self.__stats[name] += 1
+
+    def _finish(self, item: dict, result: ServiceResult, outcome: str):
+        self.__service.end_payment(item["ticket_number"])
+        with self.__lock:
+            self.__stats[outcome] += 1
+            self.__latencies.append(time.perf_counter() - item["submitted"])
+            self.__pending.pop(item["ticket_number"], None)
+            if not self.__pending:
+                self.__drained.notify_all()
+        item["future"].set_result(result)
+
+    def get_stats(self) -> dict:
+        with self.__lock:
+            latencies = sorted(self.__latencies)
+            stats = dict(self.__stats, pending=len(self.__pending))
+        stats["p50_ms"] = percentile(latencies, 50) * 1000 if latencies else None
+        stats["p99_ms"] = percentile(latencies, 99) * 1000 if latencies else None
+        return stats
+
+    def close(self):
+        # Settles everything already submitted, then stops the dispatcher and workers
+        with self.__lock:
+            while self.__pending:
+                self.__drained.wait()
+        self.__queue.put(None)
+        self.__dispatcher.join()
+        self.__pool.shutdown(wait=True)
+
+
+# Revenue Aggregates: running sales and revenue totals per flight, class and route
+class RevenueTotals:
+    __slots__ = ("capacity", "sold", "booked", "paid")
+
+    def __init__(self):
+        self.capacity = 0
+        self.sold = 0
+        self.booked = 0.0   # Fares of live tickets
+        self.paid = 0.0     # Payments on live tickets
+
+    def get_load_factor(self) -> Optional[float]:
+        return self.sold / self.capacity if self.capacity else None
+
+    def get_outstanding(self) -> float:
+        return self.booked - self.paid
+
+    def to_dict(self) -> dict:
+        return {"capacity": self.capacity, "sold": self.sold, "load_factor": self.get_load_factor(),
+                "booked_revenue": round(self.booked, 2), "paid_revenue": round(self.paid, 2),
+                "outstanding": round(self.get_outstanding(), 2)}
+
+
+class RevenueAggregates:
+    """
+    Seeded once from a service's current state, then kept up to date from its seat_booked,
+    ticket_cancelled and payment_completed events (plus seat additions for capacity), so every
+    event touches a fixed number of totals and reports never walk seats or tickets. Cancelled
+    tickets drop out of the totals entirely, including anything paid on them. Events already
+    reflected in the seed are ignored, which makes attaching to a running service safe.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__overall = RevenueTotals()
+        self.__by_flight: Dict[int, RevenueTotals] = {}
+        self.__by_flight_class: Dict[tuple, RevenueTotals] = {}
+        self.__by_class: Dict[str, RevenueTotals] = {}
+        self.__by_route: Dict[tuple, RevenueTotals] = {}
+        self.__routes: Dict[int, tuple] = {}   # flight number -> (origin, destination)
+        self.__tickets: Dict[int, list] = {}   # ticket number -> [flight number, class type, fare, paid]
+        self.__service = None
+
+    def attach(self, service: BookingService):
+        with self.__lock:
+            self.__service = service
+            service.add_listener(self.on_event)
+            for flight in service.get_flight_registry():
+                self._flight_added(flight.get_flights(), flight.get_origin(), flight.get_destination(),
+                                   [(class_type, entry["total"])
+                                    for class_type, entry in flight.get_seat_summary().items()])
+            for ticket in service.get_ticket_store():
+                self._booked(ticket.get_ticket_number(), ticket.get_flight().get_flights(),
+                             ticket.get_seat().get_class_type(), ticket.get_seat().get_price())
+                payment = ticket.get_payment()
+                if ticket.get_payment_status() and payment is not None:
+                    self._paid(ticket.get_ticket_number(), payment.get_amount())
+
+    def detach(self):
+        with self.__lock:
+            if self.__service is not None:
+                self.__service.remove_listener(self.on_event)
+                self.__service = None
+
+    def _buckets(self, flight_number: int, class_type: str) -> tuple:
+        route = self.__routes[flight_number]
+        return (self.__overall, self.__by_flight[flight_number],
+                self.__by_flight_class.setdefault((flight_number, class_type), RevenueTotals()),
+                self.__by_class.setdefault(class_type, RevenueTotals()),
+                self.__by_route.setdefault(route, RevenueTotals()))
+
+    def _flight_added(self, flight_number: int, origin: str, destination: str, seats):
+        # seats: (class type, count) pairs
+        if flight_number not in self.__routes:
+            self.__routes[flight_number] = (origin, destination)
+            self.__by_flight[flight_number] = RevenueTotals()
+        for class_type, count in seats:
+            for totals in self._buckets(flight_number, class_type):
+                totals.capacity += count
+
+    def _booked(self, ticket_number: int, flight_number: int, class_type: str, fare: float):
+        if ticket_number in self.__tickets:
+            return
+        self.__tickets[ticket_number] = [flight_number, class_type, fare, 0.0]
+        for totals in self._buckets(flight_number, class_type):
+            totals.sold += 1
+            totals.booked += fare
+
+    def _paid(self, ticket_number: int, amount: float):
+        record = self.__tickets.get(ticket_number)
+        if record is None or record[3]:
+            return
+        record[3] = amount
+        for totals in self._buckets(record[0], record[1]):
+            totals.paid += amount
+
+    def _cancelled(self, ticket_number: int):
+        record = self.__tickets.pop(ticket_number, None)
+        if record is None:
+            return
+        flight_number, class_type, fare, paid = record
+        for totals in self._buckets(flight_number, class_type):
+            totals.sold -= 1
+            totals.booked -= fare
+            totals.paid -= paid
+
+    def on_event(self, event: str, data: dict):
+        if event == "seat_booked":
+            seat = self.__service.get_flight(data["flight_number"]).get_seat(data["seat_number"])
+            with self.__lock:
+                self._booked(data["ticket_number"], data["flight_number"], seat.get_class_type(), seat.get_price())
+        elif event == "ticket_cancelled":
+            with self.__lock:
+                self._cancelled(data["ticket_number"])
+        elif event == "payment_completed":
+            with self.__lock:
+                self._paid(data["ticket_number"], data["amount"])
+        elif event == "flight_added":
+            with self.__lock:
+                if data["flight_number"] not in self.__routes:
+                    self._flight_added(data["flight_number"], data["origin"], data["destination"],
+                                       [(seat["class_type"], 1) for seat in data["seats"]])
+        elif event == "seat_added":
+            with self.__lock:
+                self._flight_added(data["flight_number"], None, None, [(data["class_type"], 1)])
+        elif event == "seats_added":
+            with self.__lock:
+                self._flight_added(data["flight_number"], None, None,
+                                   [(seat["class_type"], 1) for seat in data["seats"]])
+
+    # Reports
+    def get_overall(self) -> dict:
+        with self.__lock:
+            return self.__overall.to_dict()
+
+    def get_flight(self, flight_number: int) -> Optional[dict]:
+        with self.__lock:
+            totals = self.__by_flight.get(flight_number)
+            if totals is None:
+                return None
+            origin, destination = self.__routes[flight_number]
+            return dict(totals.to_dict(), flight_number=flight_number, origin=origin, destination=destination,
+                        classes={class_type: self.__by_flight_class[(flight_number, class_type)].to_dict()
+                                 for class_type in CLASS_TYPES
+                                 if (flight_number, class_type) in self.__by_flight_class})
+
+    def get_classes(self) -> Dict[str, dict]:
+        with self.__lock:
+            return {class_type: totals.to_dict() for class_type, totals in self.__by_class.items()}
+
+    def get_route(self, origin: str, destination: str) -> Optional[dict]:
+        with self.__lock:
+            totals = self.__by_route.get((origin, destination))
+            return None if totals is None else totals.to_dict()
+
+    def top_routes(self, count: int = 10) -> List[dict]:
+        # By booked revenue
+        with self.__lock:
+            best = heapq.nlargest(count, self.__by_route.items(), key=lambda item: item[1].booked)
+            return [dict(totals.to_dict(), origin=route[0], destination=route[1]) for route, totals in best]
+
+    def report(self, flight_number: Optional[int] = None, routes: int = 10) -> dict:
+        report = {"overall": self.get_overall(), "classes": self.get_classes(), "top_routes": self.top_routes(routes)}
+        if flight_number is not None:
+            report["flight"] = self.get_flight(flight_number)
+        return report
+
+
+# Instrumentation: per-operation counters and latency histograms, switchable at runtime
+class LatencyHistogram:
+    # Log-scale buckets over whole microseconds, four per power of two (<= 25% wide above 8 µs);
+    # percentiles report the bucket's upper bound
+    BUCKETS = 4 * 40
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * self.BUCKETS
+
+    @staticmethod
+    def _bucket(micros: int) -> int:
+        if micros < 8:
+            return micros
+        bits = micros.bit_length()
+        return (bits - 2) * 4 + ((micros >> (bits - 3)) & 3)
+
+    @staticmethod
+    def _upper_bound(index: int) -> int:
+        if index < 8:
+            return index + 1
+        return (5 + index % 4) << (index // 4 - 1)
+
+    def record(self, seconds: float):
+        self.buckets[min(self._bucket(int(seconds * 1e6)), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+
+    def percentile(self, pct: float) -> Optional[float]:
+        # In seconds; never above the largest value recorded
+        if not self.count:
+            return None
+        rank = max(1, round(self.count * pct / 100))
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(index) / 1e6, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "mean_ms": self.total / self.count * 1000 if self.count else None,
+                "min_ms": self.min * 1000 if self.min is not None else None, "max_ms": self.max * 1000,
+                **{f"p{pct}_ms": (self.percentile(pct) or 0.0) * 1000 for pct in (50, 90, 99)}}
+
+
+class Metrics:
+    """
+    enable() wraps the instrumented BookingService methods on that service instance and
+    disable() removes the wrappers again, so a disabled system runs the plain methods with no
+    per-call cost at all. Failed ServiceResults are counted per error code, and the slowest
+    calls are kept for inspection. Bound methods taken from the service before enable() keep
+    calling the plain method, so long-lived callbacks should look the method up per call.
+    """
+
+    OPERATIONS = {
+        "booking": ("book_seat", "book_batch"),
+        "cancellation": ("cancel_ticket", "release_expired_holds"),
+        "login": ("login", "register_passenger"),
+        "payment": ("pay_for_ticket", "record_payment"),
+        "search": ("search_flights", "list_flights", "available_seats", "route_fares", "get_flight"),
+        "baggage": ("add_baggage", "attach_baggage", "update_baggage_status", "update_flight_baggage_status",
+                    "baggage_fees"),
+    }
+
+    def __init__(self, service: BookingService, slowest: int = 20):
+        self.__service = service
+        self.__lock = threading.Lock()
+        self.__errors: Dict[str, int] = {}
+        self.__histograms: Dict[str, LatencyHistogram] = {}
+        self.__slowest: List[tuple] = []   # min-heap of (seconds, sequence, operation, started at)
+        self.__keep_slowest = slowest
+        self.__slow_floor = 0.0            # Fastest of the kept slowest calls, once the heap is full
+        self.__sequence = 0
+        self.__enabled = False
+
+    def is_enabled(self) -> bool:
+        return self.__enabled
+
+    def enable(self):
+        with self.__lock:
+            self._enable_locked()
+
+    def _enable_locked(self):
+        if self.__enabled:
+            return
+        for group, names in self.OPERATIONS.items():
+            for name in names:
+                setattr(self.__service, name, self._wrap(f"{group}.{name}", getattr(self.__service, name)))
+        self.__enabled = True
+
+    def disable(self):
+        with self.__lock:
+            self._disable_locked()
+
+    def _disable_locked(self):
+        if not self.__enabled:
+            return
+        for names in self.OPERATIONS.values():
+            for name in names:
+                delattr(self.__service, name)  # Falls back to the class's method
+        self.__enabled = False
+
+    def toggle(self) -> bool:
+        # Takes the lock that timed calls record under: never call it from a signal handler
+        with self.__lock:
+            if self.__enabled:
+                self._disable_locked()
+            else:
+                self._enable_locked()
+            return self.__enabled
+
+    def _wrap(self, operation: str, method):
+        clock = time.perf_counter
+        lock = self.__lock
+        histogram = self.__histograms.setdefault(operation, LatencyHistogram())
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            result = method(*args, **kwargs)
+            elapsed = clock() - start
+            with lock:
+                histogram.record(elapsed)
+            if elapsed > self.__slow_floor or (result.__class__ is ServiceResult and not result.ok):
+                self.record(operation, elapsed, result, timed=False)
+            return result
+        return timed
+
+    def record(self, operation: str, seconds: float, result=None, timed: bool = True):
+        # Also usable directly for code paths outside BookingService
+        with self.__lock:
+            if timed:
+                self.__histograms.setdefault(operation, LatencyHistogram()).record(seconds)
+            if isinstance(result, ServiceResult) and not result.ok:
+                key = f"{operation}.{result.error}"
+                self.__errors[key] = self.__errors.get(key, 0) + 1
+            if seconds > self.__slow_floor:
+                self.__sequence += 1
+                entry = (seconds, self.__sequence, operation, time.time())
+                if len(self.__slowest) < self.__keep_slowest:
+                    heapq.heappush(self.__slowest, entry)
+                else:
+                    heapq.heapreplace(self.__slowest, entry)
+                if len(self.__slowest) == self.__keep_slowest:
+                    self.__slow_floor = self.__slowest[0][0]
+
+    def reset(self):
+        with self.__lock:
+            for histogram in self.__histograms.values():
+                histogram.__init__()
+            self.__errors.clear()
+            self.__slowest.clear()
+            self.__slow_floor = 0.0
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            counters = {name: histogram.count for name, histogram in self.__histograms.items() if histogram.count}
+            counters.update(self.__errors)
+            return {"enabled": self.__enabled, "counters": dict(sorted(counters.items())),
+                    "latency": {name: histogram.to_dict() for name, histogram in sorted(self.__histograms.items())
+                                if histogram.count},
+                    "slowest": [{"operation": operation, "ms": seconds * 1000,
+                                 "at": time.strftime("%H:%M:%S", time.localtime(started))}
+                                for seconds, _, operation, started in sorted(self.__slowest, reverse=True)]}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_text(self) -> str:
+        snapshot = self.snapshot()
+        lines = [f"instrumentation {'on' if snapshot['enabled'] else 'off'}",
+                 f"{'operation':<44} {'count':>8} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+        for name, latency in snapshot["latency"].items():
+            lines.append(f"{name:<44} {latency['count']:>8} {latency['mean_ms']:>9.3f} {latency['p50_ms']:>8.3f} "
+                         f"{latency['p99_ms']:>8.3f} {latency['max_ms']:>8.3f}")
+        errors = {name: count for name, count in snapshot["counters"].items() if name.count(".") > 1}
+        for name, count in errors.items():
+            lines.append(f"{name:<44} {count:>8}")
+        for entry in snapshot["slowest"][:5]:
+            lines.append(f"slow: {entry['operation']} {entry['ms']:.3f} ms at {entry['at']}")
+        return "\n".join(lines)
+
+
+class MetricsEndpoint:
+    # Local HTTP endpoint: GET /metrics (text), /metrics.json, /profile (last sampling profile)
+    def __init__(self, metrics: Metrics, port: int = 9464, host: str = "127.0.0.1",
+                 profiler: Optional["SamplingProfiler"] = None):
+        self.__metrics = metrics
+        self.__profiler = profiler
+        self.__address = (host, port)
+        self.__server = None
+        self.__thread = None
+
+    def start(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body, content_type = endpoint._render(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.__server = ThreadingHTTPServer(self.__address, Handler)
+        self.__address = self.__server.server_address[:2]
+        self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def _render(self, path: str):
+        if path == "/metrics":
+            return self.__metrics.to_text() + "\n", "text/plain; charset=utf-8"
+        if path == "/metrics.json":
+            return self.__metrics.to_json(), "application/json"
+        if path == "/profile":
+            report = self.__profiler.get_report() if self.__profiler is not None else None
+            return json.dumps(report, indent=2), "application/json"
+        return None, None
+
+    def get_address(self):
+        return self.__address
+
+    def close(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__thread.join()
+            self.__server = None
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's stack each `interval` seconds from a background thread and counts
+    the innermost frames belonging to this module, plus whole call paths. Opt-in: nothing runs
+    until start(); install_signal_handlers() lets SIGUSR2 toggle it on a running process.
+    """
+
+    def __init__(self, interval: float = 0.005, depth: int = 8):
+        self.__interval = interval
+        self.__depth = depth
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__samples = 0
+        self.__functions: Dict[str, int] = {}
+        self.__stacks: Dict[str, int] = {}
+        self.__report = None
+
+    def is_running(self) -> bool:
+        return self.__thread is not None
+
+    def start(self):
+        if self.__thread is None:
+            self.__stop.clear()
+            self.__samples = 0
+            self.__functions = {}
+            self.__stacks = {}
+            self.__thread = threading.Thread(target=self._sample_loop, daemon=True)
+            self.__thread.start()
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        here = __file__ if "__file__" in globals() else None
+        while not self.__stop.wait(self.__interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                path = []
+                while frame is not None and len(path) < self.__depth:
+                    code = frame.f_code
+                    if here is None or code.co_filename == here:
+                        path.append(f"{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                if not path:
+                    continue
+                self.__samples += 1
+                self.__functions[path[0]] = self.__functions.get(path[0], 0) + 1
+                stack = " <- ".join(path)
+                self.__stacks[stack] = self.__stacks.get(stack, 0) + 1
+
+    def stop(self) -> dict:
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__thread.join()
+            self.__thread = None
+            self.__report = {"samples": self.__samples, "interval": self.__interval,
+                             "functions": self._top(self.__functions), "stacks": self._top(self.__stacks)}
+        return self.__report
+
+    def _top(self, counts: Dict[str, int]) -> List[dict]:
+        # The 20 most sampled entries, busiest first
+        return [{"where": where, "samples": count, "share": count / self.__samples}
+                for where, count in sorted(counts.items(), key=lambda item: -item[1])[:20]]
+
+    def toggle(self) -> Optional[dict]:
+        if self.is_running():
+            return self.stop()
+        self.start()
+        return None
+
+    def get_report(self) -> Optional[dict]:
+        return self.__report
+
+
+def install_signal_handlers(metrics: Metrics, profiler: SamplingProfiler, report_path: Optional[str] = None):
+    # SIGUSR1 toggles instrumentation; SIGUSR2 toggles the profiler and, when it stops, writes the
+    # metrics snapshot, slowest calls and profile to report_path (or stderr)
+
+    def write_report(report):
+        text = json.dumps({"metrics": metrics.snapshot(), "profile": report}, indent=2)
+        if report_path:
+            with open(report_path, "w", encoding="utf-8") as handle:
+                handle.write(text)
+        else:
+            print(text, file=sys.stderr)
+
+    def on_usr1(signum, frame):
+        # Handlers run on the main thread, which may be inside a timed call holding the metrics lock
+        threading.Thread(target=metrics.toggle, daemon=True).start()
+
+    def on_usr2(signum, frame):
+        report = profiler.toggle()
+        if report is not None:
+            # Written off the signal handler so a slow disk cannot stall the interrupted code
+            threading.Thread(target=write_report, args=(report,), daemon=True).start()
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, on_usr1)
+        signal.signal(signal.SIGUSR2, on_usr2)
+        return True
+    return False
+
+
+# Airline Management System: interactive menus over a BookingService
+class AirlineManagementSystem:
+    def __init__(self, service: Optional[BookingService] = None):
+        self.__service = service if service is not None else BookingService()
+        self.__current_passenger = None
+        self.__route_search = None  # Built on first use; indexing a large schedule is not free
+        self.__admin_username = "admin"
+        self.__admin_password = "admin"
+
+    def get_service(self) -> BookingService:
+        return self.__service
+
+    def get_flights(self):
+        return self.__service.get_flight_registry().get_flights()
+
+    def add_flight(self, flight: Flight):
+        result = self.__service.add_flight(flight)
+        if not result:
+            raise ValueError(result.message)
+
+    def admin_menu(self):
+        while True:
+            print("\nAdmin Panel")
+            print("1. Add New Flight")
+            print("2. Add Seats to Flight")
+            print("3. View All Flights")
+            print("4. View All Bookings")
+            print("5. View Registered Passengers")
+            print("6. Cancel a Ticket")
+            print("7. Export Bookings")
+            print("8. Flight Baggage")
+            print("9. Revenue Report")
+            print("10. Logout")
+
+            choice = self.get_valid_input("Enter your choice: ", int)
+
+            if choice == 1:
+                self.add_new_flight()
+            elif choice == 2:
+                self.add_seats_to_flight()
+            elif choice == 3:
+                self.view_flights()
+            elif choice == 4:
+                self.view_all_bookings()
+            elif choice == 5:
+                self.view_all_passengers()
+            elif choice == 6:
+                ticket_number = self.get_valid_input("Enter Ticket Number to Cancel: ", int)
+                self.cancel_ticket(ticket_number)
+            elif choice == 7:
+                self.export_bookings()
+            elif choice == 8:
+                self.manage_flight_baggage()
+            elif choice == 9:
+                self.view_revenue_report()
+            elif choice == 10:
+                print("Logged out from Admin Panel.")
+                break
+            else:
+                print("Invalid choice. Please try again.")
+
+    def add_new_flight(self):
+        print("\nAdd New Flight")
+        flight_number = self.get_valid_input("Enter Flight Number: ", int)
+
+        if self.__service.get_flight(flight_number) is not None:
+            print("❌ Flight with this number already exists.")
+            return
+
+        while True:
+            origin = self.get_valid_input("Enter Origin: ", str)
+            if is_valid_place(origin):
+                break
+            else:
+                print("Invalid Input")
+                
+        while True:
+            destination = self.get_valid_input("Enter Destination: ", str)
+            if is_valid_place(destination):
+                break
+            else:
+                print("Invalid Input")
+                
+        departure_time = self.get_valid_input("Enter Departure Time: ", str)
+        arrival_time = input("Enter Arrival Time (optional): ").strip() or None
+        result = self.__service.create_flight(flight_number, origin, destination, departure_time, arrival_time)
+        print(("✅ " if result else "❌ ") + result.message)
+
+    def add_seats_to_flight(self):
+        flight_number = self.get_valid_input("Enter Flight Number to Add Seats: ", int)
+
+        flight = self.__service.get_flight(flight_number)
+        if flight is None:
+            print("❌ Flight not found.")
+            return
+
+        while True:
+            # Loop until user provides a unique seat number
+            while True:
+                seat_number = self.get_valid_input("Enter Seat Number: ", int)
+
+                # Check if seat number already exists in flight
+                if seat_number in flight.get_inventory():
+                    print(f"❌ Seat number {seat_number} already exists. Please enter a different seat number.")
+                else:
+                    break  # Valid seat number
+
+            # Validate class type input
+            while True:   
+                class_type = normalize_class_type(input("Enter Class Type (Economy or Business): "))
+                if class_type:
+                    break
+                print("❌ Invalid class type. Please enter 'Economy' or 'Business'.")
+
+            price = self.get_valid_input("Enter Price: ", float)
+
+            # Create and add the seat
+            result = self.__service.add_seat(flight_number, seat_number, class_type, price)
+            print(("✅ " if result else "❌ ") + result.message)
+
+            more = input("Add another seat? (y/n): ").lower()
+            if more != 'y':
+                break
+
+    def cancel_ticket(self, ticket_number: int):
+        result = self.__service.cancel_ticket(ticket_number)
+        print(("✅ " if result else "❌ ") + result.message)
+
+    def view_all_bookings(self):
+        tickets = self.__service.get_ticket_store()
+        if not tickets:
+            print("No bookings available.")
+        else:
+            for ticket in tickets:
+                ticket.view_ticket()
+
+    def view_revenue_report(self):
+        aggregates = self.__service.get_aggregates()
+        if aggregates is None:
+            # Only the first report walks the bookings; later ones read the running totals
+            aggregates = RevenueAggregates()
+            self.__service.set_aggregates(aggregates)
+
+        def line(label: str, totals: dict) -> str:
+            load = f"{totals['load_factor']:.1%}" if totals["load_factor"] is not None else "—"
+            return (f"{label:<28} {totals['sold']:>7}/{totals['capacity']:<7} {load:>6} "
+                    f"${totals['booked_revenue']:>12,.2f} ${totals['paid_revenue']:>12,.2f} "
+                    f"${totals['outstanding']:>12,.2f}")
+
+        report = aggregates.report()
+        print(f"\n{'':<28} {'sold/seats':^15} {'load':>6} {'booked':>13} {'paid':>13} {'outstanding':>13}")
+        print(line("All flights", report["overall"]))
+        for class_type, totals in report["classes"].items():
+            print(line(class_type, totals))
+        if report["top_routes"]:
+            print("\nTop routes by booked revenue:")
+            for totals in report["top_routes"]:
+                print(line(f"{totals['origin']} ➡ {totals['destination']}", totals))
+        flight_number = input("\nFlight number for details (leave blank to return): ").strip()
+        if not flight_number.isdigit():
+            return
+        totals = aggregates.get_flight(int(flight_number))
+        if totals is None:
+            print("❌ Flight not found.")
+            return
+        print(line(f"Flight {totals['flight_number']}", totals))
+        for class_type, class_totals in totals["classes"].items():
+            print(line(f"  {class_type}", class_totals))
+
+    def manage_flight_baggage(self):
+        flight_number = self.get_valid_input("Enter Flight Number: ", int)
+        result = self.__service.baggage_fees(flight_number)
+        if not result:
+            print(f"❌ {result.message}")
+            return
+        report = result.value
+        if not report["baggage_ids"]:
+            print("No baggage checked in on this flight.")
+            return
+        registry = self.__service.get_baggage_registry()
+        for baggage, fee in zip(map(registry.get, report["baggage_ids"]), report["fees"]):
+            print(f"Baggage ID {baggage.get_baggage_id()}: {baggage.get_weight()} kg, {baggage.get_status()}"
+                  + (f" | Extra Fee: ${fee}" if fee else ""))
+        print(f"{len(report['baggage_ids'])} bags, {report['overweight']} over {report['allowed_weight']:g} kg, "
+              f"excess fees ${report['total_fee']}")
+        status = input("New status for all bags on this flight (leave blank to keep): ").strip()
+        if status:
+            print("✅ " + self.__service.update_flight_baggage_status(flight_number, status).message)
+
+    def export_bookings(self):
+        path = input("Enter output file (.csv or .jsonl): ").strip()
+        fmt = "jsonl" if path.lower().endswith((".jsonl", ".json")) else "csv"
+        flight_filter = input("Enter Flight Number to export (leave blank for all): ").strip()
+        try:
+            flight_number = int(flight_filter) if flight_filter else None
+        except ValueError:
+            print("❌ Invalid flight number.")
+            return
+        try:
+            rows = export_bookings(self.__service, path, fmt, flight_number)
+        except OSError as e:
+            print(f"❌ Could not write export: {e}")
+            return
+        print(f"✅ Exported {rows} bookings to {path}.")
+
+    def view_all_passengers(self):
+        passengers = self.__service.get_passenger_directory()
+        if not passengers:
+            print("No registered passengers.")
+        else:
+            for passenger in passengers:
+                passenger.view_details()
+
+    def main_menu(self):
+        while True:
+            print("\nAirline Management System")
+            print("1. Register or Login")
+            print("2. Admin Panel")
+            print("3. Exit")
+
+            choice = self.get_valid_input("Enter your choice: ", int)
+
+            if choice == 1:
+                self.auth_menu()
+            elif choice == 2:
+                self.admin_login()
+            elif choice == 3:
+                print("Thank you for using the Airline Management System!")
+                break
+            else:
+                print("Invalid choice. Please enter a valid option.")
+
+    def admin_login(self):
+        username = input("Enter Admin Username: ")
+        password = input("Enter Admin Password: ")
+
+        if username == self.__admin_username and password == self.__admin_password:
+            print("✅ Admin login successful.")
+            self.admin_menu()
+        else:
+            print("❌ Invalid credentials. Access denied.")
+
+    def auth_menu(self):
+        while True:
+            print("\n1. Register Passenger")
+            print("2. Login Passenger")
+            choice = self.get_valid_input("Enter your choice: ", int)
+            if choice == 1:
+                self.register_passenger()
+                self.logged_in_menu()
+                break
+            elif choice == 2:
+                self.login_passenger()
+                if self.__current_passenger:
+                    self.logged_in_menu()
+                break
+            else:
+                print("Invalid choice. Please try again.")
+
+    def logged_in_menu(self):
+        while True:
+            print("\n1. View Your Details")
+            print("2. View Flights and Book a Seat")
+            print("3. View Your Tickets")
+            print("4. Manage Baggage")
+            print("5. View Airline Info")
+            print("6. Cancel a Ticket")
+            print("7. Make Payment for Ticket")
+            print("8. Search Routes")
+            print("9. Logout")
+
+            choice = self.get_valid_input("Enter your choice: ", int)
+
+            if choice == 1:
+                self.view_passenger_details()
+            elif choice == 2:
+                self.view_flights()
+                self.book_seat()
+            elif choice == 3:
+                self.view_tickets()
+            elif choice == 4:
+                self.manage_baggage()
+            elif choice == 5:
+                self.view_airline_details()
+            elif choice == 6:
+                ticket_number = self.get_valid_input("Enter your Ticket Number to cancel: ", int)
+                result = self.__service.cancel_ticket(ticket_number, self.__current_passenger)
+                if result:
+                    print(f"✅ {result.message}")
+                else:
+                    print("❌ Ticket not found or does not belong to you.")
+            elif choice == 7:
+                self.make_payment_for_ticket()
+            elif choice == 8:
+                self.search_routes()
+            elif choice == 9:
+                self.__current_passenger = None
+                print("Logged out successfully.")
+                break
+            else:
+                print("Invalid choice. Please try again.")
+
+
+    def book_seat(self):
+        if not self.__current_passenger:
+            print("Please login to book a seat.")
+            return
+
+        flight_number = self.get_valid_input("Enter Flight Number to Book Seat: ", int)
+        found_flight = self.__service.get_flight(flight_number)
+        
+        if not found_flight:
+            print("Flight not found.")
+            return
+
+        # Display available seats
+        print("\nAvailable Seats:")
+        inventory = found_flight.get_inventory()
+        if not inventory.count_free():
+            print("No available seats on this flight.")
+            if input("Would you like to join the waitlist? (y/n): ").lower() == 'y':
+                class_type = input("Preferred class (Economy, Business, or leave blank for any): ").strip()
+                result = self.__service.join_waitlist(self.__current_passenger, flight_number, class_type or None)
+                print(("✅ " if result else "❌ ") + result.message)
+            return
+        
+        for seat in inventory.iter_free():
+            print(seat)
+
+        # Get seat number to book
+        while True:
+            seat_number = self.get_valid_input("\nEnter Seat Number to book (or 0 to cancel): ", int)
+            if seat_number == 0:
+                return
+            
+            result = self.__service.book_seat(self.__current_passenger, flight_number, seat_number)
+            if result.error == SEAT_NOT_FOUND:
+                print("Seat not found. Please try again.")
+                continue
+                
+            if result.error == SEAT_TAKEN:
+                print("Seat is already booked. Please choose another seat.")
+                continue
+                
+            if result:
+                ticket = result.value
+                print("\nSeat booked successfully!")
                 ticket.view_ticket()
+                holds = self.__service.get_hold_scheduler()
+                if holds is not None:
+                    print(f"⏳ Your seat is held for {holds.get_ttl() / 60:g} minutes. "
+                          f"Unpaid tickets are released after that.")
                 
                 # Ask about baggage
                 add_baggage = input("\nWould you like to add baggage? (y/n): ").lower()
@@ -577,137 +3096,2131 @@ class AirlineManagementSystem:
             else:
                 print("Failed to book seat. Please try again.")
 
-    def manage_baggage_for_ticket(self, ticket):
-        print("\nAdding Baggage to Ticket")
-        baggage_id = self.get_valid_input("Enter Baggage ID: ", int)
-        weight = self.get_valid_input("Enter Baggage Weight (in kg): ", float)
-        baggage = Baggage(baggage_id, weight)
-        baggage.check_weight(allowed_weight=23)
-        baggage.display_details()
-        ticket.set_baggage(baggage)
-        self.__baggage.append(baggage)
-        print("Baggage added to ticket successfully!")
+    def manage_baggage_for_ticket(self, ticket):
+        print("\nAdding Baggage to Ticket")
+        baggage_id = self.get_valid_input("Enter Baggage ID: ", int)
+        weight = self.get_valid_input("Enter Baggage Weight (in kg): ", float)
+        result = self.__service.attach_baggage(ticket.get_ticket_number(), baggage_id, weight)
+        if not result:
+            print(f"❌ {result.message}")
+            return
+        baggage = result.value
+        baggage.check_weight(allowed_weight=ALLOWED_BAGGAGE_WEIGHT)
+        baggage.display_details()
+        print(result.message)
+
+    def make_payment_for_ticket(self):
+        if not self.__current_passenger:
+            print("Please login to make a payment.")
+            return
+            
+        ticket_number = self.get_valid_input("Enter your Ticket Number to make payment: ", int)
+        found = self.__service.find_ticket(ticket_number, self.__current_passenger)
+        if not found:
+            print(f"❌ Ticket {ticket_number} not found or does not belong to you.")
+            return
+
+        if found.value.get_payment_status(): 
+            print(f"✅ Payment for Ticket {ticket_number} is already completed.")
+            return
+
+        while True:
+            card_number = input("Enter your 16-digit card number: ").strip()
+            if card_number.isdigit() and len(card_number) == 16:
+                break
+            else:
+                print("❌ Invalid card number. Please enter exactly 16 digits.")
+
+        result = self.__service.pay_for_ticket(ticket_number, card_number, self.__current_passenger)
+        if result:
+            payment = result.value
+            print(f"Processing Card payment of ${payment.get_amount()} using card ending with {payment.get_masked_card()}...")
+            print(f"✅ {result.message}")
+        else:
+            print(f"❌ Payment failed due to: {result.message}")
+
+    def get_valid_input(self, prompt, expected_type):
+        while True:
+            try:
+                value = input(prompt)
+                converted = expected_type(value)
+                if expected_type == int and prompt.lower().startswith("enter age") and converted < 18:
+                    print("You must be 18 or older to register.")
+                    continue
+                return converted
+            except ValueError:
+                print(f"Invalid input! Please enter a valid {expected_type.__name__}.")
+
+    def register_passenger(self):
+        print("\nRegister Passenger")
+        name = input("Enter Name: ")
+        age = self.get_valid_input("Enter Age: ", int)
+
+        while True:
+            phone = input("Enter Phone Number: ")
+            if phone.isdigit():
+                break
+            else:
+                print("Invalid phone number! Please enter digits only.")
+
+        address = input("Enter Address: ")
+        while True:
+            passport_no = input("Enter passport Number: ")
+            if not passport_no.isdigit():
+                print("Invalid passport number! Please enter digits only.")
+            elif self.__service.is_registered(passport_no):
+                print("❌ A passenger with this passport number is already registered.")
+            else:
+                break
+                
+        result = self.__service.register_passenger(name, age, phone, address, passport_no)
+        print(result.message)
+        if result:
+            self.__current_passenger = result.value
+
+    def login_passenger(self):
+        print("\nLogin Passenger")
+        passport_no = input("Enter Your Passport No to Login: ")
+        result = self.__service.login(passport_no)
+        if result:
+            self.__current_passenger = result.value
+        print(result.message)
+
+    def view_passenger_details(self):
+        if self.__current_passenger:
+            self.__current_passenger.view_details()
+        else:
+            print("Please login to view your details.")
+
+    def view_flights(self, page_size: int = 10):
+        # One summary row per flight, a page at a time; a flight's seat map is only rendered on request
+        if not self.__service.get_flight_registry():
+            print("No flights available.")
+            return
+        destination = None
+        page = 1
+        while True:
+            listing = self.__service.list_flights(destination, page, page_size).value
+            if destination:
+                print(f"\nFlights to {destination}")
+            print(f"\n{'Flight':>7}  {'Route':<30} {'Departure':<12} {'Economy':>18} {'Business':>18}")
+            for row in listing["flights"]:
+                cells = []
+                for class_type in CLASS_TYPES:
+                    summary = row["classes"].get(class_type)
+                    if summary is None:
+                        cells.append(f"{'—':>18}")
+                    elif summary["free"]:
+                        cells.append(f"{summary['free']:>5} from {'$' + format(summary['lowest_fare'], 'g'):>8}")
+                    else:
+                        cells.append(f"{'sold out':>18}")
+                route = f"{row['origin']} ➡ {row['destination']}"
+                print(f"{row['flight_number']:>7}  {route:<30} {row['departure_time']:<12} {cells[0]} {cells[1]}")
+            if not listing["flights"]:
+                print("No flights found.")
+            print(f"Page {listing['page']} of {listing['pages']} ({listing['total']} flights)")
+            command = input("[n]ext, [p]revious, [d]estination filter, a flight number for its seat map, "
+                            "or Enter to continue: ").strip().lower()
+            if not command:
+                return
+            if command == "n" and page < listing["pages"]:
+                page += 1
+            elif command == "p" and page > 1:
+                page -= 1
+            elif command == "d":
+                destination = input("Destination (leave blank for all): ").strip() or None
+                page = 1
+            elif command.isdigit():
+                flight = self.__service.get_flight(int(command))
+                if flight is None:
+                    print("❌ Flight not found.")
+                    continue
+                cache = self.__service.get_cache()
+                flight.display_details(None if cache is None else cache.seat_map(flight))
+            elif command not in ("n", "p"):
+                print("Invalid choice. Please try again.")
+
+    def search_routes(self):
+        if self.__route_search is None:
+            self.__route_search = RouteSearchEngine(self.__service)
+        origin = input("Enter Origin: ").strip()
+        destination = input("Enter Destination: ").strip()
+        earliest = input("Earliest departure (e.g. 9:30am, leave blank for any): ").strip()
+        depart_after = parse_flight_time(earliest, self.__route_search.get_service_date()) if earliest else None
+        if earliest and depart_after is None:
+            print("❌ Invalid time.")
+            return
+        max_connections = self.get_valid_input("Maximum connections: ", int)
+        itineraries = self.__route_search.search(origin, destination, depart_after, max_connections)
+        if not itineraries:
+            print("No itineraries found.")
+        for itinerary in itineraries:
+            print(itinerary)
+
+    def view_tickets(self):
+        if not self.__current_passenger:
+            print("Please login to view your tickets.")
+            return
+        tickets = self.__service.tickets_for(self.__current_passenger)
+        for ticket in tickets:
+            ticket.view_ticket()
+        if not tickets:
+            print("You have no tickets booked.")
+
+    def manage_baggage(self):
+        print("\nManage Baggage")
+        baggage_id = self.get_valid_input("Enter Baggage ID: ", int)
+        weight = self.get_valid_input("Enter Baggage Weight (in kg): ", float)
+        result = self.__service.add_baggage(baggage_id, weight)
+        if not result:
+            print(f"❌ {result.message}")
+            return
+        baggage = result.value
+        baggage.check_weight(allowed_weight=ALLOWED_BAGGAGE_WEIGHT)
+        baggage.display_details()
+
+    def view_airline_details(self):
+        airline = Airline("EgyptAir", "Egypt", 67, "MS")
+        airline.display_details()
+
+
+# Route Search: parsed departure times and connecting itineraries
+def parse_flight_time(value: str, service_date=None):
+    """
+    Parses "2am", "9:30am", "6:00 PM", "14:30" or ISO datetimes ("2026-10-18 09:30").
+    Times without a date fall on `service_date` (default: today). Returns a datetime or None.
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return dt.datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*([aApP][mM])?", text)
+    if match is None:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").lower()
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return dt.datetime.combine(service_date or dt.date.today(), dt.time(hour, minute))
+
+
+class Itinerary:
+    __slots__ = ("legs", "departure", "arrival")
+
+    def __init__(self, legs: List[Flight], departure, arrival):
+        self.legs = legs
+        self.departure = departure
+        self.arrival = arrival
+
+    def get_connections(self) -> int:
+        return len(self.legs) - 1
+
+    def cheapest_fares(self) -> Dict[str, Optional[float]]:
+        # Per class: sum of the cheapest free seat on every leg, or None if any leg is sold out in that class
+        fares = {}
+        for class_type in CLASS_TYPES:
+            total = 0.0
+            for flight in self.legs:
+                price = flight.get_inventory().lowest_free_price(class_type)
+                if price is None:
+                    total = None
+                    break
+                total += price
+            fares[class_type] = total
+        return fares
+
+    def to_dict(self) -> dict:
+        return {"flights": [flight.get_flights() for flight in self.legs],
+                "route": [self.legs[0].get_origin()] + [flight.get_destination() for flight in self.legs],
+                "departure": self.departure.isoformat(),
+                "arrival": self.arrival.isoformat() if self.arrival else None,
+                "connections": self.get_connections(),
+                "free_seats": [{class_type: flight.get_inventory().count_free(class_type) for class_type in CLASS_TYPES}
+                               for flight in self.legs],
+                "cheapest_fares": self.cheapest_fares()}
+
+    def __str__(self) -> str:
+        route = " ➡ ".join([self.legs[0].get_origin()] + [flight.get_destination() for flight in self.legs])
+        flights = ", ".join(str(flight.get_flights()) for flight in self.legs)
+        fares = ", ".join(f"{class_type} ${fare:g}" for class_type, fare in self.cheapest_fares().items()
+                          if fare is not None)
+        arrival = f"{self.arrival:%Y-%m-%d %H:%M}" if self.arrival else "arrival not scheduled"
+        return (f"{route} | Flights {flights} | {self.departure:%Y-%m-%d %H:%M} → {arrival}"
+                f" | {self.get_connections()} connection(s) | from {fares or 'sold out'}")
+
+
+class RouteSearchEngine:
+    """
+    Keeps departure lists sorted by timestamp per origin and per (origin, destination) route.
+    A search is a time-dependent best-first expansion ordered by arrival time: from an airport
+    only departures inside [arrival + min connection, arrival + max layover] are examined (via
+    bisect), and the final leg is looked up directly in the route list for the destination.
+    Flights without a parseable arrival time can end an itinerary but not feed a connection.
+    Times without a date are indexed on the service date fixed at construction (default: today),
+    and queries must be read against the same date (get_service_date), even after midnight.
+    """
+
+    def __init__(self, service: BookingService, service_date=None, availability=None):
+        # availability(flight_number, class_type) -> bool replaces the seat check against `service`,
+        # e.g. when the schedule is indexed apart from the seats (sharded mode)
+        self.__service = service
+        self.__service_date = service_date or dt.date.today()
+        self.__availability = availability
+        # Both indexes hold sorted (departure ts, arrival ts or None, destination key, flight number)
+        self.__by_origin: Dict[str, list] = {}
+        self.__by_route: Dict[tuple, list] = {}
+        self.__keys: Dict[object, list] = {}      # index key -> departure timestamps, for bisect
+        self.__lock = threading.Lock()  # Flights are indexed from event listeners while searches read
+        for flight in service.get_flight_registry():
+            self.index_flight(flight)
+        service.add_listener(self._on_event)
+
+    def get_service_date(self):
+        return self.__service_date
+
+    def _on_event(self, event: str, data: dict):
+        if event == "flight_added":
+            flight = self.__service.get_flight(data["flight_number"])
+            if flight is not None:
+                self.index_flight(flight)
+
+    def index_flight(self, flight: Flight) -> bool:
+        departure = parse_flight_time(flight.get_departure_time(), self.__service_date)
+        if departure is None:
+            return False
+        arrival = parse_flight_time(flight.get_arrival_time(), departure.date())
+        if arrival is not None and arrival < departure:
+            arrival += dt.timedelta(days=1)  # Overnight flight
+        origin = FlightRegistry._key(flight.get_origin())
+        destination = FlightRegistry._key(flight.get_destination())
+        entry = (departure.timestamp(), arrival.timestamp() if arrival else None, destination, flight.get_flights())
+        with self.__lock:
+            for index, key in ((self.__by_origin, origin), (self.__by_route, (origin, destination))):
+                departures = index.setdefault(key, [])
+                keys = self.__keys.setdefault(key, [])
+                position = bisect.bisect_right(keys, entry[0])
+                departures.insert(position, entry)
+                keys.insert(position, entry[0])
+        return True
+
+    def _window(self, key, start: float, end: float) -> list:
+        # Returns a copy, so a search keeps a consistent view while flights are added
+        with self.__lock:
+            keys = self.__keys.get(key)
+            if not keys:
+                return []
+            index = self.__by_route if isinstance(key, tuple) else self.__by_origin
+            return index[key][bisect.bisect_left(keys, start):bisect.bisect_right(keys, end)]
+
+    def search(self, origin: str, destination: str, depart_after=None, max_connections: int = 1,
+               min_connection_minutes: int = 45, max_layover_hours: int = 24,
+               class_type: Optional[str] = None, limit: int = 10) -> List[Itinerary]:
+        """
+        Returns up to `limit` itineraries departing within `max_layover_hours` of depart_after,
+        ordered by arrival. Only flights with a free seat (of `class_type` if given) are used.
+        """
+        if class_type is not None:
+            class_type = normalize_class_type(class_type)
+        if depart_after is None:
+            depart_after = dt.datetime.combine(self.__service_date, dt.time())
+        registry = self.__service.get_flight_registry()
+        source = FlightRegistry._key(origin)
+        target = FlightRegistry._key(destination)
+        min_connection = min_connection_minutes * 60
+        max_layover = max_layover_hours * 3600
+        max_legs = max_connections + 1
+
+        def has_seat(number: int) -> bool:
+            if self.__availability is not None:
+                return self.__availability(number, class_type)
+            flight = registry.get(number)
+            return flight is not None and flight.get_inventory().count_free(class_type) > 0
+
+        # Labels: (arrival ts (departure if unknown), tie-breaker, airport, legs, airports visited)
+        heap = []
+        sequence = 0
+        start = depart_after.timestamp()
+        for departure, arrival, airport, number in self._window(source, start, start + max_layover):
+            if (arrival is not None or airport == target) and has_seat(number):
+                sequence += 1
+                heap.append((arrival or departure, sequence, airport, (number,), (source, airport)))
+        heapq.heapify(heap)
+
+        expanded: Dict[tuple, int] = {}
+        results: List[Itinerary] = []
+        while heap and len(results) < limit:
+            arrival, _, airport, legs, visited = heapq.heappop(heap)
+            if airport == target:
+                results.append(self._itinerary(legs))
+                continue
+            if len(legs) >= max_legs:
+                continue
+            # k-best pruning: earlier arrivals with as few legs dominate later ones at the same airport
+            label = (airport, len(legs))
+            if expanded.get(label, 0) >= limit:
+                continue
+            expanded[label] = expanded.get(label, 0) + 1
+            window_start, window_end = arrival + min_connection, arrival + max_layover
+            for departure, next_arrival, _, number in self._window((airport, target), window_start, window_end):
+                if has_seat(number):
+                    sequence += 1
+                    heapq.heappush(heap, (next_arrival or departure, sequence, target, legs + (number,), visited))
+            if len(legs) + 1 >= max_legs:
+                continue
+            for departure, next_arrival, next_airport, number in self._window(airport, window_start, window_end):
+                if next_arrival is None or next_airport == target or next_airport in visited:
+                    continue
+                if has_seat(number):
+                    sequence += 1
+                    heapq.heappush(heap, (next_arrival, sequence, next_airport, legs + (number,),
+                                          visited + (next_airport,)))
+        return results
+
+    def _itinerary(self, legs: tuple) -> Itinerary:
+        registry = self.__service.get_flight_registry()
+        flights = [registry.get(number) for number in legs]
+        first = parse_flight_time(flights[0].get_departure_time(), self.__service_date)
+        last = flights[-1]
+        last_departure = parse_flight_time(last.get_departure_time(), self.__service_date)
+        arrival = parse_flight_time(last.get_arrival_time(), last_departure.date())
+        if arrival is not None and arrival < last_departure:
+            arrival += dt.timedelta(days=1)
+        return Itinerary(flights, first, arrival)
+
+
+# Bookings Export: streaming CSV / JSON-lines manifests
+BOOKING_EXPORT_FIELDS = ("ticket_number", "passenger", "passport_no", "flight_number", "origin", "destination",
+                         "departure_time", "seat_number", "class_type", "price", "payment_status",
+                         "amount_paid", "card", "baggage_id", "baggage_weight", "baggage_status")
+
+
+def iter_booking_rows(service: BookingService, flight_number: Optional[int] = None):
+    # One tuple per ticket in BOOKING_EXPORT_FIELDS order; the store is only copied as a list of references
+    store = service.get_ticket_store()
+    tickets = store.get_tickets() if flight_number is None else store.for_flight(flight_number)
+    for ticket in tickets:
+        passenger = ticket.get_passenger()
+        flight = ticket.get_flight()
+        seat = ticket.get_seat()
+        payment = ticket.get_payment()
+        paid = ticket.get_payment_status()
+        baggage = ticket.get_baggage()
+        yield (ticket.get_ticket_number(), passenger.get_name(), passenger.get_passport_no(),
+               flight.get_flights(), flight.get_origin(), flight.get_destination(), flight.get_departure_time(),
+               seat.get_seat_number(), seat.get_class_type(), seat.get_price(),
+               "paid" if paid else "pending",
+               payment.get_amount() if paid and payment is not None else None,
+               payment.get_masked_card()[-4:] if paid and payment is not None else None,
+               baggage.get_baggage_id() if baggage else None,
+               baggage.get_weight() if baggage else None,
+               baggage.get_status() if baggage else None)
+
+
+def export_bookings(service: BookingService, destination, fmt: str = "csv",
+                    flight_number: Optional[int] = None, buffer_size: int = 1 << 20) -> int:
+    """
+    Writes bookings to `destination` (a path, "-" for stdout, or an open text file) and
+    returns the number of rows. Output goes through one large buffer rather than a print per row.
+    """
+    if destination == "-":
+        target, owned = sys.stdout, False
+    elif isinstance(destination, str):
+        target, owned = open(destination, "w", newline="", encoding="utf-8", buffering=buffer_size), True
+    else:
+        target, owned = destination, False
+    rows = 0
+    try:
+        if fmt == "csv":
+            writer = csv.writer(target)
+            writer.writerow(BOOKING_EXPORT_FIELDS)
+            for row in iter_booking_rows(service, flight_number):
+                writer.writerow(row)
+                rows += 1
+        elif fmt == "jsonl":
+            encode = json.JSONEncoder(ensure_ascii=False).encode
+            for row in iter_booking_rows(service, flight_number):
+                target.write(encode(dict(zip(BOOKING_EXPORT_FIELDS, row))) + "\n")
+                rows += 1
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+    finally:
+        if owned:
+            target.close()
+        else:
+            target.flush()
+    return rows
+
+
+# Booking Server: line-delimited JSON over a local TCP or Unix socket
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _result_to_json(result: ServiceResult) -> dict:
+    value = result.value
+    if isinstance(value, list):
+        value = [item.to_dict() if hasattr(item, "to_dict") else item for item in value]
+    elif hasattr(value, "to_dict"):
+        value = value.to_dict()
+    return {"ok": result.ok, "value": value, "error": result.error, "message": result.message}
+
+
+class BookingServer:
+    """
+    Serves search/flights/routes/seats/fares/book/cancel/pay (plus register/login/stats) as one JSON object
+    per line, e.g.
+    {"op": "book", "passport_no": "1001", "flight_number": 452, "seat_number": 14}.
+    Bookings for the same flight arriving within one event-loop tick are applied as one batch.
+    """
+
+    def __init__(self, service: BookingService, host: str = "127.0.0.1", port: int = 8765,
+                 unix_path: Optional[str] = None, settlement: Optional[SettlementPipeline] = None):
+        self.__service = service
+        self.__settlement = settlement  # When set, "pay" goes through the batched gateway pipeline
+        self.__host = host
+        self.__port = port
+        self.__unix_path = unix_path
+        self.__server = None
+        self.__route_search = None
+        self.__pending: Dict[int, list] = {}
+        self.__batches = 0
+        self.__batched_bookings = 0
+        self.__open_connections = 0
+        self.__accepted_connections = 0
+
+    async def start(self):
+        if self.__unix_path:
+            self.__server = await asyncio.start_unix_server(self._handle_client, path=self.__unix_path, backlog=4096)
+        else:
+            self.__server = await asyncio.start_server(self._handle_client, self.__host, self.__port, backlog=4096)
+            self.__port = self.__server.sockets[0].getsockname()[1]
+        return self
+
+    def get_address(self):
+        return self.__unix_path if self.__unix_path else (self.__host, self.__port)
+
+    async def serve_forever(self):
+        if self.__server is None:
+            await self.start()
+        async with self.__server:
+            await self.__server.serve_forever()
+
+    async def close(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+
+    def get_stats(self) -> dict:
+        cache = self.__service.get_cache()
+        holds = self.__service.get_hold_scheduler()
+        return {"open_connections": self.__open_connections,
+                "accepted_connections": self.__accepted_connections, "batches": self.__batches,
+                "batched_bookings": self.__batched_bookings,
+                "cache": None if cache is None else cache.get_stats(),
+                "holds": None if holds is None else holds.get_stats(),
+                "settlement": None if self.__settlement is None else self.__settlement.get_stats()}
+
+    async def _handle_client(self, reader, writer):
+        self.__open_connections += 1
+        self.__accepted_connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self._dispatch(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.__open_connections -= 1
+            writer.close()
+
+    async def _dispatch(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            op = request["op"]
+        except (ValueError, KeyError, TypeError):
+            return _result_to_json(ServiceResult.failure(INVALID_INPUT, "Malformed request."))
+        try:
+            result = await self._execute(op, request)
+        except (KeyError, TypeError, ValueError, OverflowError) as e:
+            result = ServiceResult.failure(INVALID_INPUT, f"Bad arguments for {op}: {e}")
+        except Exception as e:
+            # One bad request must not drop the connection or the other requests on it
+            result = ServiceResult.failure(SERVER_ERROR, f"{op} failed: {type(e).__name__}: {e}")
+        response = _result_to_json(result)
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def _passenger(self, request: dict) -> Optional[Passenger]:
+        passport_no = request.get("passport_no")
+        return None if passport_no is None else self.__service.login(passport_no).value
+
+    async def _execute(self, op: str, request: dict) -> ServiceResult:
+        service = self.__service
+        if op == "search":
+            return ServiceResult.success(service.search_flights(request.get("origin"), request.get("destination")))
+        if op == "routes":
+            if self.__route_search is None:
+                self.__route_search = RouteSearchEngine(service)
+            depart_after = (parse_flight_time(request["depart_after"], self.__route_search.get_service_date())
+                            if request.get("depart_after") else None)
+            return ServiceResult.success(self.__route_search.search(
+                request["origin"], request["destination"], depart_after, int(request.get("max_connections", 1)),
+                class_type=request.get("class_type"), limit=int(request.get("limit", 10))))
+        if op == "seats":
+            return service.available_seats(int(request["flight_number"]), request.get("class_type"))
+        if op == "flights":
+            return service.list_flights(request.get("destination"), int(request.get("page", 1)),
+                                        int(request.get("page_size", 20)))
+        if op == "fares":
+            return ServiceResult.success(service.route_fares(request["origin"], request["destination"],
+                                                             request.get("class_type")))
+        if op == "register":
+            return service.register_passenger(request["name"], request["age"], request["phone"],
+                                              request.get("address", ""), request["passport_no"])
+        if op == "login":
+            return service.login(request["passport_no"])
+        if op == "stats":
+            return ServiceResult.success(self.get_stats())
+
+        passenger = self._passenger(request)
+        if passenger is None and op in ("book", "cancel", "waitlist", "pay"):
+            # Also guards cancel/pay: a None passenger would skip their ticket ownership check
+            return ServiceResult.failure(PASSENGER_NOT_FOUND, "Passenger not found! Please register.")
+        if op == "book":
+            seat_number = request.get("seat_number")
+            return await self._queue_booking(int(request["flight_number"]), passenger,
+                                             None if seat_number is None else int(seat_number),
+                                             request.get("class_type"))
+        if op == "cancel":
+            return service.cancel_ticket(int(request["ticket_number"]), passenger)
+        if op == "waitlist":
+            if request.get("leave"):
+                return service.leave_waitlist(passenger, int(request["flight_number"]))
+            return service.join_waitlist(passenger, int(request["flight_number"]), request.get("class_type"))
+        if op == "pay":
+            if self.__settlement is not None:
+                return await asyncio.wrap_future(self.__settlement.submit(
+                    int(request["ticket_number"]), request["card_number"], passenger))
+            return service.pay_for_ticket(int(request["ticket_number"]), request["card_number"], passenger)
+        return ServiceResult.failure(INVALID_INPUT, f"Unknown operation: {op}")
+
+    def _queue_booking(self, flight_number: int, passenger: Passenger, seat_number, class_type):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self.__pending.get(flight_number)
+        if batch is None:
+            batch = self.__pending[flight_number] = []
+            # Runs after every callback already scheduled for this tick, coalescing their bookings
+            loop.call_soon(self._flush_bookings, flight_number)
+        batch.append((passenger, seat_number, class_type, future))
+        return future
+
+    def _flush_bookings(self, flight_number: int):
+        batch = self.__pending.pop(flight_number)
+        try:
+            results = self.__service.book_batch(flight_number, [entry[:3] for entry in batch])
+        except Exception as e:
+            # Every client in the batch is waiting on its future; none may be left hanging
+            results = [ServiceResult.failure(SERVER_ERROR, f"Booking failed: {type(e).__name__}: {e}")] * len(batch)
+        self.__batches += 1
+        self.__batched_bookings += len(batch)
+        for entry, result in zip(batch, results):
+            future = entry[3]
+            if not future.cancelled():
+                future.set_result(result)
+
+
+async def _open_connection(address):
+    if isinstance(address, str):
+        return await asyncio.open_unix_connection(address)
+    return await asyncio.open_connection(*address)
+
+
+async def run_load_client(address, connections: int = 200, requests_per_connection: int = 20,
+                          flights: int = 100, seats_per_flight: int = 300) -> dict:
+    """
+    Opens `connections` concurrent clients. Each registers a passenger, then sends
+    `requests_per_connection` bookings for random flights/classes and reports latency percentiles.
+    """
+
+    latencies: List[float] = []
+    outcomes = {"ok": 0, "failed": 0}
+
+    async def client(index: int):
+        rng = random.Random(index)
+        reader, writer = await _open_connection(address)
+        passport_no = str(9000000 + index)
+
+        async def call(request: dict) -> dict:
+            start = time.perf_counter()
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            return response
+
+        await call({"op": "register", "name": f"Load {index}", "age": 30, "phone": "1",
+                    "passport_no": passport_no})
+        for _ in range(requests_per_connection):
+            response = await call({"op": "book", "passport_no": passport_no,
+                                   "flight_number": rng.randint(1, flights),
+                                   "class_type": rng.choice(CLASS_TYPES)})
+            outcomes["ok" if response["ok"] else "failed"] += 1
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {"connections": connections, "requests": len(latencies), "seconds": elapsed,
+            "requests_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50) * 1000, "p99_ms": percentile(latencies, 99) * 1000,
+            "bookings_ok": outcomes["ok"], "bookings_failed": outcomes["failed"]}
+
+
+async def run_self_hosted_load_test(connections: int, requests_per_connection: int, flights: int,
+                                    seats_per_flight: int, unix_path: Optional[str] = None) -> dict:
+    # Server and load generator share one event loop; numbers include both sides
+    service = build_synthetic_service(flights, seats_per_flight, passengers=0)
+    server = await BookingServer(service, port=0, unix_path=unix_path).start()
+    try:
+        report = await run_load_client(server.get_address(), connections, requests_per_connection,
+                                       flights, seats_per_flight)
+        report.update(server.get_stats())
+        return report
+    finally:
+        await server.close()
+
+
+# Sharded Engine: flights partitioned by number across worker processes, behind a router
+def _shard_execute(service: BookingService, request: dict) -> dict:
+    # One request against a shard's own BookingService; results are JSON-shaped like the server's
+    op = request["op"]
+    passport_no = request.get("passport_no")
+    passenger = service.get_passenger_directory().get(passport_no) if passport_no is not None else None
+    try:
+        if op == "register":
+            result = service.register_passenger(request["name"], request["age"], request["phone"],
+                                                request.get("address", ""), request["passport_no"])
+        elif op == "login":
+            result = service.login(passport_no)
+        elif op == "create_flight":
+            result = service.create_flight(request["flight_number"], request["origin"], request["destination"],
+                                           request["departure_time"], request.get("arrival_time"))
+        elif op == "add_seat":
+            result = service.add_seat(request["flight_number"], request["seat_number"], request["class_type"],
+                                      request["price"])
+        elif op == "search":
+            result = ServiceResult.success(service.search_flights(request.get("origin"), request.get("destination")))
+        elif op == "schedule":
+            result = ServiceResult.success([_flight_header(flight) for flight in service.get_flight_registry()])
+        elif op == "seats":
+            result = service.available_seats(request["flight_number"], request.get("class_type"))
+        elif op == "free":
+            # Free count and lowest free fare per class for each requested flight
+            free = {}
+            for flight_number in request["flight_numbers"]:
+                flight = service.get_flight(flight_number)
+                if flight is not None:
+                    inventory = flight.get_inventory()
+                    free[flight_number] = {class_type: [inventory.count_free(class_type),
+                                                        inventory.lowest_free_price(class_type)]
+                                           for class_type in CLASS_TYPES}
+            result = ServiceResult.success(free)
+        elif op == "tickets":
+            result = ServiceResult.success(service.tickets_for(passenger) if passenger else [])
+        elif op == "book":
+            if passenger is None:
+                result = ServiceResult.failure(PASSENGER_NOT_FOUND, "Passenger not found! Please register.")
+            else:
+                result = service.book_seat(passenger, request["flight_number"], request.get("seat_number"),
+                                           request.get("class_type"))
+        elif op in ("cancel", "pay") and passenger is None:
+            # A None passenger would skip the ticket ownership check
+            result = ServiceResult.failure(PASSENGER_NOT_FOUND, "Passenger not found! Please register.")
+        elif op == "cancel":
+            result = service.cancel_ticket(request["ticket_number"], passenger)
+        elif op == "pay":
+            result = service.pay_for_ticket(request["ticket_number"], request["card_number"], passenger)
+        elif op == "unregister":
+            # Router rollback of a partial registration; never drops a passenger who has bookings
+            if passenger is not None and not service.tickets_for(passenger):
+                service.get_passenger_directory().remove(passport_no)
+            result = ServiceResult.success(None)
+        else:
+            result = ServiceResult.failure(INVALID_INPUT, f"Unknown operation: {op}")
+    except (KeyError, TypeError, ValueError, OverflowError) as e:
+        result = ServiceResult.failure(INVALID_INPUT, f"Bad arguments for {op}: {e}")
+    except Exception as e:
+        # A failing request must not take the worker (and every flight it owns) down with it
+        result = ServiceResult.failure(SERVER_ERROR, f"{op} failed: {type(e).__name__}: {e}")
+    return _result_to_json(result)
+
+
+def _flight_header(flight: Flight) -> dict:
+    return {"flight_number": flight.get_flights(), "origin": flight.get_origin(),
+            "destination": flight.get_destination(), "departure_time": flight.get_departure_time(),
+            "arrival_time": flight.get_arrival_time()}
+
+
+def _shard_main(index: int, shards: int, connection, synthetic=None):
+    # Worker process: owns flights with number % shards == index and allocates tickets index+1, index+1+shards, ...
+    if synthetic is not None:
+        service = build_synthetic_service(*synthetic, shard=(index, shards))
+    else:
+        service = BookingService(first_ticket_number=index + 1, ticket_step=shards)
+    while True:
+        batch = connection.recv()
+        if batch is None:
+            break
+        connection.send([_shard_execute(service, request) for request in batch])
+    connection.close()
+
+
+class ShardRouter:
+    """
+    Starts `shards` worker processes, each running its own BookingService, and routes requests
+    over one pipe per shard: flight operations go to flight_number % shards, ticket operations to
+    (ticket_number - 1) % shards, passenger registration is broadcast, and passenger/route queries
+    fan out and merge. execute() sends each shard its share of a request batch as one message, so
+    shards work in parallel. Results are the same JSON-shaped dicts the booking server returns.
+    """
+
+    def __init__(self, shards: int = 4, synthetic=None):
+        # synthetic: optional (flights, seats_per_flight, passengers) each shard builds for its own partition
+        self.__shards = shards
+        self.__connections = []
+        self.__processes = []
+        self.__locks = []
+        for index in range(shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_main, args=(index, shards, child, synthetic),
+                                              daemon=True)
+            process.start()
+            child.close()
+            self.__connections.append(parent)
+            self.__processes.append(process)
+            self.__locks.append(threading.Lock())
+        self.__route_search = None
+        self.__schedule = None
+
+    def get_shard_count(self) -> int:
+        return self.__shards
+
+    def shard_for(self, request: dict) -> Optional[int]:
+        # None means every shard
+        if "flight_number" in request:
+            return int(request["flight_number"]) % self.__shards
+        if "ticket_number" in request:
+            return (int(request["ticket_number"]) - 1) % self.__shards
+        return None
+
+    def _exchange(self, batches: Dict[int, list]) -> Dict[int, list]:
+        # Send first, then collect, so all shards work on their batches at the same time
+        for index in batches:
+            self.__locks[index].acquire()
+        try:
+            for index, batch in batches.items():
+                self.__connections[index].send(batch)
+            return {index: self.__connections[index].recv() for index in batches}
+        finally:
+            for index in batches:
+                self.__locks[index].release()
+
+    def execute(self, requests: List[dict]) -> List[dict]:
+        # Single-shard requests only; results come back in request order
+        batches: Dict[int, list] = {}
+        positions: Dict[int, list] = {}
+        for position, request in enumerate(requests):
+            index = self.shard_for(request)
+            if index is None:
+                raise ValueError(f"{request['op']} has no owning shard; use the fan-out methods.")
+            batches.setdefault(index, []).append(request)
+            positions.setdefault(index, []).append(position)
+        results: List[Optional[dict]] = [None] * len(requests)
+        for index, replies in self._exchange(batches).items():
+            for position, reply in zip(positions[index], replies):
+                results[position] = reply
+        return results
+
+    def broadcast(self, request: dict) -> List[dict]:
+        replies = self._exchange({index: [request] for index in range(self.__shards)})
+        return [replies[index][0] for index in range(self.__shards)]
+
+    # Operations
+    def register_passenger(self, name: str, age: int, phone: str, address: str, passport_no: str) -> dict:
+        # Every shard needs the passenger to book on its flights; a partial registration is rolled back
+        replies = self.broadcast({"op": "register", "name": name, "age": age, "phone": phone,
+                                  "address": address, "passport_no": passport_no})
+        failed = [reply for reply in replies if not reply["ok"]]
+        if not failed:
+            return replies[0]
+        registered = [index for index, reply in enumerate(replies) if reply["ok"]]
+        if registered:
+            self._exchange({index: [{"op": "unregister", "passport_no": passport_no}] for index in registered})
+        return failed[0]
+
+    def login(self, passport_no: str) -> dict:
+        return self._exchange({0: [{"op": "login", "passport_no": passport_no}]})[0][0]
+
+    def create_flight(self, flight_number: int, origin: str, destination: str, departure_time: str,
+                      arrival_time: Optional[str] = None) -> dict:
+        self.__schedule = self.__route_search = None  # Rebuilt on the next route search
+        return self.execute([{"op": "create_flight", "flight_number": flight_number, "origin": origin,
+                              "destination": destination, "departure_time": departure_time,
+                              "arrival_time": arrival_time}])[0]
+
+    def add_seat(self, flight_number: int, seat_number: int, class_type: str, price: float) -> dict:
+        return self.execute([{"op": "add_seat", "flight_number": flight_number, "seat_number": seat_number,
+                              "class_type": class_type, "price": price}])[0]
+
+    def book(self, passport_no: str, flight_number: int, seat_number: Optional[int] = None,
+             class_type: Optional[str] = None) -> dict:
+        return self.execute([{"op": "book", "passport_no": passport_no, "flight_number": flight_number,
+                              "seat_number": seat_number, "class_type": class_type}])[0]
+
+    def cancel(self, ticket_number: int, passport_no: Optional[str] = None) -> dict:
+        return self.execute([{"op": "cancel", "ticket_number": ticket_number, "passport_no": passport_no}])[0]
+
+    def pay(self, ticket_number: int, card_number: str, passport_no: Optional[str] = None) -> dict:
+        return self.execute([{"op": "pay", "ticket_number": ticket_number, "card_number": card_number,
+                              "passport_no": passport_no}])[0]
+
+    def available_seats(self, flight_number: int, class_type: Optional[str] = None) -> dict:
+        return self.execute([{"op": "seats", "flight_number": flight_number, "class_type": class_type}])[0]
+
+    def search(self, origin: Optional[str] = None, destination: Optional[str] = None) -> List[dict]:
+        flights = []
+        for reply in self.broadcast({"op": "search", "origin": origin, "destination": destination}):
+            flights.extend(reply["value"])
+        return sorted(flights, key=lambda flight: flight["flight_number"])
+
+    def tickets_for(self, passport_no: str) -> List[dict]:
+        tickets = []
+        for reply in self.broadcast({"op": "tickets", "passport_no": passport_no}):
+            tickets.extend(reply["value"])
+        return sorted(tickets, key=lambda ticket: ticket["ticket_number"])
+
+    def routes(self, origin: str, destination: str, depart_after=None, max_connections: int = 1,
+               class_type: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """
+        Searches a schedule replica held by the router (no seats), then checks the legs of the
+        candidate itineraries against their shards in one fan-out and keeps those with seats.
+        When too few candidates have seats, the search is widened until `limit` itineraries
+        are found or the schedule has no more candidates.
+        """
+        if self.__route_search is None:
+            self.__schedule = BookingService()
+            for reply in self.broadcast({"op": "schedule"}):
+                for header in reply["value"]:
+                    self.__schedule.add_flight(Flight(**header))
+            self.__route_search = RouteSearchEngine(self.__schedule, availability=lambda number, wanted: True)
+        classes = [class_type] if class_type else list(CLASS_TYPES)
+        free = {}  # Flight number -> per-class [free count, lowest free fare], fetched once per call
+        candidate_limit = limit * 3
+        while True:
+            candidates = self.__route_search.search(origin, destination, depart_after, max_connections,
+                                                    class_type=class_type, limit=candidate_limit)
+            wanted: Dict[int, list] = {}
+            for itinerary in candidates:
+                for flight in itinerary.legs:
+                    number = flight.get_flights()
+                    if number not in free:
+                        free[number] = {}
+                        wanted.setdefault(number % self.__shards, []).append(number)
+            for index, replies in self._exchange({index: [{"op": "free", "flight_numbers": numbers}]
+                                                  for index, numbers in wanted.items()}).items():
+                free.update({int(number): counts for number, counts in replies[0]["value"].items()})
+            results = []
+            for itinerary in candidates:
+                legs = [free[flight.get_flights()] for flight in itinerary.legs]
+                if not all(any(leg.get(name, [0])[0] for name in classes) for leg in legs):
+                    continue
+                data = itinerary.to_dict()
+                data["free_seats"] = [{name: leg[name][0] for name in CLASS_TYPES} for leg in legs]
+                data["cheapest_fares"] = {name: (sum(leg[name][1] for leg in legs)
+                                                 if all(leg[name][1] is not None for leg in legs) else None)
+                                          for name in CLASS_TYPES}
+                results.append(data)
+                if len(results) == limit:
+                    return results
+            if len(candidates) < candidate_limit:
+                return results  # Every candidate itinerary has been checked
+            candidate_limit *= 2
+
+    def close(self):
+        for index, connection in enumerate(self.__connections):
+            with self.__locks[index]:
+                connection.send(None)
+                connection.close()
+        for process in self.__processes:
+            process.join()
+
+
+# Session Traces: record real user journeys as operation traces and replay them as load
+TEST_CARD_NUMBER = "4111111111111111"
+
+
+class SessionRecorder:
+    """
+    Stands in for a BookingService (AirlineManagementSystem(SessionRecorder(service))) and records
+    every traced call as {"session", "t", "op", "args", "ok", "error", "value"}: passengers are
+    stored by passport number, card numbers are replaced by a test card of the same validity,
+    registrations keep no name, address or phone digits, and "value" holds the ticket number a
+    booking produced. A successful login or registration (which signs the new passenger in) starts
+    a new session.
+    """
+
+    OPERATIONS = ("register_passenger", "login", "search_flights", "list_flights", "available_seats", "route_fares",
+                  "tickets_for", "find_ticket", "book_seat", "join_waitlist", "leave_waitlist", "cancel_ticket",
+                  "pay_for_ticket", "add_baggage", "attach_baggage", "update_baggage_status",
+                  "update_flight_baggage_status", "create_flight", "add_seat")
+
+    def __init__(self, service: BookingService, clock=time.monotonic):
+        self.__service = service
+        self.__clock = clock
+        self.__started = clock()
+        self.__lock = threading.Lock()
+        self.__traces: List[dict] = []
+        self.__session = 0
+        self.__passport = None
+
+    def __getattr__(self, name: str):
+        method = getattr(self.__service, name)
+        if name not in self.OPERATIONS:
+            return method
+        return self._wrap(name, method)
+
+    def get_service(self) -> BookingService:
+        return self.__service
+
+    def get_traces(self) -> List[dict]:
+        with self.__lock:
+            return list(self.__traces)
+
+    def new_session(self):
+        with self.__lock:
+            self.__session += 1
+            self.__passport = None
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as out:
+            for trace in self.get_traces():
+                out.write(json.dumps(trace) + "\n")
+
+    def _wrap(self, name: str, method):
+        signature = inspect.signature(method)
+
+        def recorded(*args, **kwargs):
+            arguments = dict(signature.bind(*args, **kwargs).arguments)
+            offset = self.__clock() - self.__started
+            result = method(*args, **kwargs)
+            for key, value in arguments.items():
+                if isinstance(value, Passenger):
+                    arguments[key] = value.get_passport_no()
+            if "card_number" in arguments:
+                arguments["card_number"] = (TEST_CARD_NUMBER if Payment.is_valid_card_number(arguments["card_number"])
+                                            else "0")
+            if name == "register_passenger":
+                self._scrub_passenger(arguments)
+            trace = {"op": name, "args": arguments, "ok": True, "error": None, "value": None}
+            if isinstance(result, ServiceResult):
+                trace["ok"], trace["error"] = result.ok, result.error
+                if name == "book_seat" and result.ok:
+                    trace["value"] = result.value.get_ticket_number()
+            with self.__lock:
+                if (name in ("login", "register_passenger") and result
+                        and arguments["passport_no"] != self.__passport):
+                    self.__session += 1
+                    self.__passport = arguments["passport_no"]
+                trace["session"], trace["t"] = self.__session, round(offset, 6)
+                self.__traces.append(trace)
+            return result
+
+        return recorded
+
+    @staticmethod
+    def _scrub_passenger(arguments: dict):
+        # Placeholders that register the same way: a phone keeps its length and whether it is all digits
+        if "name" in arguments:
+            arguments["name"] = "Recorded Passenger"
+        if "address" in arguments:
+            arguments["address"] = "Recorded Address"
+        if "phone" in arguments:
+            phone = str(arguments["phone"])
+            arguments["phone"] = "0" * len(phone) if phone.isdigit() else "x"
+
+
+def load_traces(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+def save_traces(traces: List[dict], path: str):
+    with open(path, "w", encoding="utf-8") as out:
+        for trace in traces:
+            out.write(json.dumps(trace) + "\n")
+
+
+def generate_synthetic_traces(service: BookingService, sessions: int = 1000, mix: Optional[Dict[str, float]] = None,
+                              operations_per_session: int = 12, new_passenger_ratio: float = 0.2,
+                              arrival_rate: float = 20.0, think_time: float = 2.0, seed: int = 1) -> List[dict]:
+    """
+    Traces in the recorder's format over the service's schedule and passengers. Each session logs
+    in (or registers first) and then draws operations from `mix`: "browse" (search, seat map,
+    route fares, own tickets), "book" (a booking, usually paid, sometimes with a bag) and
+    "cancel" (one of the session's own tickets). Sessions arrive as a Poisson process of
+    `arrival_rate` per second with exponential think times between operations. Outcomes are not
+    known in advance, so "ok" is None and replays report no divergences for these traces.
+    """
+    rng = random.Random(seed)
+    mix = mix or {"browse": 0.90, "book": 0.08, "cancel": 0.02}
+    kinds, weights = list(mix), list(mix.values())
+    flights = [(flight.get_flights(), flight.get_origin(), flight.get_destination())
+               for flight in service.get_flight_registry()]
+    if not flights:
+        raise ValueError("The service has no flights to generate traces over.")
+    passports = [passenger.get_passport_no() for passenger in service.get_passenger_directory()]
+    traces = []
+    next_ticket = 1     # Placeholder ticket numbers; the replayer maps them to the tickets it gets
+    next_bag = 1
+    start = 0.0
+    for session in range(1, sessions + 1):
+        start += rng.expovariate(arrival_rate)
+        now = start
+
+        def emit(op: str, value=None, **arguments):
+            traces.append({"session": session, "t": round(now, 6), "op": op, "args": arguments, "ok": None,
+                           "error": None, "value": value})
+
+        if not passports or rng.random() < new_passenger_ratio:
+            passport = str(900000000 + session)
+            emit("register_passenger", name=f"Traveller {session}", age=rng.randint(18, 80), phone="01000000000",
+                 address="Cairo", passport_no=passport)
+            now += rng.expovariate(1 / think_time)
+        else:
+            passport = rng.choice(passports)
+        emit("login", passport_no=passport)
+        booked = []
+        for _ in range(max(1, int(rng.expovariate(1 / operations_per_session)))):
+            now += rng.expovariate(1 / think_time)
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "cancel" and booked:
+                emit("cancel_ticket", ticket_number=booked.pop(rng.randrange(len(booked))), passenger=passport)
+            elif kind == "book":
+                number = rng.choice(flights)[0]
+                emit("book_seat", next_ticket, passenger=passport, flight_number=number, seat_number=None,
+                     class_type=rng.choice(CLASS_TYPES))
+                booked.append(next_ticket)
+                if rng.random() < 0.7:
+                    now += rng.expovariate(1 / think_time)
+                    emit("pay_for_ticket", ticket_number=next_ticket, card_number=TEST_CARD_NUMBER, passenger=passport)
+                if rng.random() < 0.3:
+                    now += rng.expovariate(1 / think_time)
+                    emit("attach_baggage", ticket_number=next_ticket, baggage_id=next_bag,
+                         weight=round(rng.uniform(5, 35), 1), passenger=passport)
+                    next_bag += 1
+                next_ticket += 1
+            else:
+                number, origin, destination = rng.choice(flights)
+                browse = rng.random()
+                if browse < 0.4:
+                    emit("search_flights", origin=origin, destination=destination)
+                elif browse < 0.7:
+                    emit("available_seats", flight_number=number, class_type=None)
+                elif browse < 0.9:
+                    emit("route_fares", origin=origin, destination=destination, class_type=None)
+                else:
+                    emit("tickets_for", passenger=passport)
+    traces.sort(key=lambda trace: trace["t"])
+    return traces
+
 
-    def make_payment_for_ticket(self):
-        if not self.__current_passenger:
-            print("Please login to make a payment.")
+def open_replay_service(sqlite: Optional[str] = None, data_dir: Optional[str] = None,
+                        seat_snapshot: Optional[str] = None):
+    """
+    Returns (service, storage to close or None) with the schedule an interactive session runs on:
+    the given store, or the demo flights. Nothing is attached, so a replay never writes to the store.
+    """
+    service = BookingService()
+    storage = None
+    if sqlite:
+        storage = SQLiteStorage(sqlite)
+        storage.load_into(service)
+    elif seat_snapshot:
+        storage = SeatSnapshot(seat_snapshot)
+        storage.load_into(service)
+    elif data_dir:
+        StateJournal(data_dir).recover(service)
+    if not service.get_flight_registry():
+        load_demo_flights(service)
+    return service, storage
+
+
+def replay_traces(system: AirlineManagementSystem, traces: List[dict], speedup: float = 1.0,
+                  concurrency: int = 8) -> dict:
+    """
+    Re-drives traces against the system's service: each session runs its operations in order on
+    one of `concurrency` worker threads, waiting until the operation's recorded time divided by
+    `speedup` (0 replays as fast as possible). Ticket numbers in the traces are mapped to the
+    tickets the replay actually created. Reports throughput, latency percentiles per operation,
+    and operations whose outcome (ok / error code) differs from the recording.
+    """
+    service = system.get_service()
+    directory = service.get_passenger_directory()
+    sessions: Dict[int, List[dict]] = {}
+    for trace in traces:
+        sessions.setdefault(trace["session"], []).append(trace)
+    tickets: Dict[int, int] = {}
+    lock = threading.Lock()
+    histograms: Dict[str, LatencyHistogram] = {}
+    overall = LatencyHistogram()
+    divergences: List[dict] = []
+    counts = {"divergent": 0, "failed": 0, "errors": 0}
+
+    def replay(session: int, operations: List[dict]):
+        for index, trace in enumerate(operations):
+            if speedup:
+                delay = trace["t"] / speedup - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            arguments = dict(trace["args"])
+            if arguments.get("passenger") is not None:
+                arguments["passenger"] = directory.get(arguments["passenger"])
+            if "ticket_number" in arguments:
+                with lock:
+                    arguments["ticket_number"] = tickets.get(arguments["ticket_number"], arguments["ticket_number"])
+            operation_start = time.perf_counter()
+            try:
+                result = getattr(service, trace["op"])(**arguments)
+            except (AttributeError, TypeError, ValueError) as e:
+                result = ServiceResult.failure(INVALID_INPUT, f"{type(e).__name__}: {e}")
+            elapsed = time.perf_counter() - operation_start
+            ok, error = (result.ok, result.error) if isinstance(result, ServiceResult) else (True, None)
+            with lock:
+                histograms.setdefault(trace["op"], LatencyHistogram()).record(elapsed)
+                overall.record(elapsed)
+                if not ok:
+                    counts["failed"] += 1
+                if trace["value"] is not None and ok and isinstance(result.value, Ticket):
+                    tickets[trace["value"]] = result.value.get_ticket_number()
+                if trace["ok"] is not None and (trace["ok"], trace["error"]) != (ok, error):
+                    counts["divergent"] += 1
+                    if len(divergences) < 20:
+                        divergences.append({"session": session, "index": index, "op": trace["op"],
+                                            "recorded": trace["error"] or "ok", "replayed": error or "ok"})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(replay, session, operations) for session, operations in sessions.items()]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    return {"sessions": len(sessions), "operations": overall.count, "seconds": round(elapsed, 3),
+            "ops_per_sec": round(overall.count / elapsed, 1) if elapsed else 0.0,
+            "failed": counts["failed"], "divergent": counts["divergent"], "divergences": divergences,
+            "latency": overall.to_dict(),
+            "operations_latency": {name: histograms[name].to_dict() for name in sorted(histograms)}}
+
+
+# State Journal: write-ahead log with group commit plus compacted snapshots
+class StateJournal:
+    """
+    Appends every BookingService event to numbered log segments (wal-<first seq>.log) as JSON lines.
+    Records are buffered and written as one group commit once `group_commit_size` are pending or
+    `flush_interval` seconds have passed; the file is fsynced every `fsync_batches` commits (0 = never).
+    A snapshot (snapshot.jsonl) is a compacted event stream tagged with the last sequence number it
+    covers; recovery loads it and replays only log records after that number.
+    """
+
+    SNAPSHOT_FILE = "snapshot.jsonl"
+
+    def __init__(self, directory: str, group_commit_size: int = 256, fsync_batches: int = 1,
+                 flush_interval: float = 0.01, snapshot_every: int = 100000):
+        os.makedirs(directory, exist_ok=True)
+        self.__directory = directory
+        self.__group_commit_size = max(1, group_commit_size)
+        self.__fsync_batches = fsync_batches
+        self.__flush_interval = flush_interval
+        self.__snapshot_every = snapshot_every
+        self.__lock = threading.Lock()
+        self.__buffer: List[str] = []
+        self.__seq = 0
+        self.__commits = 0
+        self.__since_snapshot = 0
+        self.__file = None
+        self.__service = None
+        self.__stop = threading.Event()
+        self.__flusher = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.__directory, name)
+
+    def _segments(self) -> List[tuple]:
+        segments = []
+        for name in os.listdir(self.__directory):
+            if name.startswith("wal-") and name.endswith(".log"):
+                segments.append((int(name[4:-4]), self._path(name)))
+        return sorted(segments)
+
+    def get_sequence(self) -> int:
+        return self.__seq
+
+    # Recovery
+    def recover(self, service: BookingService) -> dict:
+        start = time.perf_counter()
+        snapshot_seq = 0
+        snapshot_events = 0
+        try:
+            with open(self._path(self.SNAPSHOT_FILE), encoding="utf-8") as snapshot:
+                snapshot_seq = json.loads(snapshot.readline())["seq"]
+                for line in snapshot:
+                    record = json.loads(line)
+                    service.apply_event(record["event"], record["data"])
+                    snapshot_events += 1
+        except FileNotFoundError:
+            pass
+        snapshot_seconds = time.perf_counter() - start
+        self.__seq = snapshot_seq
+        replayed = 0
+        for _, path in self._segments():
+            with open(path, encoding="utf-8") as segment:
+                for line in segment:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Torn write at the tail of the log; everything before it is intact
+                    if record["seq"] <= snapshot_seq:
+                        continue
+                    service.apply_event(record["event"], record["data"])
+                    self.__seq = record["seq"]
+                    replayed += 1
+        seconds = time.perf_counter() - start
+        return {"snapshot_seq": snapshot_seq, "snapshot_events": snapshot_events, "replayed": replayed,
+                "snapshot_seconds": snapshot_seconds, "replay_seconds": seconds - snapshot_seconds,
+                "seconds": seconds}
+
+    # Logging
+    def attach(self, service: BookingService):
+        self.__service = service
+        self.__file = open(self._path(f"wal-{self.__seq + 1:020d}.log"), "a", encoding="utf-8")
+        service.add_listener(self.append)
+        if self.__flush_interval:
+            self.__flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+            self.__flusher.start()
+
+    def append(self, event: str, data: dict):
+        with self.__lock:
+            self.__seq += 1
+            self.__buffer.append(json.dumps({"seq": self.__seq, "event": event, "data": data}) + "\n")
+            if len(self.__buffer) >= self.__group_commit_size:
+                self._commit_locked()
+
+    def flush(self):
+        with self.__lock:
+            self._commit_locked()
+
+    def _commit_locked(self):
+        if not self.__buffer or self.__file is None:
             return
-            
-        ticket_number = self.get_valid_input("Enter your Ticket Number to make payment: ", int)
-        ticket = None
-        
-        for t in self.__tickets:
-            if t.get_ticket_number() == ticket_number and t.get_passenger() == self.__current_passenger:
-                ticket = t
-                break
-                
-        if ticket:
-            if ticket._Ticket__payment_status: 
-                print(f"✅ Payment for Ticket {ticket_number} is already completed.")
+        self.__file.write("".join(self.__buffer))
+        self.__file.flush()
+        self.__since_snapshot += len(self.__buffer)
+        self.__buffer.clear()
+        self.__commits += 1
+        if self.__fsync_batches and self.__commits % self.__fsync_batches == 0:
+            os.fsync(self.__file.fileno())
+
+    def _flush_loop(self):
+        while not self.__stop.wait(self.__flush_interval):
+            self.flush()
+            if self.__snapshot_every and self.__since_snapshot >= self.__snapshot_every:
+                self.snapshot()
+
+    # Snapshots
+    def snapshot(self) -> int:
+        # Seats, tickets and payments are frozen while they are exported, so the snapshot is one
+        # consistent state; flight locks come before the journal lock, as on the append path
+        temporary = self._path(self.SNAPSHOT_FILE + ".tmp")
+        with self.__service.quiesce():
+            with self.__lock:
+                self._commit_locked()
+                if self.__file is not None:
+                    os.fsync(self.__file.fileno())
+                    self.__file.close()
+                covered = self.__seq
+                self.__since_snapshot = 0
+                self.__file = open(self._path(f"wal-{covered + 1:020d}.log"), "a", encoding="utf-8")
+            # Changes not guarded by flight locks (e.g. registrations) can still land in the new
+            # segment as well; replaying those is idempotent
+            with open(temporary, "w", encoding="utf-8") as snapshot:
+                snapshot.write(json.dumps({"seq": covered}) + "\n")
+                for event, data in self.__service.export_events():
+                    snapshot.write(json.dumps({"event": event, "data": data}) + "\n")
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+        os.replace(temporary, self._path(self.SNAPSHOT_FILE))
+        for first_seq, path in self._segments():
+            if first_seq <= covered:
+                os.remove(path)
+        return covered
+
+    def close(self):
+        self.__stop.set()
+        if self.__flusher is not None:
+            self.__flusher.join()
+        if self.__service is not None:
+            self.__service.remove_listener(self.append)
+        with self.__lock:
+            self._commit_locked()
+            if self.__file is not None:
+                os.fsync(self.__file.fileno())
+                self.__file.close()
+                self.__file = None
+
+
+def open_durable_service(directory: str, **journal_options):
+    # Returns (service, journal, recovery stats) with the journal already logging new changes
+    service = BookingService()
+    journal = StateJournal(directory, **journal_options)
+    stats = journal.recover(service)
+    journal.attach(service)
+    return service, journal, stats
+
+
+# Storage Backends: persist service events and hydrate a service from storage
+class StorageBackend(ABC):
+    @abstractmethod
+    def record(self, event: str, data: dict):
+        pass
+
+    @abstractmethod
+    def load_into(self, service: BookingService):
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+    def attach(self, service: BookingService):
+        service.add_listener(self.record)
+
+
+class ConnectionPool:
+    # Fixed set of sqlite3 connections handed out to reader threads
+    def __init__(self, path: str, size: int = 4):
+        self.__path = path
+        self.__idle = queue.Queue()
+        self.__all = []
+        for _ in range(size):
+            connection = self.open_connection(path)
+            self.__all.append(connection)
+            self.__idle.put(connection)
+
+    @staticmethod
+    def open_connection(path: str):
+        connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def acquire(self, timeout: float = 30.0):
+        # Waiting forever would hide a caller that needs a second connection while holding one
+        try:
+            return self.__idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No SQLite reader connection became free within {timeout:g}s.") from None
+
+    def release(self, connection):
+        self.__idle.put(connection)
+
+    def close(self):
+        for connection in self.__all:
+            connection.close()
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    sqlite3 backend in WAL mode. Writes go through one locked writer connection; reads use
+    a small ConnectionPool so they can run concurrently. Flights loaded from storage get a
+    seat loader, so their seat rows are only materialized when the flight is first used.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS passengers (
+            passport_no TEXT PRIMARY KEY, name TEXT, age INTEGER, phone TEXT, address TEXT);
+        CREATE TABLE IF NOT EXISTS flights (
+            flight_number INTEGER PRIMARY KEY, origin TEXT, destination TEXT, departure_time TEXT,
+            arrival_time TEXT);
+        CREATE TABLE IF NOT EXISTS seats (
+            flight_number INTEGER NOT NULL, seat_number INTEGER NOT NULL, class_type TEXT,
+            price REAL, available INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (flight_number, seat_number)) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS tickets (
+            ticket_number INTEGER PRIMARY KEY, passport_no TEXT NOT NULL, flight_number INTEGER NOT NULL,
+            seat_number INTEGER NOT NULL, payment_status INTEGER NOT NULL DEFAULT 0, baggage_id INTEGER);
+        CREATE INDEX IF NOT EXISTS tickets_by_passenger ON tickets (passport_no);
+        CREATE INDEX IF NOT EXISTS tickets_by_flight ON tickets (flight_number);
+        CREATE TABLE IF NOT EXISTS payments (
+            ticket_number INTEGER PRIMARY KEY, amount REAL, card_last4 TEXT);
+        CREATE TABLE IF NOT EXISTS baggage (
+            baggage_id INTEGER, weight REAL, status TEXT, ticket_number INTEGER);
+        CREATE INDEX IF NOT EXISTS baggage_by_ticket ON baggage (ticket_number);
+        CREATE INDEX IF NOT EXISTS baggage_by_id ON baggage (baggage_id);
+        CREATE TABLE IF NOT EXISTS waitlist (
+            flight_number INTEGER, passport_no TEXT, class_type TEXT, tier INTEGER, sequence INTEGER,
+            PRIMARY KEY (flight_number, passport_no));
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+    """
+
+    def __init__(self, path: str, readers: int = 4):
+        self.__writer = ConnectionPool.open_connection(path)
+        self.__writer.executescript(self.SCHEMA)
+        columns = {row[1] for row in self.__writer.execute("PRAGMA table_info(flights)")}
+        if "arrival_time" not in columns:
+            # Databases created before flights carried an arrival time
+            self.__writer.execute("ALTER TABLE flights ADD COLUMN arrival_time TEXT")
+        self.__write_lock = threading.Lock()
+        self.__readers = ConnectionPool(path, readers)
+
+    def _read(self, sql: str, params=()):
+        connection = self.__readers.acquire()
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            self.__readers.release(connection)
+
+    def _iter_read(self, sql: str, params=(), batch: int = 1000):
+        # Streams rows in batches so large result sets are never held in memory at once. The reader
+        # stays checked out until the loop ends, so the loop body must not read from this storage
+        connection = self.__readers.acquire()
+        try:
+            cursor = connection.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            self.__readers.release(connection)
+
+    def _paged_read(self, table: str, key: str, batch: int = 1000):
+        # Streams `table` in pages ordered by `key`, holding a reader only while a page is fetched,
+        # so the loop body may read from this storage too (e.g. by hydrating a flight)
+        rows = self._read(f"SELECT {key}, * FROM {table} ORDER BY {key} LIMIT ?", (batch,))
+        while rows:
+            for row in rows:
+                yield row[1:]
+            if len(rows) < batch:
                 return
-            else:
-                amount = ticket.get_seat()._Seat__price
-                while True:
-                    card_number = input("Enter your 16-digit card number: ").strip()
-                    if card_number.isdigit() and len(card_number) == 16:
-                        break
-                    else:
-                        print("❌ Invalid card number. Please enter exactly 16 digits.")
+            rows = self._read(f"SELECT {key}, * FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?",
+                              (rows[-1][0], batch))
+
+    # Bulk loads
+    def bulk_insert_flights(self, flights):
+        # One transaction, with flight and seat rows sent through executemany
+        with self.__write_lock, self.__writer:
+            for flight in flights:
+                self.__writer.execute("INSERT INTO flights VALUES (?, ?, ?, ?, ?)",
+                                      (flight.get_flights(), flight.get_origin(), flight.get_destination(),
+                                       flight.get_departure_time(), flight.get_arrival_time()))
+                self.__writer.executemany(
+                    "INSERT INTO seats VALUES (?, ?, ?, ?, ?)",
+                    [(flight.get_flights(), seat.get_seat_number(), seat.get_class_type(), seat.get_price(),
+                      int(seat.is_available())) for seat in flight.get_seats()])
+
+    def bulk_insert_seats(self, rows):
+        # rows: iterable of (flight_number, seat_number, class_type, price, available)
+        with self.__write_lock, self.__writer:
+            self.__writer.executemany("INSERT INTO seats VALUES (?, ?, ?, ?, ?)", rows)
+
+    def bulk_insert_passengers(self, passengers):
+        with self.__write_lock, self.__writer:
+            self.__writer.executemany(
+                "INSERT INTO passengers VALUES (?, ?, ?, ?, ?)",
+                ((row["passport_no"], row["name"], row["age"], row["phone"], row["address"])
+                 for row in (passenger.to_dict() for passenger in passengers)))
+
+    # Event persistence
+    def record(self, event: str, data: dict):
+        with self.__write_lock, self.__writer:
+            execute = self.__writer.execute
+            if event == "passenger_registered":
+                execute("INSERT OR REPLACE INTO passengers VALUES (?, ?, ?, ?, ?)",
+                        (data["passport_no"], data["name"], data["age"], data["phone"], data["address"]))
+            elif event == "flight_added":
+                execute("INSERT OR REPLACE INTO flights VALUES (?, ?, ?, ?, ?)",
+                        (data["flight_number"], data["origin"], data["destination"], data["departure_time"],
+                         data.get("arrival_time")))
+                self.__writer.executemany(
+                    "INSERT OR REPLACE INTO seats VALUES (?, ?, ?, ?, ?)",
+                    [(data["flight_number"], seat["seat_number"], seat["class_type"], seat["price"],
+                      int(seat["available"])) for seat in data["seats"]])
+            elif event == "seat_added":
+                execute("INSERT OR REPLACE INTO seats VALUES (?, ?, ?, ?, ?)",
+                        (data["flight_number"], data["seat_number"], data["class_type"], data["price"],
+                         int(data["available"])))
+            elif event == "seats_added":
+                self.__writer.executemany(
+                    "INSERT OR REPLACE INTO seats VALUES (?, ?, ?, ?, ?)",
+                    [(data["flight_number"], seat["seat_number"], seat["class_type"], seat["price"],
+                      int(seat["available"])) for seat in data["seats"]])
+            elif event == "seat_booked":
+                execute("INSERT INTO tickets (ticket_number, passport_no, flight_number, seat_number) "
+                        "VALUES (?, ?, ?, ?)",
+                        (data["ticket_number"], data["passport_no"], data["flight_number"], data["seat_number"]))
+                execute("UPDATE seats SET available = 0 WHERE flight_number = ? AND seat_number = ?",
+                        (data["flight_number"], data["seat_number"]))
+                execute("INSERT INTO meta VALUES ('next_ticket_number', ?) ON CONFLICT(key) "
+                        "DO UPDATE SET value = max(value, excluded.value)", (data["ticket_number"] + 1,))
+            elif event == "ticket_cancelled":
+                row = execute("SELECT flight_number, seat_number FROM tickets WHERE ticket_number = ?",
+                              (data["ticket_number"],)).fetchone()
+                if row is not None:
+                    execute("UPDATE seats SET available = 1 WHERE flight_number = ? AND seat_number = ?", row)
+                    execute("DELETE FROM tickets WHERE ticket_number = ?", (data["ticket_number"],))
+                    execute("DELETE FROM payments WHERE ticket_number = ?", (data["ticket_number"],))
+            elif event == "payment_completed":
+                execute("INSERT OR REPLACE INTO payments VALUES (?, ?, ?)",
+                        (data["ticket_number"], data["amount"], data["card_last4"]))
+                execute("UPDATE tickets SET payment_status = 1 WHERE ticket_number = ?", (data["ticket_number"],))
+            elif event == "baggage_added":
+                execute("INSERT INTO baggage VALUES (?, ?, ?, ?)",
+                        (data["baggage_id"], data["weight"], data["status"], data["ticket_number"]))
+                if data["ticket_number"] is not None:
+                    execute("UPDATE tickets SET baggage_id = ? WHERE ticket_number = ?",
+                            (data["baggage_id"], data["ticket_number"]))
+            elif event == "waitlist_joined":
+                execute("INSERT OR REPLACE INTO waitlist VALUES (?, ?, ?, ?, ?)",
+                        (data["flight_number"], data["passport_no"], data["class_type"], data["tier"],
+                         data["sequence"]))
+            elif event == "waitlist_left":
+                execute("DELETE FROM waitlist WHERE flight_number = ? AND passport_no = ?",
+                        (data["flight_number"], data["passport_no"]))
+            elif event == "baggage_status":
+                self.__writer.executemany("UPDATE baggage SET status = ? WHERE baggage_id = ?",
+                                          [(data["status"], baggage_id) for baggage_id in data["baggage_ids"]])
+
+    # Hydration
+    def iter_seats(self, flight_number: int):
+        # Read in one go: a flight's seats are all kept in memory once it is hydrated anyway
+        for seat_number, class_type, price, available in self._read(
+                "SELECT seat_number, class_type, price, available FROM seats WHERE flight_number = ?",
+                (flight_number,)):
+            seat = Seat(seat_number, class_type, price)
+            if not available:
+                seat.book_seat()
+            yield seat
+
+    def _seat_loader(self, flight_number: int):
+        return lambda: self.iter_seats(flight_number)
+
+    def seat_summary(self, flight_number: int) -> Dict[str, dict]:
+        # Same shape as SeatInventory.summary(), computed by SQLite without building any Seat
+        return {class_type: {"free": free, "total": total, "lowest_fare": lowest_fare}
+                for class_type, total, free, lowest_fare in self._read(
+                    "SELECT class_type, COUNT(*), SUM(available), MIN(CASE WHEN available THEN price END) "
+                    "FROM seats WHERE flight_number = ? GROUP BY class_type", (flight_number,))}
+
+    def _seat_summary(self, flight_number: int):
+        return lambda: self.seat_summary(flight_number)
+
+    def tickets_for_passport(self, passport_no: str) -> List[tuple]:
+        return self._read("SELECT ticket_number, flight_number, seat_number, payment_status FROM tickets "
+                          "WHERE passport_no = ?", (passport_no,))
+
+    def load_into(self, service: BookingService):
+        # Passengers and flight headers are loaded eagerly; seats stay in SQLite until needed
+        service.get_passenger_directory().register_many(
+            Passenger(name, age, phone, address, passport_no)
+            for passport_no, name, age, phone, address in self._iter_read("SELECT * FROM passengers"))
+        registry = service.get_flight_registry()
+        for flight_number, origin, destination, departure_time, arrival_time in self._iter_read(
+                "SELECT * FROM flights"):
+            registry.add(Flight(flight_number, origin, destination, departure_time, arrival_time,
+                                seat_loader=self._seat_loader(flight_number),
+                                seat_summary=self._seat_summary(flight_number)))
+        # Tickets reference Seat objects, so only flights with bookings get hydrated here. Hydrating
+        # reads the flight's seats, so events are applied from paged reads, never from an open cursor
+        for ticket_number, passport_no, flight_number, seat_number, _, _ in self._paged_read(
+                "tickets", "ticket_number"):
+            service.apply_event("seat_booked", {"ticket_number": ticket_number, "passport_no": passport_no,
+                                                "flight_number": flight_number, "seat_number": seat_number})
+        for ticket_number, amount, card_last4 in self._paged_read("payments", "ticket_number"):
+            service.apply_event("payment_completed", {"ticket_number": ticket_number, "amount": amount,
+                                                      "card_last4": card_last4})
+        for baggage_id, weight, status, ticket_number in self._paged_read("baggage", "baggage_id"):
+            service.apply_event("baggage_added", {"baggage_id": baggage_id, "weight": weight, "status": status,
+                                                  "ticket_number": ticket_number})
+        for flight_number, passport_no, class_type, tier, sequence in self._paged_read("waitlist", "sequence"):
+            service.apply_event("waitlist_joined", {"flight_number": flight_number, "passport_no": passport_no,
+                                                    "class_type": class_type, "tier": tier, "sequence": sequence})
+        for (value,) in self._read("SELECT value FROM meta WHERE key = 'next_ticket_number'"):
+            service.apply_event("ticket_counter", {"next_ticket_number": value})
+
+    def close(self):
+        self.__readers.close()
+        self.__writer.close()
+
+
+def open_sqlite_service(path: str, readers: int = 4):
+    # Returns (service, storage) with storage already recording new changes
+    service = BookingService()
+    storage = SQLiteStorage(path, readers)
+    storage.load_into(service)
+    storage.attach(service)
+    return service, storage
+
+
+# Seat Snapshot: memory-mapped fixed-width seat records for instant cold start
+class MappedSeat(Seat):
+    """
+    A Seat whose fields live in a SeatSnapshot record: getters read the mapped bytes in place
+    and booking or releasing the seat writes its availability byte directly.
+    """
+
+    __slots__ = ("__buffer", "__offset")
+
+    def __init__(self, buffer, offset: int):
+        self.__buffer = buffer
+        self.__offset = offset
+        self._attach(None, -1)
+
+    def get_seat_number(self):
+        return SeatSnapshot.U32.unpack_from(self.__buffer, self.__offset + 4)[0]
+
+    def get_class_type(self):
+        return CLASS_TYPES[self.__buffer[self.__offset + 16]]
+
+    def get_price(self):
+        return SeatSnapshot.F64.unpack_from(self.__buffer, self.__offset + 8)[0]
+
+    def is_available(self):
+        return self.__buffer[self.__offset + 17] == 1
+
+    def _store_available(self, available: bool):
+        self.__buffer[self.__offset + 17] = 1 if available else 0
+
+    def to_dict(self) -> dict:
+        return {"seat_number": self.get_seat_number(), "class_type": self.get_class_type(),
+                "price": self.get_price(), "available": self.is_available()}
+
+    def __str__(self):
+        status = "Available" if self.is_available() else "Booked"
+        return f"Seat {self.get_seat_number()} ({self.get_class_type()}, ${self.get_price()}) - {status}"
+
+
+class SeatSnapshot:
+    """
+    Binary seat inventory: a header, the flight schedule as JSON, then one fixed-width record per
+    seat (flight number, seat number, price, class index, availability), grouped by flight.
+    Opening it maps the file and reads only the schedule; a flight's seats become MappedSeat views
+    over their records the first time the flight's inventory is used, and booking changes go
+    straight to the mapped availability bytes. The default copy-on-write mapping keeps those
+    changes private to the process: tickets are not stored here, so writing availability back
+    (mmap.ACCESS_WRITE) is only for tools that own the file, never for a live booking service.
+    """
 
-                payment = ticket.create_payment(amount, card_number)
-                payment.make_payment()
+    MAGIC = b"AIRSEAT1"
+    HEADER = struct.Struct("<8sIII")         # magic, flights, seats, schedule length
+    RECORD = struct.Struct("<IIdBB2x")       # flight number, seat number, price, class index, available
+    U32 = struct.Struct("<I")
+    F64 = struct.Struct("<d")
+
+    def __init__(self, path: str, access: int = mmap.ACCESS_COPY):
+        # ACCESS_COPY: seats can be booked, the file never changes; ACCESS_READ: views only
+        self.__writable = access == mmap.ACCESS_WRITE
+        self.__file = open(path, "r+b" if self.__writable else "rb")
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=access)
+        magic, flights, seats, length = self.HEADER.unpack_from(self.__map, 0)
+        if magic != self.MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a seat snapshot.")
+        self.__schedule = json.loads(self.__map[self.HEADER.size:self.HEADER.size + length])
+        self.__records = self._records_offset(length)
+        self.__seat_count = seats
+
+    @classmethod
+    def _records_offset(cls, schedule_length: int) -> int:
+        return -(-(cls.HEADER.size + schedule_length) // 8) * 8
+
+    @classmethod
+    def write(cls, path: str, flights) -> int:
+        # Streams each flight's seats into a new snapshot (replaced atomically); returns the seat count
+        flights = list(flights)
+        schedule = []
+        first = 0
+        for flight in flights:
+            # Per-class counts go in the schedule so unloaded flights can be listed and aggregated
+            classes: Dict[str, dict] = {}
+            for seat in flight.iter_seats():
+                entry = classes.setdefault(seat.get_class_type(), {"free": 0, "total": 0, "lowest_fare": None})
+                entry["total"] += 1
+                if seat.is_available():
+                    entry["free"] += 1
+                    if entry["lowest_fare"] is None or seat.get_price() < entry["lowest_fare"]:
+                        entry["lowest_fare"] = seat.get_price()
+            count = sum(entry["total"] for entry in classes.values())
+            schedule.append({"flight_number": flight.get_flights(), "origin": flight.get_origin(),
+                             "destination": flight.get_destination(), "departure_time": flight.get_departure_time(),
+                             "arrival_time": flight.get_arrival_time(), "first": first, "count": count,
+                             "classes": classes})
+            first += count
+        header = json.dumps(schedule).encode("utf-8")
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as out:
+            out.write(cls.HEADER.pack(cls.MAGIC, len(flights), first, len(header)))
+            out.write(header)
+            out.write(b"\0" * (cls._records_offset(len(header)) - cls.HEADER.size - len(header)))
+            pack = cls.RECORD.pack
+            for flight in flights:
+                number = flight.get_flights()
+                out.write(b"".join(pack(number, seat.get_seat_number(), seat.get_price(),
+                                        CLASS_TYPES.index(seat.get_class_type()), seat.is_available())
+                                   for seat in flight.iter_seats()))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temporary, path)
+        return first
+
+    def get_schedule(self) -> List[dict]:
+        return self.__schedule
+
+    def get_seat_count(self) -> int:
+        return self.__seat_count
+
+    def iter_seats(self, first: int, count: int):
+        start = self.__records + first * self.RECORD.size
+        for offset in range(start, start + count * self.RECORD.size, self.RECORD.size):
+            yield MappedSeat(self.__map, offset)
+
+    def _seat_loader(self, first: int, count: int):
+        return lambda: self.iter_seats(first, count)
+
+    def load_into(self, service: BookingService):
+        # Flight headers only; no seat is touched until its flight is
+        registry = service.get_flight_registry()
+        for entry in self.__schedule:
+            classes = entry.get("classes")
+            registry.add(Flight(entry["flight_number"], entry["origin"], entry["destination"],
+                                entry["departure_time"], entry["arrival_time"],
+                                seat_loader=self._seat_loader(entry["first"], entry["count"]),
+                                seat_summary=None if classes is None else (lambda classes=classes: classes)))
+
+    def flush(self):
+        self.__map.flush()
+
+    def close(self):
+        # Seat views made from this snapshot must not be used afterwards
+        if not self.__map.closed:
+            if self.__writable:
+                self.__map.flush()
+            self.__map.close()
+        self.__file.close()
+
+
+def open_snapshot_service(path: str):
+    # Returns (service, snapshot); bookings change a private copy of the mapped pages, never the file
+    service = BookingService()
+    snapshot = SeatSnapshot(path)
+    snapshot.load_into(service)
+    return service, snapshot
+
+
+# Schedule Import: streaming CSV / JSON-lines loader for flights and seat maps
+SCHEDULE_FIELDS = ("flight_number", "origin", "destination", "departure_time", "arrival_time",
+                   "seat_number", "class_type", "price")
+
+
+def read_schedule_rows(path: str, fmt: Optional[str] = None):
+    """
+    Yields (line number, row dict) from a CSV file with a header row or a JSON-lines file.
+    Each row describes one seat (seat_number, class_type, price) on a flight; a row with
+    no seat fields only declares the flight. arrival_time is optional.
+    """
+    if fmt is None:
+        fmt = "csv" if path.lower().endswith(".csv") else "jsonl"
+    with open(path, newline="", encoding="utf-8") as source:
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(source), start=2):
+                yield line_no, row
         else:
-            print(f"❌ Ticket {ticket_number} not found or does not belong to you.")
+            for line_no, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = {"_error": "Malformed JSON."}
+                yield line_no, row if isinstance(row, dict) else {"_error": "Row is not an object."}
 
-    def get_valid_input(self, prompt, expected_type):
-        while True:
+
+class ImportReport:
+    def __init__(self, max_samples: int = 100):
+        self.rows = 0
+        self.flights_added = 0
+        self.seats_added = 0
+        self.rejected = 0
+        self.rejected_samples: List[tuple] = []  # First (line, reason) pairs, bounded by max_samples
+        self.seconds = 0.0
+        self.__max_samples = max_samples
+
+    def reject(self, line_no: int, reason: str):
+        self.rejected += 1
+        if len(self.rejected_samples) < self.__max_samples:
+            self.rejected_samples.append((line_no, reason))
+
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.rows} rows in {self.seconds:.2f}s ({self.rows_per_sec():,.0f} rows/sec): "
+                f"{self.flights_added} flights and {self.seats_added} seats added, {self.rejected} rows rejected")
+
+
+class ScheduleImporter:
+    """
+    Streams rows through parse -> validate -> batch -> apply. Memory stays bounded by the
+    batch size. Rows use the menu rules: alphabetic origin/destination, Economy/Business,
+    a flight number may only be reused with identical details, and seat numbers are unique per flight.
+    """
+
+    def __init__(self, service: BookingService, batch_size: int = 5000, reject_sink=None):
+        self.__service = service
+        self.__batch_size = batch_size
+        self.__reject_sink = reject_sink  # Optional callable(line_no, row, reason)
+        self.__pending_flights: Dict[int, Flight] = {}
+        self.__pending_seats: Dict[int, Dict[int, Seat]] = {}
+        self.__report = None
+
+    def import_file(self, path: str, fmt: Optional[str] = None) -> ImportReport:
+        return self.import_rows(read_schedule_rows(path, fmt))
+
+    def import_rows(self, rows) -> ImportReport:
+        self.__report = report = ImportReport()
+        start = time.perf_counter()
+        pending = 0
+        for _ in self._validated(rows):
+            pending += 1
+            if pending >= self.__batch_size:
+                self._apply()
+                pending = 0
+        self._apply()
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def _reject(self, line_no: int, row: dict, reason: str):
+        self.__report.reject(line_no, reason)
+        if self.__reject_sink is not None:
+            self.__reject_sink(line_no, row, reason)
+
+    def _validated(self, rows):
+        # Yields once per accepted row; accepted seats/flights are staged for the next _apply()
+        registry = self.__service.get_flight_registry()
+        for line_no, row in rows:
+            self.__report.rows += 1
+            if "_error" in row:
+                self._reject(line_no, row, row["_error"])
+                continue
             try:
-                value = input(prompt)
-                converted = expected_type(value)
-                if expected_type == int and prompt.lower().startswith("enter age") and converted < 18:
-                    print("You must be 18 or older to register.")
-                    continue
-                return converted
-            except ValueError:
-                print(f"Invalid input! Please enter a valid {expected_type.__name__}.")
+                flight_number = int(row["flight_number"])
+                origin = str(row["origin"]).strip()
+                destination = str(row["destination"]).strip()
+                departure_time = str(row["departure_time"]).strip()
+                arrival_time = str(row.get("arrival_time") or "").strip() or None
+            except (KeyError, TypeError, ValueError):
+                self._reject(line_no, row, "Missing or invalid flight fields.")
+                continue
+            if not is_valid_place(origin) or not is_valid_place(destination):
+                self._reject(line_no, row, "Origin and destination must be alphabetic.")
+                continue
 
-    def register_passenger(self):
-        print("\nRegister Passenger")
-        name = input("Enter Name: ")
-        age = self.get_valid_input("Enter Age: ", int)
+            flight = self.__pending_flights.get(flight_number) or registry.get(flight_number)
+            new_flight = flight is None
+            if new_flight:
+                # Staged only once the whole row validates, so a rejected row adds nothing
+                flight = Flight(flight_number, origin, destination, departure_time, arrival_time)
+            elif (flight.get_origin(), flight.get_destination(), flight.get_departure_time(),
+                  flight.get_arrival_time()) != (origin, destination, departure_time, arrival_time):
+                self._reject(line_no, row, f"Flight {flight_number} already exists with different details.")
+                continue
 
-        while True:
-            phone = input("Enter Phone Number: ")
-            if phone.isdigit():
-                break
-            else:
-                print("Invalid phone number! Please enter digits only.")
+            if row.get("seat_number") in (None, ""):
+                if new_flight:
+                    self.__pending_flights[flight_number] = flight
+                yield
+                continue
+            try:
+                seat_number = int(row["seat_number"])
+                price = float(row["price"])
+            except (KeyError, TypeError, ValueError):
+                self._reject(line_no, row, "Missing or invalid seat number or price.")
+                continue
+            class_type = normalize_class_type(row.get("class_type", ""))
+            if class_type is None:
+                self._reject(line_no, row, "Invalid class type. Expected 'Economy' or 'Business'.")
+                continue
+            if price < 0:
+                self._reject(line_no, row, "Price must not be negative.")
+                continue
+            staged = self.__pending_seats.get(flight_number, {})
+            if seat_number in staged or (flight_number not in self.__pending_flights
+                                         and seat_number in flight.get_inventory()):
+                self._reject(line_no, row, f"Seat number {seat_number} already exists on flight {flight_number}.")
+                continue
+            if new_flight:
+                self.__pending_flights[flight_number] = flight
+            self.__pending_seats.setdefault(flight_number, {})[seat_number] = Seat(seat_number, class_type, price)
+            yield
 
-        address = input("Enter Address: ")
-        while True:
-            passport_no = input("Enter passport Number: ")
-            if passport_no.isdigit():
-                break
-            else:
-                print("Invalid passport number! Please enter digits only.")
-                
-        passenger = Passenger(name, age, phone, address, passport_no)
-        self.__passengers.append(passenger)
-        print(f"Passenger {name} registered successfully!")
-        self.__current_passenger = passenger
+    def _apply(self):
+        service = self.__service
+        report = self.__report
+        for flight_number, flight in self.__pending_flights.items():
+            # New flights carry their staged seats, so they are announced as a single event
+            for seat in self.__pending_seats.pop(flight_number, {}).values():
+                flight.add_seat(seat)
+                report.seats_added += 1
+            if service.add_flight(flight):
+                report.flights_added += 1
+        for flight_number, seats in self.__pending_seats.items():
+            report.seats_added += len(service.add_seats(flight_number, list(seats.values())).value or ())
+        self.__pending_flights = {}
+        self.__pending_seats = {}
 
-    def login_passenger(self):
-        print("\nLogin Passenger")
-        passport_no = input("Enter Your Passport No to Login: ")
-        for passenger in self.__passengers:
-            if passenger.get_passport_no() == passport_no:
-                self.__current_passenger = passenger
-                print(f"Welcome, {passenger.get_name()}!")
-                return
-        print("Passenger not found! Please register.")
 
-    def view_passenger_details(self):
-        if self.__current_passenger:
-            self.__current_passenger.view_details()
-        else:
-            print("Please login to view your details.")
+# Benchmarks
+def _dict_layout(cls):
+    # Rebuilds cls's attribute layout on a plain class with a per-instance __dict__,
+    # i.e. what every domain object looked like before __slots__
+    fields = [name for name in cls.__slots__]
 
-    def view_flights(self):
-        if not self.__flights:
-            print("No flights available.")
-            return
-        for flight in self.__flights:
-            flight.display_details()
+    def __init__(self, *values):
+        for name, value in zip(fields, values):
+            setattr(self, name, value)
 
-    def view_tickets(self):
-        if not self.__current_passenger:
-            print("Please login to view your tickets.")
-            return
-        tickets_found = False
-        for ticket in self.__tickets:
-            if ticket._Ticket__passenger == self.__current_passenger:
-                ticket.view_ticket()
-                tickets_found = True
-        if not tickets_found:
-            print("You have no tickets booked.")
+    return type(cls.__name__ + "Dict", (), {"__init__": __init__})
 
-    def manage_baggage(self):
-        print("\nManage Baggage")
-        baggage_id = self.get_valid_input("Enter Baggage ID: ", int)
-        weight = self.get_valid_input("Enter Baggage Weight (in kg): ", float)
-        baggage = Baggage(baggage_id, weight)
-        baggage.check_weight(allowed_weight=23)
-        baggage.display_details()
-        self.__baggage.append(baggage)
 
-    def view_airline_details(self):
-        airline = Airline("EgyptAir", "Egypt", 67, "MS")
-        airline.display_details()
+def _bytes_per_object(factory, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    # Exclude the list holding the objects
+    used -= sys.getsizeof(objects)
+    del objects
+    return used / count
 
 
-if __name__ == "__main__":
-    system = AirlineManagementSystem()
+def run_memory_benchmark(count: int = 100000):
+    passenger = Passenger("Benchmark", 30, "0100000000", "Cairo", "1")
+    flight = Flight(1, "Cairo", "London", "2am")
+    seat = Seat(1, "Economy", 500)
+    ticket = Ticket(1, passenger, flight, seat)
+    card_number = "4444333322221111"
+    cases = {
+        "Seat": (Seat, lambda i: (i, "Economy", 500.0, True, None, -1)),
+        "Passenger": (Passenger, lambda i: ("Benchmark", 30, "0100000000", "Cairo", "1")),
+        "Ticket": (Ticket, lambda i: (i, passenger, flight, seat, None, False, None)),
+        "Baggage": (Baggage, lambda i: (i, 20.0, "in transit")),
+        "Payment": (Payment, lambda i: (ticket, 500.0, False, card_number)),
+    }
+    slotted = {
+        "Seat": lambda i: Seat(i, "Economy", 500),
+        "Passenger": lambda i: Passenger("Benchmark", 30, "0100000000", "Cairo", "1"),
+        "Ticket": lambda i: Ticket(i, passenger, flight, seat),
+        "Baggage": lambda i: Baggage(i, 20.0),
+        "Payment": lambda i: Payment(ticket, 500, card_number),
+    }
+    print(f"Memory per object over {count} instances (tracemalloc):")
+    print(f"{'Class':<10} {'before (__dict__)':>18} {'after (__slots__)':>18} {'saved':>8}")
+    for name, (cls, values) in cases.items():
+        legacy = _dict_layout(cls)
+        before = _bytes_per_object(lambda i: legacy(*values(i)), count)
+        after = _bytes_per_object(slotted[name], count)
+        print(f"{name:<10} {before:>16.1f} B {after:>16.1f} B {1 - after / before:>7.0%}")
+
+
+def build_synthetic_service(flights: int, seats_per_flight: int, passengers: int,
+                            shard: Optional[tuple] = None) -> BookingService:
+    # Flights are numbered from 1; every fifth seat is Business. shard=(index, count) builds only that partition
+    service = BookingService() if shard is None else BookingService(first_ticket_number=shard[0] + 1,
+                                                                    ticket_step=shard[1])
+    places = ["Cairo", "London", "Paris", "Dubai", "Jeddah", "Rome", "Madrid", "Berlin"]
+    for number in range(1, flights + 1):
+        if shard is not None and number % shard[1] != shard[0]:
+            continue
+        origin = places[number % len(places)]
+        destination = places[(number * 3 + 1) % len(places)]
+        flight = Flight(number, origin, destination, f"{number % 12 + 1}:00am")
+        for seat_number in range(1, seats_per_flight + 1):
+            class_type = "Business" if seat_number % 5 == 0 else "Economy"
+            flight.add_seat(Seat(seat_number, class_type, 1000 if class_type == "Business" else 400))
+        service.add_flight(flight)
+    service.get_passenger_directory().register_many(
+        Passenger(f"Passenger {i}", 30, "0100000000", "Cairo", str(100000 + i)) for i in range(passengers))
+    return service
+
 
+def run_booking_stress_test(thread_counts=(1, 2, 4, 8), bookings: int = 40000, flights: int = 50,
+                            seats_per_flight: int = 300, seed: int = 1) -> bool:
+    # Random (flight, seat) requests; by default there are more bookings than seats, so many collide
+    rng = random.Random(seed)
+    requests = [(rng.randint(1, flights), rng.randint(1, seats_per_flight)) for _ in range(bookings)]
+    passed = True
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Force frequent thread switches to expose races
+    try:
+        print(f"{'threads':>7} {'bookings/sec':>13} {'booked':>8} {'rejected':>9}  result")
+        for threads in thread_counts:
+            service = build_synthetic_service(flights, seats_per_flight, passengers=threads)
+            passengers = service.get_passenger_directory().get_passengers()
+
+            def book(index):
+                flight_number, seat_number = requests[index]
+                return service.book_seat(passengers[index % threads], flight_number, seat_number).ok
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                booked = sum(pool.map(book, range(bookings), chunksize=256))
+            elapsed = time.perf_counter() - start
+
+            # Every booked seat must belong to exactly one ticket, and vice versa
+            seen = set()
+            for ticket in service.get_ticket_store():
+                key = (ticket.get_flight().get_flights(), ticket.get_seat().get_seat_number())
+                if key in seen:
+                    passed = False
+                seen.add(key)
+            occupied = sum(len(flight.get_inventory()) - flight.get_inventory().count_free()
+                           for flight in service.get_flight_registry())
+            ok = len(seen) == booked == occupied == len(set(requests))
+            passed = passed and ok
+            print(f"{threads:>7} {bookings / elapsed:>13,.0f} {booked:>8} {bookings - booked:>9}  "
+                  f"{'OK' if ok else 'DOUBLE BOOKING'}")
+    finally:
+        sys.setswitchinterval(switch_interval)
+    return passed
+
+
+def load_demo_flights(service: BookingService):
     # Initialize some sample flights and seats
     flight1 = Flight(452, "Cairo", "New York", "2am")
     flight1.add_seat(Seat(14, "Economy", 1000))
@@ -729,10 +5242,733 @@ if __name__ == "__main__":
     flight5.add_seat(Seat(25, "Economy", 350))
     flight5.add_seat(Seat(5, "Business", 800))
     
-    system._AirlineManagementSystem__flights.append(flight1)
-    system._AirlineManagementSystem__flights.append(flight2)
-    system._AirlineManagementSystem__flights.append(flight3)
-    system._AirlineManagementSystem__flights.append(flight4)
-    system._AirlineManagementSystem__flights.append(flight5)
+    for flight in (flight1, flight2, flight3, flight4, flight5):
+        service.add_flight(flight)
+
+
+def run_wal_benchmark(bookings: int = 50000, group_sizes=(1, 64, 512), fsync_batches=(1, 0),
+                      flights: int = 200, seats_per_flight: int = 300):
+    print(f"{'group':>6} {'fsync every':>11} {'writes/sec':>12} {'snapshot load':>14} {'tail replay':>12}")
+    for group in group_sizes:
+        for fsync_every in fsync_batches:
+            directory = tempfile.mkdtemp(prefix="airline-wal-")
+            try:
+                service = build_synthetic_service(flights, seats_per_flight, passengers=1000)
+                passengers = service.get_passenger_directory().get_passengers()
+                journal = StateJournal(directory, group_commit_size=group, fsync_batches=fsync_every,
+                                       flush_interval=0)
+                journal.attach(service)
+                journal.snapshot()  # Base schedule goes into the snapshot; bookings form the log tail
+                start = time.perf_counter()
+                for i in range(bookings):
+                    service.book_seat(passengers[i % len(passengers)], i % flights + 1)
+                journal.close()
+                write_rate = bookings / (time.perf_counter() - start)
+
+                stats = StateJournal(directory).recover(BookingService())
+                print(f"{group:>6} {fsync_every or 'never':>11} {write_rate:>12,.0f} "
+                      f"{stats['snapshot_seconds']:>13.3f}s {stats['replay_seconds']:>11.3f}s "
+                      f"({stats['replayed']} records)")
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_search_benchmark(flights: int = 100000, airports: int = 300, queries: int = 500,
+                         max_connections: int = 2, seed: int = 7):
+    rng = random.Random(seed)
+    names = ["".join(letters) for letters in itertools.product("ABCDEFGHIJKLMNOPQRSTUVWXYZ", repeat=3)][:airports]
+    day = dt.datetime(2026, 1, 1)
+    service = BookingService()
+    start = time.perf_counter()
+    for number in range(1, flights + 1):
+        origin, destination = rng.sample(names, 2)
+        departure = day + dt.timedelta(minutes=rng.randrange(3 * 24 * 60))
+        arrival = departure + dt.timedelta(minutes=rng.randrange(60, 8 * 60))
+        flight = Flight(number, origin, destination, departure.isoformat(" "), arrival.isoformat(" "))
+        flight.add_seat(Seat(1, "Economy", rng.randrange(100, 600)))
+        flight.add_seat(Seat(2, "Business", rng.randrange(800, 3000)))
+        service.add_flight(flight)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    engine = RouteSearchEngine(service)
+    index = time.perf_counter() - start
+
+    latencies = []
+    found = 0
+    for _ in range(queries):
+        origin, destination = rng.sample(names, 2)
+        start = time.perf_counter()
+        found += bool(engine.search(origin, destination, day, max_connections))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"{flights} flights / {airports} airports: built in {build:.2f}s, indexed in {index:.2f}s")
+    print(f"{queries} searches (≤{max_connections} connections): p50 {percentile(latencies, 50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms, {found} with results")
+
+
+def run_cache_benchmark(flights: int = 2000, seats_per_flight: int = 300, operations: int = 200000,
+                        booking_ratio: float = 0.02, cache_size: int = 4096, ttl: float = 30.0, seed: int = 1):
+    places = ["Cairo", "London", "Paris", "Dubai", "Jeddah", "Rome", "Madrid", "Berlin"]
+    rng = random.Random(seed)
+    # Browsing is skewed towards a few hot flights, the way real search traffic is
+    hot = [rng.randint(1, flights) for _ in range(max(flights // 20, 1))]
+    plan = []
+    for _ in range(operations):
+        number = rng.choice(hot) if rng.random() < 0.8 else rng.randint(1, flights)
+        roll = rng.random()
+        if roll < booking_ratio:
+            plan.append(("book", number, None))
+        elif roll < 0.5:
+            plan.append(("seats", number, rng.choice((None, "Economy", "Business"))))
+        elif roll < 0.8:
+            plan.append(("fares", rng.choice(places), rng.choice(places)))
+        else:
+            plan.append(("seat_map", number, None))
+
+    print(f"{'cache':>6} {'ops/sec':>10}  stats")
+    answers = {}
+    for cached in (False, True):
+        service = build_synthetic_service(flights, seats_per_flight, passengers=1)
+        passenger = service.login("100000").value
+        cache = QueryCache(cache_size, ttl) if cached else None
+        service.set_cache(cache)
+        registry = service.get_flight_registry()
+        start = time.perf_counter()
+        for op, first, second in plan:
+            if op == "book":
+                service.book_seat(passenger, first)
+            elif op == "seats":
+                service.available_seats(first, second)
+            elif op == "fares":
+                service.route_fares(first, second)
+            elif cache is not None:
+                cache.seat_map(registry.get(first))
+            else:
+                tuple(str(seat) for seat in registry.get(first).get_seats())
+        elapsed = time.perf_counter() - start
+        # Both runs must see identical availability afterwards
+        answers[cached] = [service.route_fares(origin, destination) for origin in places for destination in places]
+        stats = cache.get_stats() if cache is not None else {}
+        print(f"{'on' if cached else 'off':>6} {operations / elapsed:>10.0f}  "
+              + ", ".join(f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+                          for key, value in stats.items()))
+    print("results match" if answers[False] == answers[True] else "❌ cached results differ")
+    return answers[False] == answers[True]
+
+
+def run_hold_benchmark(holds: int = 1000000, bookings: int = 50000, seed: int = 1) -> bool:
+    # Scheduler alone, on a simulated clock: staggered holds, half of them paid in time
+    rng = random.Random(seed)
+    scheduler = SeatHoldScheduler(ttl=900.0, clock=lambda: 0.0)
+    start = time.perf_counter()
+    for ticket_number in range(holds):
+        scheduler.hold(ticket_number, now=ticket_number * 0.001)
+    hold_seconds = time.perf_counter() - start
+    paid = rng.sample(range(holds), holds // 2)
+    start = time.perf_counter()
+    for ticket_number in paid:
+        scheduler.confirm(ticket_number)
+    confirm_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expired = 0
+    for step in range(1, 101):
+        expired += len(scheduler.pop_expired(900.0 + holds * 0.001 * step / 100))
+    expire_seconds = time.perf_counter() - start
+    print(f"{holds} holds: hold {hold_seconds / holds * 1e6:.2f} µs, confirm {confirm_seconds / len(paid) * 1e6:.2f} µs, "
+          f"expire {expire_seconds / max(expired, 1) * 1e6:.2f} µs per ticket ({expired} expired)")
+
+    # End to end: unpaid bookings are released through the cancel path
+    flights = max(-(-bookings // 300), 1)
+    service = build_synthetic_service(flights, 300, passengers=1)
+    passenger = service.login("100000").value
+    clock = [0.0]
+    service.set_hold_scheduler(SeatHoldScheduler(ttl=60.0, clock=lambda: clock[0]))
+    tickets = [service.book_seat(passenger, number % flights + 1).value for number in range(bookings)]
+    for ticket in tickets[::2]:
+        service.pay_for_ticket(ticket.get_ticket_number(), "4111111111111111")
+    clock[0] = 61.0
+    start = time.perf_counter()
+    released = service.release_expired_holds()
+    elapsed = time.perf_counter() - start
+    free = sum(service.get_flight(number).get_inventory().count_free() for number in range(1, flights + 1))
+    ok = len(released) == bookings - len(tickets[::2]) and free == flights * 300 - len(tickets[::2])
+    print(f"{bookings} bookings, {len(released)} expired holds released in {elapsed:.3f}s "
+          f"({len(released) / elapsed if elapsed else 0:.0f}/sec): {'✅ inventory consistent' if ok else '❌ mismatch'}")
+    return ok
+
+
+def run_settlement_benchmark(payments: int = 20000, batch_sizes=(1, 16, 64), workers: int = 8,
+                             latency: float = 0.005, failure_rate: float = 0.05, decline_rate: float = 0.01,
+                             seed: int = 1) -> bool:
+    # Every ticket is also submitted twice to exercise idempotency; no ticket may be charged twice
+    passed = True
+    print(f"{'batch':>5} {'settled/sec':>12} {'p50 ms':>8} {'p99 ms':>8} {'settled':>8} {'declined':>9} "
+          f"{'retries':>8}  result")
+    for batch_size in batch_sizes:
+        flights = max(-(-payments // 300), 1)
+        service = build_synthetic_service(flights, 300, passengers=1)
+        passenger = service.login("100000").value
+        tickets = [service.book_seat(passenger, number % flights + 1).value.get_ticket_number()
+                   for number in range(payments)]
+        gateway = StubGateway(latency, failure_rate, decline_rate, seed)
+        pipeline = SettlementPipeline(service, gateway, batch_size=batch_size, workers=workers)
+        start = time.perf_counter()
+        futures = [pipeline.submit(ticket_number, "4111111111111111") for ticket_number in tickets]
+        futures += [pipeline.submit(ticket_number, "4111111111111111") for ticket_number in tickets[::10]]
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        pipeline.close()
+        stats = pipeline.get_stats()
+        store = service.get_ticket_store()
+        paid = {ticket_number for ticket_number in tickets if store.get(ticket_number).get_payment_status()}
+        charged = {int(key.split("-")[1]) for key in gateway.get_charged()}
+        ok = paid == charged and stats["settled"] == len(paid) and all(result is not None for result in results)
+        passed = passed and ok
+        print(f"{batch_size:>5} {stats['settled'] / elapsed:>12.0f} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+              f"{stats['settled']:>8} {stats['declined']:>9} {stats['retries']:>8}  "
+              f"{'✅ no double charges' if ok else '❌ charges and tickets disagree'}")
+    return passed
+
+
+def run_shard_benchmark(shard_counts=(1, 2, 4), bookings: int = 100000, flights: int = 400,
+                        seats_per_flight: int = 300, batch_size: int = 2000, seed: int = 1) -> bool:
+    # Bookings on random flights sent through the router in batches; every seat may be sold once only
+    rng = random.Random(seed)
+    requests = [{"op": "book", "passport_no": str(100000 + index % 1000), "flight_number": rng.randint(1, flights)}
+                for index in range(bookings)]
+    passed = True
+    print(f"{'shards':>6} {'bookings/sec':>13} {'booked':>8} {'rejected':>9}  result")
+    for shards in shard_counts:
+        router = ShardRouter(shards, synthetic=(flights, seats_per_flight, 1000))
+        try:
+            router.execute([{"op": "seats", "flight_number": 1}])  # Wait until the shards are up
+            start = time.perf_counter()
+            results = []
+            for offset in range(0, bookings, batch_size):
+                results.extend(router.execute(requests[offset:offset + batch_size]))
+            elapsed = time.perf_counter() - start
+            tickets = [result["value"]["ticket_number"] for result in results if result["ok"]]
+            seats = {(result["value"]["flight_number"], result["value"]["seat_number"])
+                     for result in results if result["ok"]}
+            ok = len(set(tickets)) == len(tickets) == len(seats) <= flights * seats_per_flight
+        finally:
+            router.close()
+        passed = passed and ok
+        print(f"{shards:>6} {bookings / elapsed:>13.0f} {len(tickets):>8} {bookings - len(tickets):>9}  "
+              f"{'✅ no double bookings' if ok else '❌ duplicate tickets or seats'}")
+    return passed
+
+
+def run_coldstart_benchmark(flights: int = 2000, seats_per_flight: int = 300) -> bool:
+    # Building every Flight and Seat object versus mapping a seat snapshot of the same schedule
+    start = time.perf_counter()
+    service = build_synthetic_service(flights, seats_per_flight, passengers=0)
+    construct = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "seats.bin")
+        start = time.perf_counter()
+        seats = SeatSnapshot.write(path, service.get_flight_registry())
+        write = time.perf_counter() - start
+        del service
+        start = time.perf_counter()
+        service, snapshot = open_snapshot_service(path)
+        cold_start = time.perf_counter() - start
+        start = time.perf_counter()
+        service.set_aggregates(RevenueAggregates())  # As the first revenue report does
+        seed = time.perf_counter() - start
+        hydrated = sum(1 for flight in service.get_flight_registry() if flight.is_loaded())
+        service.register_passenger("Benchmark", 30, "0100000000", "Cairo", "100000")
+        passenger = service.login("100000").value
+        start = time.perf_counter()
+        booked = service.book_seat(passenger, flights, seats_per_flight).value
+        first_booking = time.perf_counter() - start
+        start = time.perf_counter()
+        for flight in service.get_flight_registry():
+            flight.get_inventory()
+        hydrate = time.perf_counter() - start
+        snapshot.close()
+        reopened = SeatSnapshot(path, mmap.ACCESS_READ)
+        entry = reopened.get_schedule()[-1]
+        on_disk = [seat for seat in reopened.iter_seats(entry["first"], entry["count"])
+                   if seat.get_seat_number() == seats_per_flight]
+        # The booking lived in the private copy only; the file still has the seat free
+        ok = booked is not None and len(on_disk) == 1 and on_disk[0].is_available() and not hydrated
+        del on_disk
+        reopened.close()
+        size = os.path.getsize(path)
+    print(f"{flights} flights x {seats_per_flight} seats = {seats} seats, snapshot {size / 2 ** 20:.1f} MiB "
+          f"(written in {write:.2f}s)")
+    print(f"{'start-up':<34} {'seconds':>9}")
+    print(f"{'construct Flight/Seat objects':<34} {construct:>9.3f}")
+    print(f"{'map snapshot':<34} {cold_start:>9.4f}")
+    print(f"{'  + revenue aggregates':<34} {seed:>9.4f}")
+    print(f"{'  + first booking (one flight)':<34} {first_booking:>9.4f}")
+    print(f"{'  + every flight touched':<34} {hydrate:>9.3f}")
+    print("✅ snapshot file unchanged by bookings, no flight loaded at start-up" if ok
+          else "❌ booking leaked into the snapshot file or start-up loaded seats")
+    return ok
+
+
+def build_benchmark_dataset(flights: int, seats_per_flight: int, passengers: int, tickets: int,
+                            seed: int = 1) -> BookingService:
+    # Synthetic service plus `tickets` bookings spread over passengers; every other one paid, every fourth with a bag
+    rng = random.Random(seed)
+    service = build_synthetic_service(flights, seats_per_flight, passengers)
+    directory = service.get_passenger_directory()
+    tickets = min(tickets, flights * seats_per_flight)
+    for index in range(tickets):
+        passenger = directory.get(str(100000 + rng.randrange(passengers)))
+        ticket = service.book_seat(passenger, index % flights + 1).value
+        if index % 2 == 0:
+            service.pay_for_ticket(ticket.get_ticket_number(), "4111111111111111")
+        if index % 4 == 0:
+            service.attach_baggage(ticket.get_ticket_number(), index, rng.uniform(5, 35))
+    return service
+
+
+def _time_operation(operation, arguments, repeat: int) -> dict:
+    # Best of `repeat` runs over the same argument list; setup is excluded
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for argument in arguments:
+            operation(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {"ops": len(arguments), "seconds": best, "ops_per_sec": len(arguments) / best if best else 0.0}
+
+
+def run_benchmark_suite(flights: int = 1000, seats_per_flight: int = 200, passengers: int = 50000,
+                        tickets: int = 100000, operations: int = 20000, repeat: int = 3,
+                        output: Optional[str] = None, baseline: Optional[str] = None,
+                        threshold: float = 0.2, seed: int = 1) -> bool:
+    """
+    Times the hot service operations on a synthetic dataset and reports ops/sec and memory.
+    Results are written as JSON to `output`; with a `baseline` results file, any operation more
+    than `threshold` slower (or memory more than `threshold` larger) counts as a regression.
+    """
+
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    service = build_benchmark_dataset(flights, seats_per_flight, passengers, tickets, seed)
+    build_seconds = time.perf_counter() - start
+    dataset_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    store = service.get_ticket_store()
+    directory = service.get_passenger_directory()
+    places = ["Cairo", "London", "Paris", "Dubai", "Jeddah", "Rome", "Madrid", "Berlin"]
+    flight_numbers = [rng.randint(1, flights) for _ in range(operations)]
+    passports = [str(100000 + rng.randrange(passengers)) for _ in range(operations)]
+    routes = [tuple(rng.sample(places, 2)) for _ in range(operations)]
+    holders = [directory.get(passport) for passport in passports]
+
+    results = {
+        "flight_lookup": _time_operation(service.get_flight, flight_numbers, repeat),
+        "route_search": _time_operation(lambda route: service.search_flights(*route), routes, repeat),
+        "login": _time_operation(service.login, passports, repeat),
+        "passenger_tickets": _time_operation(service.tickets_for, holders, repeat),
+    }
+
+    # Booking, payment and cancellation run as a cycle so each repeat starts from the same free seats
+    cycle = {"book_seat": [], "pay": [], "cancel_ticket": []}
+    for _ in range(repeat):
+        booked = []
+        start = time.perf_counter()
+        for passenger, flight_number in zip(holders, flight_numbers):
+            result = service.book_seat(passenger, flight_number)
+            if result:
+                booked.append(result.value.get_ticket_number())
+        cycle["book_seat"].append((len(flight_numbers), time.perf_counter() - start))
+        start = time.perf_counter()
+        for ticket_number in booked:
+            service.pay_for_ticket(ticket_number, "4111111111111111")
+        cycle["pay"].append((len(booked), time.perf_counter() - start))
+        start = time.perf_counter()
+        for ticket_number in booked:
+            service.cancel_ticket(ticket_number)
+        cycle["cancel_ticket"].append((len(booked), time.perf_counter() - start))
+    for name, runs in cycle.items():
+        ops, seconds = min(runs, key=lambda run: run[1] / max(run[0], 1))
+        results[name] = {"ops": ops, "seconds": seconds, "ops_per_sec": ops / seconds if seconds else 0.0}
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "platform": platform.platform(), "flights": flights, "seats_per_flight": seats_per_flight,
+                 "passengers": passengers, "tickets": len(store), "operations": operations, "repeat": repeat},
+        "memory": {"dataset_bytes": dataset_bytes, "build_seconds": build_seconds},
+        "results": results,
+    }
+    print(f"Dataset: {flights} flights x {seats_per_flight} seats, {passengers} passengers, {len(store)} tickets "
+          f"({dataset_bytes / 2 ** 20:.1f} MiB, built in {build_seconds:.2f}s)")
+    print(f"{'operation':<18} {'ops/sec':>12}")
+    for name, result in results.items():
+        print(f"{name:<18} {result['ops_per_sec']:>12.0f}")
+
+    passed = True
+    if baseline:
+        with open(baseline, encoding="utf-8") as handle:
+            previous = json.load(handle)
+        regressions = []
+        for name, result in results.items():
+            before = previous.get("results", {}).get(name)
+            if before and result["ops_per_sec"] < before["ops_per_sec"] * (1 - threshold):
+                regressions.append(f"{name}: {before['ops_per_sec']:.0f} -> {result['ops_per_sec']:.0f} ops/sec")
+        before_bytes = previous.get("memory", {}).get("dataset_bytes")
+        if before_bytes and dataset_bytes > before_bytes * (1 + threshold):
+            regressions.append(f"dataset memory: {before_bytes} -> {dataset_bytes} bytes")
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"❌ regression {regression}")
+        if not regressions:
+            print(f"✅ no regressions beyond {threshold:.0%} against {baseline}")
+        passed = not regressions
+    if output:
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return passed
+
+
+def start_instrumentation(service: BookingService, enabled: bool = False, port: Optional[int] = None,
+                          signals: bool = False, report_path: Optional[str] = None):
+    # Returns (metrics, endpoint or None); the profiler only ever runs when a signal starts it
+    metrics = Metrics(service)
+    profiler = SamplingProfiler()
+    if enabled:
+        metrics.enable()
+    if signals and not install_signal_handlers(metrics, profiler, report_path):
+        print("Profiling signals are not available on this platform.")
+    endpoint = MetricsEndpoint(metrics, port, profiler=profiler).start() if port is not None else None
+    return metrics, endpoint
+
+
+def run_metrics_benchmark(operations: int = 200000, seed: int = 1):
+    # Same login/lookup/booking mix with instrumentation never enabled, enabled, and enabled then disabled
+    rng = random.Random(seed)
+    service = build_synthetic_service(200, 300, passengers=1000)
+    metrics = Metrics(service)
+    passports = [str(100000 + rng.randrange(1000)) for _ in range(operations)]
+    flights = [rng.randint(1, 200) for _ in range(operations)]
+    passenger = service.login("100000").value
+
+    def run() -> float:
+        start = time.perf_counter()
+        for index, (passport, flight_number) in enumerate(zip(passports, flights)):
+            service.login(passport)
+            service.get_flight(flight_number)
+            if index % 10 == 0:
+                ticket = service.book_seat(passenger, flight_number).value
+                if ticket is not None:
+                    service.cancel_ticket(ticket.get_ticket_number())
+        return time.perf_counter() - start
+
+    baseline = min(run() for _ in range(3))
+    metrics.enable()
+    enabled = min(run() for _ in range(3))
+    metrics.disable()
+    disabled = min(run() for _ in range(3))
+    print(f"{'instrumentation':<16} {'seconds':>8} {'overhead':>9}")
+    for label, seconds in (("never enabled", baseline), ("enabled", enabled), ("disabled again", disabled)):
+        print(f"{label:<16} {seconds:>8.3f} {seconds / baseline - 1:>9.1%}")
+    metrics.enable()
+    run()
+    print(metrics.to_text())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Airline Management System")
+    storage_options = parser.add_mutually_exclusive_group()
+    storage_options.add_argument("--data-dir", help="persist state in this directory (write-ahead log + snapshots)")
+    storage_options.add_argument("--sqlite", help="persist state in this SQLite database")
+    storage_options.add_argument("--seat-snapshot",
+                                 help="map flights and seats from this binary snapshot (copy-on-write: "
+                                      "bookings are not saved to it)")
+    parser.add_argument("--cache-size", type=int, default=4096, help="availability/fare cache entries, 0 disables")
+    parser.add_argument("--cache-ttl", type=float, default=30.0, help="seconds before a cache entry is recomputed")
+    parser.add_argument("--hold-ttl", type=float, default=0.0,
+                        help="seconds an unpaid ticket keeps its seat before it is cancelled; "
+                             "0 (the default) keeps it forever")
+    parser.add_argument("--metrics", action="store_true", help="start with instrumentation enabled")
+    parser.add_argument("--metrics-port", type=int, help="serve /metrics, /metrics.json and /profile on localhost")
+    parser.add_argument("--profile-signals", action="store_true",
+                        help="SIGUSR1 toggles instrumentation, SIGUSR2 toggles the sampling profiler")
+    parser.add_argument("--profile-report", help="where SIGUSR2 writes its report (default: stderr)")
+    parser.add_argument("--record", help="record the interactive session's operations to this trace file")
+    commands = parser.add_subparsers(dest="command")
+    bench_memory = commands.add_parser("bench-memory", help="report bytes per domain object")
+    bench_memory.add_argument("--count", type=int, default=100000)
+    stress = commands.add_parser("stress-booking", help="concurrent booking stress test")
+    stress.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    stress.add_argument("--bookings", type=int, default=40000)
+    bench_wal = commands.add_parser("bench-wal", help="write-ahead log throughput and recovery time")
+    bench_wal.add_argument("--bookings", type=int, default=50000)
+    bench_wal.add_argument("--group-sizes", type=int, nargs="+", default=[1, 64, 512])
+    bench_wal.add_argument("--fsync-batches", type=int, nargs="+", default=[1, 0], help="0 disables fsync")
+    importer = commands.add_parser("import", help="bulk import a CSV or JSON-lines schedule")
+    importer.add_argument("path")
+    importer.add_argument("--format", choices=["csv", "jsonl"])
+    importer.add_argument("--batch-size", type=int, default=5000)
+    importer.add_argument("--rejects", help="write rejected rows to this JSON-lines file")
+    exporter = commands.add_parser("export", help="stream bookings to CSV or JSON lines")
+    exporter.add_argument("--out", default="-", help="output path, or - for stdout")
+    exporter.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    exporter.add_argument("--flight", type=int, help="only export this flight's manifest")
+    bench_search = commands.add_parser("bench-search", help="route search latency on a synthetic network")
+    bench_search.add_argument("--flights", type=int, default=100000)
+    bench_search.add_argument("--airports", type=int, default=300)
+    bench_search.add_argument("--queries", type=int, default=500)
+    bench_search.add_argument("--max-connections", type=int, default=2)
+    bench_holds = commands.add_parser("bench-holds", help="seat hold scheduling and expiry throughput")
+    bench_holds.add_argument("--holds", type=int, default=1000000)
+    bench_holds.add_argument("--bookings", type=int, default=50000)
+    bench_settle = commands.add_parser("bench-settlement", help="batched payment settlement against the stub gateway")
+    bench_settle.add_argument("--payments", type=int, default=20000)
+    bench_settle.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64])
+    bench_settle.add_argument("--workers", type=int, default=8)
+    bench_settle.add_argument("--latency", type=float, default=0.005, help="stub gateway seconds per batch")
+    bench_settle.add_argument("--failure-rate", type=float, default=0.05)
+    bench_settle.add_argument("--decline-rate", type=float, default=0.01)
+    suite = commands.add_parser("bench-suite", help="ops/sec and memory of the hot operations, with regression checks")
+    suite.add_argument("--flights", type=int, default=1000)
+    suite.add_argument("--seats", type=int, default=200)
+    suite.add_argument("--passengers", type=int, default=50000)
+    suite.add_argument("--tickets", type=int, default=100000)
+    suite.add_argument("--operations", type=int, default=20000, help="operations timed per benchmark")
+    suite.add_argument("--repeat", type=int, default=3)
+    suite.add_argument("--output", help="write results to this JSON file")
+    suite.add_argument("--baseline", help="compare against an earlier results file")
+    suite.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing, e.g. 0.2")
+    bench_metrics = commands.add_parser("bench-metrics", help="instrumentation overhead, enabled and disabled")
+    bench_metrics.add_argument("--operations", type=int, default=200000)
+    snapshot_seats = commands.add_parser("snapshot-seats", help="write the seat inventory as a binary snapshot")
+    snapshot_seats.add_argument("--out", required=True)
+    snapshot_seats.add_argument("--flights", type=int, default=0, help="snapshot a synthetic schedule instead")
+    snapshot_seats.add_argument("--seats", type=int, default=300)
+    bench_coldstart = commands.add_parser("bench-coldstart", help="start-up time, objects versus a mapped snapshot")
+    bench_coldstart.add_argument("--flights", type=int, default=2000)
+    bench_coldstart.add_argument("--seats", type=int, default=300)
+    bench_shards = commands.add_parser("bench-shards", help="booking throughput across sharded worker processes")
+    bench_shards.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    bench_shards.add_argument("--bookings", type=int, default=100000)
+    bench_shards.add_argument("--flights", type=int, default=400)
+    bench_shards.add_argument("--seats", type=int, default=300)
+    bench_shards.add_argument("--batch-size", type=int, default=2000)
+    bench_cache = commands.add_parser("bench-cache", help="browse-heavy query mix with and without the cache")
+    bench_cache.add_argument("--flights", type=int, default=2000)
+    bench_cache.add_argument("--seats", type=int, default=300)
+    bench_cache.add_argument("--operations", type=int, default=200000)
+    bench_cache.add_argument("--booking-ratio", type=float, default=0.02)
+    serve = commands.add_parser("serve", help="run the JSON booking server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    serve.add_argument("--flights", type=int, default=0, help="serve a synthetic schedule of this many flights")
+    serve.add_argument("--seats", type=int, default=300)
+    serve.add_argument("--settle-batches", action="store_true",
+                       help="settle payments in batches through the stub gateway")
+    gen_traces = commands.add_parser("gen-traces", help="generate synthetic session traces over a synthetic schedule")
+    gen_traces.add_argument("--out", required=True)
+    gen_traces.add_argument("--sessions", type=int, default=1000)
+    gen_traces.add_argument("--mix", default="browse=0.9,book=0.08,cancel=0.02",
+                            help="operation mix as kind=weight pairs")
+    gen_traces.add_argument("--operations", type=int, default=12, help="mean operations per session")
+    gen_traces.add_argument("--arrival-rate", type=float, default=20.0, help="new sessions per second")
+    gen_traces.add_argument("--flights", type=int, default=200)
+    gen_traces.add_argument("--seats", type=int, default=300)
+    gen_traces.add_argument("--passengers", type=int, default=10000)
+    gen_traces.add_argument("--seed", type=int, default=1)
+    replay = commands.add_parser("replay", help="replay session traces against the schedule they were recorded on "
+                                                "(--sqlite/--data-dir/--seat-snapshot, else the demo flights)")
+    replay.add_argument("traces")
+    replay.add_argument("--speedup", type=float, default=1.0, help="0 replays as fast as possible")
+    replay.add_argument("--concurrency", type=int, default=8)
+    replay.add_argument("--flights", type=int, default=0,
+                        help="replay against a synthetic schedule of this many flights, e.g. for gen-traces output")
+    replay.add_argument("--seats", type=int, default=300)
+    replay.add_argument("--passengers", type=int, default=10000)
+    loadgen = commands.add_parser("loadgen", help="async load generator for the booking server")
+    loadgen.add_argument("--host", default="127.0.0.1")
+    loadgen.add_argument("--port", type=int, default=8765)
+    loadgen.add_argument("--unix")
+    loadgen.add_argument("--connections", type=int, default=200)
+    loadgen.add_argument("--requests", type=int, default=20, help="bookings per connection")
+    loadgen.add_argument("--flights", type=int, default=100)
+    loadgen.add_argument("--seats", type=int, default=300)
+    loadgen.add_argument("--self-host", action="store_true", help="start a server in-process first")
+    args = parser.parse_args()
+
+    if args.command == "bench-memory":
+        run_memory_benchmark(args.count)
+        sys.exit(0)
+    if args.command == "stress-booking":
+        sys.exit(0 if run_booking_stress_test(args.threads, args.bookings) else 1)
+    if args.command == "bench-wal":
+        run_wal_benchmark(args.bookings, args.group_sizes, args.fsync_batches)
+        sys.exit(0)
+    if args.command == "bench-search":
+        run_search_benchmark(args.flights, args.airports, args.queries, args.max_connections)
+        sys.exit(0)
+    if args.command == "bench-holds":
+        sys.exit(0 if run_hold_benchmark(args.holds, args.bookings) else 1)
+    if args.command == "bench-settlement":
+        sys.exit(0 if run_settlement_benchmark(args.payments, args.batch_sizes, args.workers, args.latency,
+                                               args.failure_rate, args.decline_rate) else 1)
+    if args.command == "bench-suite":
+        sys.exit(0 if run_benchmark_suite(args.flights, args.seats, args.passengers, args.tickets, args.operations,
+                                          args.repeat, args.output, args.baseline, args.threshold) else 1)
+    if args.command == "bench-metrics":
+        run_metrics_benchmark(args.operations)
+        sys.exit(0)
+    if args.command == "bench-coldstart":
+        sys.exit(0 if run_coldstart_benchmark(args.flights, args.seats) else 1)
+    if args.command == "bench-shards":
+        sys.exit(0 if run_shard_benchmark(args.shards, args.bookings, args.flights, args.seats,
+                                          args.batch_size) else 1)
+    if args.command == "bench-cache":
+        run_cache_benchmark(args.flights, args.seats, args.operations, args.booking_ratio,
+                            args.cache_size or 4096, args.cache_ttl)
+        sys.exit(0)
+    if args.command == "serve":
+        if args.flights:
+            service = build_synthetic_service(args.flights, args.seats, passengers=0)
+        else:
+            service = BookingService()
+            load_demo_flights(service)
+        if args.cache_size:
+            service.set_cache(QueryCache(args.cache_size, args.cache_ttl))
+        holds = SeatHoldScheduler(args.hold_ttl) if args.hold_ttl else None
+        if holds is not None:
+            service.set_hold_scheduler(holds)
+            # Looked up per call, so instrumentation enabled later still sees expiries
+            holds.start(lambda now: service.release_expired_holds(now))
+        settlement = SettlementPipeline(service, StubGateway()) if args.settle_batches else None
+        metrics, endpoint = start_instrumentation(service, args.metrics, args.metrics_port, args.profile_signals,
+                                                  args.profile_report)
+        server = BookingServer(service, args.host, args.port, args.unix, settlement)
+        print(f"Serving on {args.unix or f'{args.host}:{args.port}'}")
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if endpoint is not None:
+                endpoint.close()
+            if settlement is not None:
+                settlement.close()
+            if holds is not None:
+                holds.close()
+        sys.exit(0)
+    if args.command == "gen-traces":
+        mix = {kind: float(weight) for kind, weight in (pair.split("=") for pair in args.mix.split(","))}
+        service = build_synthetic_service(args.flights, args.seats, args.passengers)
+        traces = generate_synthetic_traces(service, args.sessions, mix, args.operations,
+                                           arrival_rate=args.arrival_rate, seed=args.seed)
+        save_traces(traces, args.out)
+        print(f"Wrote {len(traces)} operations in {args.sessions} sessions to {args.out} "
+              f"(replay with --flights {args.flights} --seats {args.seats} --passengers {args.passengers})")
+        sys.exit(0)
+    if args.command == "replay":
+        if args.flights:
+            service, storage = build_synthetic_service(args.flights, args.seats, args.passengers), None
+        else:
+            service, storage = open_replay_service(args.sqlite, args.data_dir, args.seat_snapshot)
+        try:
+            report = replay_traces(AirlineManagementSystem(service), load_traces(args.traces), args.speedup,
+                                   args.concurrency)
+        finally:
+            if storage is not None:
+                storage.close()
+        print(json.dumps(report, indent=2))
+        sys.exit(0)
+    if args.command == "loadgen":
+        if args.self_host:
+            report = asyncio.run(run_self_hosted_load_test(args.connections, args.requests, args.flights,
+                                                           args.seats, args.unix))
+        else:
+            address = args.unix or (args.host, args.port)
+            report = asyncio.run(run_load_client(address, args.connections, args.requests,
+                                                 args.flights, args.seats))
+        print(json.dumps(report, indent=2))
+        sys.exit(0)
+    if args.command == "import" and not (args.sqlite or args.data_dir):
+        # An in-memory service would discard the imported schedule on exit
+        parser.error("import needs --sqlite or --data-dir to keep the imported schedule")
+
+    journal = None
+    snapshot = None
+    if args.sqlite:
+        service, journal = open_sqlite_service(args.sqlite)
+    elif args.seat_snapshot:
+        service, snapshot = open_snapshot_service(args.seat_snapshot)
+    elif args.data_dir:
+        service, journal, recovery = open_durable_service(args.data_dir)
+        print(f"Recovered {recovery['snapshot_events']} snapshot events and {recovery['replayed']} log records "
+              f"in {recovery['seconds']:.3f}s")
+    else:
+        service = BookingService()
+    if args.cache_size:
+        service.set_cache(QueryCache(args.cache_size, args.cache_ttl))
+
+    if args.command == "import":
+        rejects = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+
+        def write_reject(line_no, row, reason):
+            rejects.write(json.dumps({"line": line_no, "reason": reason, "row": row}) + "\n")
+
+        try:
+            report = ScheduleImporter(service, args.batch_size, write_reject if rejects else None).import_file(
+                args.path, args.format)
+        finally:
+            if rejects is not None:
+                rejects.close()
+            if journal is not None:
+                journal.close()
+        print(report)
+        for line_no, reason in report.rejected_samples[:10]:
+            print(f"  line {line_no}: {reason}")
+        sys.exit(0)
+
+    if args.command == "export":
+        try:
+            export_bookings(service, args.out, args.format, args.flight)
+        finally:
+            if journal is not None:
+                journal.close()
+        sys.exit(0)
+
+    if args.command == "snapshot-seats":
+        source = build_synthetic_service(args.flights, args.seats, passengers=0) if args.flights else service
+        count = SeatSnapshot.write(args.out, source.get_flight_registry())
+        print(f"Wrote {count} seats on {len(source.get_flight_registry())} flights to {args.out}")
+        if journal is not None:
+            journal.close()
+        sys.exit(0)
+
+    if not service.get_flight_registry():
+        load_demo_flights(service)
+    holds = SeatHoldScheduler(args.hold_ttl) if args.hold_ttl else None
+    if holds is not None:
+        service.set_hold_scheduler(holds)
+        # Looked up per call, so instrumentation enabled later still sees expiries
+        holds.start(lambda now: service.release_expired_holds(now))
+
+    metrics, endpoint = start_instrumentation(service, args.metrics, args.metrics_port, args.profile_signals,
+                                              args.profile_report)
 
-    system.main_menu()
\ No newline at end of file
+    recorder = SessionRecorder(service) if args.record else None
+    system = AirlineManagementSystem(recorder or service)
+    try:
+        system.main_menu()
+    finally:
+        if recorder is not None:
+            recorder.save(args.record)
+        if endpoint is not None:
+            endpoint.close()
+        if holds is not None:
+            holds.close()
+        if journal is not None:
+            journal.close()
+        if snapshot is not None:
+            snapshot.close()
@@ -0,0 +1,37 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Final._project.py")
+
+
+def _load_module():
+    # The application is a single script whose file name is not importable, so load it by path
+    if "airline" not in sys.modules:
+        spec = importlib.util.spec_from_file_location("airline", MODULE_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["airline"] = module
+        spec.loader.exec_module(module)
+    return sys.modules["airline"]
+
+
+@pytest.fixture(scope="session")
+def airline():
+    return _load_module()
+
+
+@pytest.fixture
+def service(airline):
+    # Two passengers and two small flights
+    service = airline.BookingService()
+    service.register_passenger("Alice", 30, "0100000000", "Cairo", "111")
+    service.register_passenger("Bob", 40, "0100000001", "Cairo", "222")
+    service.create_flight(452, "Cairo", "London", "2am")
+    service.create_flight(453, "London", "Paris", "9am")
+    for number in (452, 453):
+        service.add_seats(number, [airline.Seat(seat_number, "Business" if seat_number % 5 == 0 else "Economy",
+                                                1000 if seat_number % 5 == 0 else 400)
+                                   for seat_number in range(1, 11)])
+    return service
@@ -0,0 +1,36 @@
+def _check_in(service, weights):
+    # One ticket per bag on flight 452; returns the ticket numbers
+    passenger = service.login("111").value
+    tickets = []
+    for baggage_id, weight in enumerate(weights, start=1):
+        ticket_number = service.book_seat(passenger, 452).value.get_ticket_number()
+        assert service.attach_baggage(ticket_number, baggage_id, weight)
+        tickets.append(ticket_number)
+    return tickets
+
+
+def test_fees_match_each_bag(airline, service):
+    _check_in(service, [10, 23, 30, 23.5, 50])
+    report = service.baggage_fees(452).value
+    registry = service.get_baggage_registry()
+    expected = [registry.get(baggage_id).excess_fee(airline.ALLOWED_BAGGAGE_WEIGHT)
+                for baggage_id in report["baggage_ids"]]
+    assert report["excess_weights"] == [excess for excess, _ in expected]
+    assert report["fees"] == [fee for _, fee in expected]
+    assert report["total_fee"] == sum(fee for _, fee in expected)
+    assert report["overweight"] == sum(1 for excess, _ in expected if excess > 0)
+
+
+def test_cancelled_bags_leave_the_flight(airline, service):
+    tickets = _check_in(service, [10, 30, 40, 50])
+    service.cancel_ticket(tickets[0])
+    service.cancel_ticket(tickets[2])
+    report = service.baggage_fees(452).value
+    assert sorted(report["baggage_ids"]) == [2, 4]
+    registry = service.get_baggage_registry()
+    assert report["fees"] == [registry.get(baggage_id).excess_fee(airline.ALLOWED_BAGGAGE_WEIGHT)[1]
+                              for baggage_id in report["baggage_ids"]]
+    assert registry.flight_for(1) is None and 1 in registry
+    service.cancel_ticket(tickets[1])
+    service.cancel_ticket(tickets[3])
+    assert service.baggage_fees(452).value["baggage_ids"] == []
@@ -0,0 +1,90 @@
+import threading
+
+
+def _race(workers, target):
+    # Starts every worker at once and waits for all of them
+    barrier = threading.Barrier(workers)
+    results = [None] * workers
+
+    def run(index):
+        barrier.wait()
+        results[index] = target(index)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_a_seat_is_booked_once_under_contention(airline, service):
+    passengers = [service.login("111").value, service.login("222").value]
+    results = _race(16, lambda index: service.book_seat(passengers[index % 2], 452, 1))
+    assert sum(1 for result in results if result) == 1
+    assert all(result.error == airline.SEAT_TAKEN for result in results if not result)
+    assert len(service.get_ticket_store().for_flight(452)) == 1
+
+
+def test_concurrent_bookings_never_share_a_seat(airline, service):
+    passenger = service.login("111").value
+    results = _race(16, lambda index: service.book_seat(passenger, 452))
+    booked = [result.value.get_seat().get_seat_number() for result in results if result]
+    assert sorted(booked) == list(range(1, 11))
+    assert all(result.error == airline.NO_SEATS for result in results if not result)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_unpaid_tickets_expire_and_free_their_seats(airline, service):
+    clock = Clock()
+    service.set_hold_scheduler(airline.SeatHoldScheduler(ttl=60, clock=clock))
+    passenger = service.login("111").value
+    unpaid = service.book_seat(passenger, 452, 1).value.get_ticket_number()
+    paid = service.book_seat(passenger, 452, 2).value.get_ticket_number()
+    assert service.pay_for_ticket(paid, "4111111111111111")
+    clock.now += 59
+    assert service.release_expired_holds() == []
+    clock.now += 1
+    assert service.release_expired_holds() == [unpaid]
+    inventory = service.get_flight(452).get_inventory()
+    assert inventory.is_free(1) and not inventory.is_free(2)
+    assert unpaid not in service.get_ticket_store() and paid in service.get_ticket_store()
+
+
+def test_an_expired_hold_cannot_be_paid(airline, service):
+    clock = Clock()
+    service.set_hold_scheduler(airline.SeatHoldScheduler(ttl=60, clock=clock))
+    ticket_number = service.book_seat(service.login("111").value, 452, 1).value.get_ticket_number()
+    clock.now += 61
+    assert service.pay_for_ticket(ticket_number, "4111111111111111").error == airline.HOLD_EXPIRED
+
+
+def test_class_types_are_validated_and_normalized(airline, service):
+    passenger = service.login("111").value
+    assert service.book_seat(passenger, 452, class_type="Frist").error == airline.INVALID_INPUT
+    assert service.available_seats(452, "Frist").error == airline.INVALID_INPUT
+    assert len(service.available_seats(452, "economy").value) == 8
+    assert service.book_seat(passenger, 452, class_type="business").value.get_seat().get_class_type() == "Business"
+
+
+def test_create_flight_rejects_a_bad_flight_number(airline, service):
+    assert service.create_flight("4x2", "Cairo", "Rome", "2am").error == airline.INVALID_INPUT
+
+
+def test_the_first_revenue_report_seeds_the_aggregates(airline, service, monkeypatch, capsys):
+    service.book_seat(service.login("111").value, 452, 5)
+    monkeypatch.setattr("builtins.input", lambda prompt="": "")
+    assert service.get_aggregates() is None
+    airline.AirlineManagementSystem(service).view_revenue_report()
+    aggregates = service.get_aggregates()
+    assert aggregates.get_overall()["sold"] == 1
+    service.book_seat(service.login("222").value, 453, 5)
+    airline.AirlineManagementSystem(service).view_revenue_report()
+    assert service.get_aggregates() is aggregates and aggregates.get_overall()["sold"] == 2
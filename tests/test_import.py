@@ -0,0 +1,20 @@
+def _row(flight_number, **seat):
+    return dict(flight_number=flight_number, origin="Cairo", destination="Rome", departure_time="8am", **seat)
+
+
+def test_a_rejected_seat_row_does_not_create_its_flight(airline):
+    service = airline.BookingService()
+    rows = enumerate([_row(900, seat_number="x", price=400, class_type="Economy"),
+                      _row(901, seat_number=1, price=400, class_type="First"),
+                      _row(902, seat_number=1, price=400, class_type="Economy"),
+                      _row(902, seat_number=1, price=500, class_type="Economy")], start=1)
+    report = airline.ScheduleImporter(service).import_rows(rows)
+    assert (report.flights_added, report.seats_added, report.rejected) == (1, 1, 3)
+    assert 900 not in service.get_flight_registry() and 901 not in service.get_flight_registry()
+    assert 1 in service.get_flight(902).get_inventory()
+
+
+def test_a_flight_only_row_still_declares_the_flight(airline):
+    service = airline.BookingService()
+    report = airline.ScheduleImporter(service).import_rows(enumerate([_row(903)], start=1))
+    assert report.flights_added == 1 and 903 in service.get_flight_registry()
@@ -0,0 +1,66 @@
+import threading
+
+
+def _open(airline, directory):
+    service, journal, _ = airline.open_durable_service(directory, flush_interval=0)
+    return service, journal
+
+
+def _populate(airline, service):
+    service.register_passenger("Alice", 30, "0100000000", "Cairo", "111")
+    service.create_flight(452, "Cairo", "London", "2am")
+    service.add_seats(452, [airline.Seat(number, "Economy", 400) for number in range(1, 6)])
+    passenger = service.login("111").value
+    return [service.book_seat(passenger, 452, number).value.get_ticket_number() for number in (1, 2, 3)]
+
+
+def test_recovery_replays_the_log(airline, tmp_path):
+    service, journal = _open(airline, str(tmp_path))
+    tickets = _populate(airline, service)
+    service.pay_for_ticket(tickets[0], "4111111111111111")
+    service.cancel_ticket(tickets[1])
+    journal.close()
+    recovered, journal = _open(airline, str(tmp_path))
+    store = recovered.get_ticket_store()
+    assert store.get(tickets[0]).get_payment_status()
+    assert store.get(tickets[1]) is None and recovered.get_flight(452).get_inventory().is_free(2)
+    assert not recovered.get_flight(452).get_inventory().is_free(3)
+    journal.close()
+
+
+def test_snapshot_round_trip_and_later_changes(airline, tmp_path):
+    service, journal = _open(airline, str(tmp_path))
+    tickets = _populate(airline, service)
+    journal.snapshot()
+    service.cancel_ticket(tickets[0])
+    journal.close()
+    recovered, journal = _open(airline, str(tmp_path))
+    assert sorted(ticket.get_ticket_number() for ticket in recovered.get_ticket_store()) == tickets[1:]
+    assert recovered.get_flight(452).get_inventory().count_free() == 3
+    assert recovered.book_seat(recovered.login("111").value, 452).value.get_ticket_number() == tickets[-1] + 1
+    journal.close()
+
+
+def test_cancel_during_snapshot_export_recovers_consistently(airline, tmp_path):
+    service, journal = _open(airline, str(tmp_path))
+    tickets = _populate(airline, service)
+    export_events = service.export_events
+    workers = []
+
+    def export_with_concurrent_cancel():
+        for event, data in export_events():
+            if event == "flight_added" and not workers:
+                # The flight (with seat 1 booked) is already exported; cancel before its ticket is
+                workers.append(threading.Thread(target=service.cancel_ticket, args=(tickets[0],)))
+                workers[0].start()
+                workers[0].join(0.2)
+            yield event, data
+
+    service.export_events = export_with_concurrent_cancel
+    journal.snapshot()
+    workers[0].join()
+    journal.close()
+    recovered, journal = _open(airline, str(tmp_path))
+    assert recovered.get_ticket_store().get(tickets[0]) is None
+    assert recovered.get_flight(452).get_inventory().is_free(1)
+    journal.close()
@@ -0,0 +1,36 @@
+import os
+import signal
+import time
+
+import pytest
+
+
+def test_timed_calls_are_recorded(airline, service):
+    metrics = airline.Metrics(service)
+    metrics.enable()
+    service.login("111")
+    service.login("999")
+    metrics.disable()
+    service.login("111")
+    counters = metrics.snapshot()["counters"]
+    assert counters["login.login"] == 2
+    assert counters[f"login.login.{airline.PASSENGER_NOT_FOUND}"] == 1
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="needs POSIX signals")
+def test_sigusr1_while_the_main_thread_holds_the_metrics_lock(airline, service):
+    metrics = airline.Metrics(service)
+    previous = signal.getsignal(signal.SIGUSR1), signal.getsignal(signal.SIGUSR2)
+    try:
+        assert airline.install_signal_handlers(metrics, airline.SamplingProfiler())
+        with metrics._Metrics__lock:  # As inside a timed call on the main thread
+            os.kill(os.getpid(), signal.SIGUSR1)
+            time.sleep(0.05)  # The handler runs here and must not block on the lock
+        deadline = time.monotonic() + 5
+        while not metrics.is_enabled() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert metrics.is_enabled()
+    finally:
+        metrics.disable()
+        signal.signal(signal.SIGUSR1, previous[0])
+        signal.signal(signal.SIGUSR2, previous[1])
@@ -0,0 +1,32 @@
+def test_registration_and_login_start_sessions(airline, service):
+    recorder = airline.SessionRecorder(service)
+    assert recorder.register_passenger("Carol", 25, "0100000002", "Giza", "333")
+    carol = recorder.login("333").value  # Already signed in by registering: same session
+    recorder.book_seat(carol, 452)
+    assert not recorder.register_passenger("Carol", 25, "0100000002", "Giza", "333")
+    recorder.book_seat(recorder.login("111").value, 452)
+    sessions = [(trace["op"], trace["session"]) for trace in recorder.get_traces()]
+    assert sessions == [("register_passenger", 1), ("login", 1), ("book_seat", 1), ("register_passenger", 1),
+                        ("login", 2), ("book_seat", 2)]
+
+
+def test_registrations_are_recorded_without_personal_details(airline, service):
+    recorder = airline.SessionRecorder(service)
+    recorder.register_passenger("Carol Smith", 25, "0100000002", "12 Nile St", "333")
+    arguments = recorder.get_traces()[0]["args"]
+    assert "Carol" not in str(arguments) and "Nile" not in str(arguments) and "0100000002" not in str(arguments)
+    assert arguments["passport_no"] == "333" and len(arguments["phone"]) == 10
+
+
+def test_a_demo_recording_replays_cleanly(airline, tmp_path):
+    service, _ = airline.open_replay_service()
+    recorder = airline.SessionRecorder(service)
+    recorder.register_passenger("Carol", 25, "0100000002", "Giza", "333")
+    ticket = recorder.book_seat(service.login("333").value, 452).value
+    recorder.pay_for_ticket(ticket.get_ticket_number(), "4111111111111111")
+    recorder.cancel_ticket(ticket.get_ticket_number())
+    recorder.save(str(tmp_path / "session.jsonl"))
+    replayed, _ = airline.open_replay_service()
+    report = airline.replay_traces(airline.AirlineManagementSystem(replayed),
+                                   airline.load_traces(str(tmp_path / "session.jsonl")), speedup=0)
+    assert report["divergent"] == 0
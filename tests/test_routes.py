@@ -0,0 +1,67 @@
+import datetime
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def schedule(airline):
+    # Cairo -> London lands at 7am, London -> Paris leaves at 9am
+    service = airline.BookingService()
+    service.create_flight(452, "Cairo", "London", "2am", "7am")
+    service.create_flight(453, "London", "Paris", "9am", "10am")
+    for number in (452, 453):
+        service.add_seats(number, [airline.Seat(1, "Economy", 400)])
+    return service
+
+
+def _legs(itineraries):
+    return [[flight.get_flights() for flight in itinerary.legs] for itinerary in itineraries]
+
+
+def test_connection_is_found(airline, schedule):
+    engine = airline.RouteSearchEngine(schedule)
+    assert _legs(engine.search("Cairo", "Paris")) == [[452, 453]]
+    assert _legs(engine.search("Cairo", "Paris", max_connections=0)) == []
+
+
+def test_searches_after_midnight_use_the_index_date(airline, schedule, monkeypatch):
+    engine = airline.RouteSearchEngine(schedule)
+    indexed_on = engine.get_service_date()
+
+    class Tomorrow(datetime.date):
+        @classmethod
+        def today(cls):
+            return indexed_on + datetime.timedelta(days=1)
+
+    monkeypatch.setattr(airline.dt, "date", Tomorrow)
+    assert _legs(engine.search("Cairo", "Paris")) == [[452, 453]]
+    depart_after = airline.parse_flight_time("1am", engine.get_service_date())
+    itineraries = engine.search("Cairo", "Paris", depart_after)
+    assert _legs(itineraries) == [[452, 453]]
+    assert itineraries[0].departure.date() == indexed_on
+
+
+def test_flights_added_during_searches_are_indexed(airline, schedule):
+    engine = airline.RouteSearchEngine(schedule)
+    errors = []
+
+    def search():
+        try:
+            for _ in range(200):
+                for itinerary in engine.search("Cairo", "Paris", limit=50):
+                    assert itinerary.legs[0].get_origin() == "Cairo"
+        except Exception as e:
+            errors.append(e)
+
+    searchers = [threading.Thread(target=search) for _ in range(4)]
+    for thread in searchers:
+        thread.start()
+    for flight_number in range(500, 700):
+        schedule.create_flight(flight_number, "Cairo", "Paris", f"{flight_number % 12 + 1}am",
+                               f"{flight_number % 12 + 1}pm")
+        schedule.add_seats(flight_number, [airline.Seat(1, "Economy", 400)])
+    for thread in searchers:
+        thread.join()
+    assert errors == []
+    assert len(engine.search("Cairo", "Paris", limit=1000)) == 201
@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+
+def _call(server, request: dict) -> dict:
+    return asyncio.run(server._dispatch(json.dumps(request).encode()))
+
+
+def test_book_then_cancel_by_owner(airline, service):
+    server = airline.BookingServer(service)
+    booked = _call(server, {"op": "book", "passport_no": "111", "flight_number": 452, "seat_number": 1})
+    assert booked["ok"]
+    cancelled = _call(server, {"op": "cancel", "passport_no": "111", "ticket_number": booked["value"]["ticket_number"]})
+    assert cancelled["ok"]
+
+
+def test_cancel_and_pay_reject_other_passengers(airline, service):
+    server = airline.BookingServer(service)
+    ticket_number = _call(server, {"op": "book", "passport_no": "111", "flight_number": 452})["value"]["ticket_number"]
+    cancel = {"op": "cancel", "ticket_number": ticket_number}
+    pay = {"op": "pay", "ticket_number": ticket_number, "card_number": "4111111111111111"}
+    assert _call(server, dict(cancel, passport_no="222"))["error"] == airline.NOT_TICKET_OWNER
+    for request in (cancel, pay):
+        assert _call(server, dict(request, passport_no="999"))["error"] == airline.PASSENGER_NOT_FOUND
+        assert _call(server, request)["error"] == airline.PASSENGER_NOT_FOUND
+    ticket = service.get_ticket_store().get(ticket_number)
+    assert ticket is not None and not ticket.get_payment_status()
+
+
+def test_unexpected_errors_become_failure_results(airline, service):
+    server = airline.BookingServer(service)
+    assert _call(server, {"op": "book", "passport_no": "111", "flight_number": 1e400})["error"] == airline.INVALID_INPUT
+
+    def broken(flight_number, bookings):
+        raise RuntimeError("storage went away")
+
+    service.book_batch = broken
+    service.search_flights = broken
+    assert _call(server, {"op": "search", "origin": "Cairo"})["error"] == airline.SERVER_ERROR
+    response = _call(server, {"op": "book", "passport_no": "111", "flight_number": 452})
+    assert response["error"] == airline.SERVER_ERROR
@@ -0,0 +1,128 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def scripted(airline):
+    class ScriptedGateway(airline.PaymentGateway):
+        # Answers each charge with the next outcome scripted for its idempotency key, approving by default
+        def __init__(self):
+            self.script = {}
+            self.calls = []
+            self.on_charge = None
+
+        def charge_batch(self, charges):
+            if self.on_charge is not None:
+                self.on_charge()
+            self.calls.extend(charge["idempotency_key"] for charge in charges)
+            return [self.script.get(charge["idempotency_key"], []).pop(0)
+                    if self.script.get(charge["idempotency_key"]) else airline.ServiceResult.success("ch")
+                    for charge in charges]
+
+        def refund(self, idempotency_key):
+            return airline.ServiceResult.success(0)
+
+    return ScriptedGateway()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _book(airline, service, seat_number):
+    return service.book_seat(service.login("111").value, 452, seat_number).value.get_ticket_number()
+
+
+def test_transient_errors_are_retried_with_backoff(airline, service, scripted):
+    ticket_number = _book(airline, service, 1)
+    key = airline.SettlementPipeline.idempotency_key(ticket_number)
+    scripted.script[key] = [airline.ServiceResult.failure(airline.GATEWAY_ERROR, "timeout")] * 2
+    pipeline = airline.SettlementPipeline(service, scripted, max_attempts=3, retry_backoff=0.05)
+    started = airline.time.perf_counter()
+    result = pipeline.pay(ticket_number, "4111111111111111")
+    elapsed = airline.time.perf_counter() - started
+    pipeline.close()
+    assert result
+    assert scripted.calls == [key] * 3
+    assert elapsed >= 0.05 + 0.1  # Backoff doubles: 0.05s, then 0.1s
+    assert pipeline.get_stats()["retries"] == 2
+
+
+def test_decline_restores_the_original_hold(airline, service, scripted):
+    clock = Clock()
+    service.set_hold_scheduler(airline.SeatHoldScheduler(ttl=60, clock=clock))
+    ticket_number = _book(airline, service, 1)
+    deadline = service.get_hold_scheduler().deadline(ticket_number)
+    scripted.script[airline.SettlementPipeline.idempotency_key(ticket_number)] = [
+        airline.ServiceResult.failure(airline.PAYMENT_DECLINED, "declined")]
+    pipeline = airline.SettlementPipeline(service, scripted)
+    clock.now += 30
+    result = pipeline.pay(ticket_number, "4111111111111111")
+    pipeline.close()
+    assert result.error == airline.PAYMENT_DECLINED
+    assert service.get_hold_scheduler().deadline(ticket_number) == deadline
+
+
+def test_decline_after_the_hold_ran_out_releases_the_seat(airline, service, scripted):
+    clock = Clock()
+    service.set_hold_scheduler(airline.SeatHoldScheduler(ttl=60, clock=clock))
+    ticket_number = _book(airline, service, 1)
+    key = airline.SettlementPipeline.idempotency_key(ticket_number)
+    scripted.script[key] = [airline.ServiceResult.failure(airline.PAYMENT_DECLINED, "declined")]
+    pipeline = airline.SettlementPipeline(service, scripted)
+    scripted.on_charge = lambda: setattr(clock, "now", clock.now + 120)  # The hold runs out mid-charge
+    result = pipeline.pay(ticket_number, "4111111111111111")
+    pipeline.close()
+    assert result.error == airline.PAYMENT_DECLINED
+    assert ticket_number not in service.get_ticket_store()
+    assert service.get_flight(452).get_inventory().get(1).is_available()
+
+
+def test_a_short_gateway_reply_fails_the_unanswered_charges(airline, service):
+    class ShortGateway(airline.PaymentGateway):
+        def charge_batch(self, charges):
+            return [airline.ServiceResult.success("ch")][:len(charges) - 1]
+
+        def refund(self, idempotency_key):
+            return airline.ServiceResult.success(0)
+
+    tickets = [_book(airline, service, seat_number) for seat_number in (1, 2)]
+    pipeline = airline.SettlementPipeline(service, ShortGateway(), max_wait=0.05, max_attempts=1)
+    futures = [pipeline.submit(ticket_number, "4111111111111111") for ticket_number in tickets]
+    results = [future.result(timeout=5) for future in futures]
+    done = threading.Thread(target=pipeline.close, daemon=True)
+    done.start()
+    done.join(timeout=5)
+    assert not done.is_alive()
+    assert all(result.error == airline.GATEWAY_ERROR for result in results)
+
+
+def test_a_direct_payment_cannot_race_a_charge_in_flight(airline, service, scripted):
+    ticket_number = _book(airline, service, 1)
+    direct = []
+    scripted.on_charge = lambda: direct.append(service.pay_for_ticket(ticket_number, "4111111111111111"))
+    refunds = []
+    scripted.refund = lambda key: refunds.append(key) or airline.ServiceResult.success(0)
+    pipeline = airline.SettlementPipeline(service, scripted)
+    result = pipeline.pay(ticket_number, "4111111111111111")
+    pipeline.close()
+    assert result and direct[0].error == airline.PAYMENT_PENDING
+    assert refunds == []
+    assert service.pay_for_ticket(ticket_number, "4111111111111111").error == airline.ALREADY_PAID
+
+
+def test_a_charge_that_cannot_be_recorded_is_refunded(airline, service, scripted):
+    ticket_number = _book(airline, service, 1)
+    scripted.on_charge = lambda: service.cancel_ticket(ticket_number)
+    refunds = []
+    scripted.refund = lambda key: refunds.append(key) or airline.ServiceResult.success(0)
+    pipeline = airline.SettlementPipeline(service, scripted)
+    result = pipeline.pay(ticket_number, "4111111111111111")
+    pipeline.close()
+    assert result.error == airline.TICKET_NOT_FOUND
+    assert refunds == [airline.SettlementPipeline.idempotency_key(ticket_number)]
@@ -0,0 +1,56 @@
+import pytest
+
+
+@pytest.fixture
+def router(airline):
+    router = airline.ShardRouter(2)
+    yield router
+    router.close()
+
+
+def test_registration_reaches_every_shard(airline, router):
+    assert router.register_passenger("Alice", 30, "0100000000", "Cairo", "111")["ok"]
+    for flight_number in (10, 11):  # One flight per shard
+        assert router.create_flight(flight_number, "Cairo", "Rome", "9am")["ok"]
+        assert router.add_seat(flight_number, 1, "Economy", 400)["ok"]
+        assert router.book("111", flight_number)["ok"]
+
+
+def test_partial_registration_is_rolled_back(airline, router):
+    # Shard 1 already knows the passport, so the broadcast fails there and is undone on shard 0
+    router.execute([{"op": "register", "flight_number": 1, "name": "Bob", "age": 40, "phone": "0100000001",
+                     "address": "Cairo", "passport_no": "222"}])
+    result = router.register_passenger("Bob", 40, "0100000001", "Cairo", "222")
+    assert not result["ok"] and result["error"] == airline.PASSENGER_EXISTS
+    replies = router.broadcast({"op": "login", "passport_no": "222"})
+    assert [reply["ok"] for reply in replies] == [False, True]
+
+
+def test_cancel_and_pay_need_a_known_passenger(airline, router):
+    router.register_passenger("Alice", 30, "0100000000", "Cairo", "111")
+    router.create_flight(10, "Cairo", "Rome", "9am")
+    router.add_seat(10, 1, "Economy", 400)
+    ticket_number = router.book("111", 10)["value"]["ticket_number"]
+    assert router.cancel(ticket_number, "999")["error"] == airline.PASSENGER_NOT_FOUND
+    assert router.pay(ticket_number, "4111111111111111")["error"] == airline.PASSENGER_NOT_FOUND
+    assert router.cancel(ticket_number, "111")["ok"]
+
+
+def test_an_unexpected_error_fails_only_its_request(airline, service, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("index corrupted")
+
+    monkeypatch.setattr(service, "search_flights", broken)
+    reply = airline._shard_execute(service, {"op": "search", "origin": "Cairo"})
+    assert not reply["ok"] and reply["error"] == airline.SERVER_ERROR
+    assert airline._shard_execute(service, {"op": "login", "passport_no": "111"})["ok"]
+
+
+def test_routes_look_past_sold_out_candidates(airline, router):
+    # Five earlier flights have no seats; the only bookable one arrives last
+    for flight_number, hour in zip(range(10, 16), range(1, 7)):
+        assert router.create_flight(flight_number, "Cairo", "Rome", f"{hour}am", f"{hour + 2}am")["ok"]
+    router.add_seat(15, 1, "Economy", 400)
+    routes = router.routes("Cairo", "Rome", limit=1)
+    assert [route["flights"] for route in routes] == [[15]]
+    assert len(router.routes("Cairo", "Rome", limit=5)) == 1
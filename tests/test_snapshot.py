@@ -0,0 +1,44 @@
+import mmap
+
+
+def _write(airline, service, tmp_path):
+    path = str(tmp_path / "seats.bin")
+    airline.SeatSnapshot.write(path, service.get_flight_registry())
+    return path
+
+
+def test_snapshot_views_match_the_source_seats(airline, service, tmp_path):
+    service.book_seat(service.login("111").value, 452, 3)
+    snapshot = airline.SeatSnapshot(_write(airline, service, tmp_path), mmap.ACCESS_READ)
+    entry = snapshot.get_schedule()[0]
+    seats = {seat.get_seat_number(): seat.to_dict() for seat in snapshot.iter_seats(entry["first"], entry["count"])}
+    assert seats == {seat.get_seat_number(): seat.to_dict() for seat in service.get_flight(452).get_seats()}
+    assert not seats[3]["available"]
+    del seats
+    snapshot.close()
+
+
+def test_bookings_on_a_snapshot_service_never_reach_the_file(airline, service, tmp_path):
+    path = _write(airline, service, tmp_path)
+    mapped, snapshot = airline.open_snapshot_service(path)
+    mapped.register_passenger("Alice", 30, "0100000000", "Cairo", "111")
+    passenger = mapped.login("111").value
+    assert mapped.book_seat(passenger, 452, 4)
+    assert not mapped.book_seat(passenger, 452, 4)
+    snapshot.close()
+    reopened, snapshot = airline.open_snapshot_service(path)
+    reopened.register_passenger("Alice", 30, "0100000000", "Cairo", "111")
+    assert reopened.book_seat(reopened.login("111").value, 452, 4)  # No orphaned seat without a ticket
+    snapshot.close()
+
+
+def test_start_up_with_aggregates_loads_no_seats(airline, service, tmp_path):
+    service.book_seat(service.login("111").value, 452, 5)
+    mapped, snapshot = airline.open_snapshot_service(_write(airline, service, tmp_path))
+    aggregates = airline.RevenueAggregates()
+    mapped.set_aggregates(aggregates)
+    assert aggregates.get_overall()["capacity"] == 20
+    rows = mapped.list_flights().value["flights"]
+    assert rows[0]["classes"]["Business"] == {"free": 1, "total": 2, "lowest_fare": 1000.0}
+    assert not any(flight.is_loaded() for flight in mapped.get_flight_registry())
+    snapshot.close()
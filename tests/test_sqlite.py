@@ -0,0 +1,50 @@
+def _populated(airline, path):
+    service, storage = airline.open_sqlite_service(path)
+    service.register_passenger("Alice", 30, "0100000000", "Cairo", "111")
+    service.create_flight(452, "Cairo", "London", "2am")
+    service.add_seats(452, [airline.Seat(1, "Economy", 400), airline.Seat(2, "Economy", 350),
+                            airline.Seat(3, "Business", 1000)])
+    passenger = service.login("111").value
+    ticket = service.book_seat(passenger, 452, 2).value
+    service.pay_for_ticket(ticket.get_ticket_number(), "4111111111111111", passenger)
+    storage.close()
+    return ticket.get_ticket_number()
+
+
+def test_reload_restores_tickets_and_payments(airline, tmp_path):
+    path = str(tmp_path / "airline.db")
+    ticket_number = _populated(airline, path)
+    service, storage = airline.open_sqlite_service(path)
+    ticket = service.get_ticket_store().get(ticket_number)
+    assert ticket is not None and ticket.get_payment_status()
+    assert not service.get_flight(452).get_inventory().is_free(2)
+    storage.close()
+
+
+def test_listing_unloaded_flights_reads_counts_from_storage(airline, tmp_path):
+    path = str(tmp_path / "airline.db")
+    _populated(airline, path)
+    service, storage = airline.open_sqlite_service(path)
+    service.create_flight(453, "London", "Paris", "9am")
+    service.add_seats(453, [airline.Seat(1, "Economy", 300), airline.Seat(2, "Business", 900)])
+    storage.close()
+    service, storage = airline.open_sqlite_service(path)
+    flight = service.get_flight(453)
+    assert not flight.is_loaded()
+    rows = {row["flight_number"]: row for row in service.list_flights().value["flights"]}
+    assert rows[453]["classes"] == {"Economy": {"free": 1, "total": 1, "lowest_fare": 300.0},
+                                    "Business": {"free": 1, "total": 1, "lowest_fare": 900.0}}
+    assert rows[452]["classes"]["Economy"] == {"free": 1, "total": 2, "lowest_fare": 400.0}
+    assert [flight.to_dict()["total_seats"] for flight in service.search_flights("London")] == [2]
+    assert not flight.is_loaded()
+    storage.close()
+
+
+def test_reload_with_a_single_reader(airline, tmp_path):
+    # Hydrating a booked flight reads its seats while the tickets are being replayed
+    path = str(tmp_path / "airline.db")
+    ticket_number = _populated(airline, path)
+    service, storage = airline.open_sqlite_service(path, readers=1)
+    assert service.get_ticket_store().get(ticket_number).get_payment_status()
+    assert service.get_flight(452).get_inventory().is_free(1)
+    storage.close()
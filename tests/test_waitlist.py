@@ -0,0 +1,93 @@
+import asyncio
+import json
+import threading
+
+
+def _race(targets):
+    # Starts every target at once and waits for all of them
+    barrier = threading.Barrier(len(targets))
+    results = [None] * len(targets)
+
+    def run(index):
+        barrier.wait()
+        results[index] = targets[index]()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(len(targets))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _sell_out(service, flight_number=452):
+    passenger = service.login("111").value
+    return [service.book_seat(passenger, flight_number).value.get_ticket_number() for _ in range(10)]
+
+
+def _waitlisters(service, count):
+    passengers = []
+    for index in range(count):
+        passport_no = str(500 + index)
+        service.register_passenger(f"Waiting {index}", 30, "0100000000", "Cairo", passport_no)
+        passengers.append(service.login(passport_no).value)
+    return passengers
+
+
+def test_concurrent_cancellations_promote_each_waitlister_once(airline, service):
+    tickets = _sell_out(service)
+    waiting = _waitlisters(service, 6)
+    for passenger in waiting:
+        assert service.join_waitlist(passenger, 452)
+    _race([lambda number=number: service.cancel_ticket(number) for number in tickets])
+    holders = [ticket.get_passenger().get_passport_no() for ticket in service.get_ticket_store().for_flight(452)]
+    assert sorted(holders) == sorted(passenger.get_passport_no() for passenger in waiting)
+    assert service.waitlist_for(452) == []
+    seats = [ticket.get_seat().get_seat_number() for ticket in service.get_ticket_store().for_flight(452)]
+    assert len(set(seats)) == len(seats) == 6
+    assert service.get_flight(452).get_inventory().count_free() == 4
+
+
+def test_leaving_while_seats_free_up_never_both_books_and_stays_listed(airline, service):
+    tickets = _sell_out(service)
+    waiting = _waitlisters(service, 10)
+    for passenger in waiting:
+        service.join_waitlist(passenger, 452)
+    leavers = waiting[::2]
+    _race([lambda number=number: service.cancel_ticket(number) for number in tickets[:5]]
+          + [lambda passenger=passenger: service.leave_waitlist(passenger, 452) for passenger in leavers])
+    listed = {entry["passport_no"] for entry in service.waitlist_for(452)}
+    booked = {ticket.get_passenger().get_passport_no() for ticket in service.get_ticket_store().for_flight(452)}
+    assert not listed & booked
+    assert not listed & {passenger.get_passport_no() for passenger in leavers}
+    assert len(booked - {"111"}) + service.get_flight(452).get_inventory().count_free() == 5
+
+
+def test_loyalty_tier_comes_from_paid_bookings_not_the_client(airline, service):
+    bob = service.login("222").value
+    paid = service.book_seat(bob, 453).value.get_ticket_number()
+    service.pay_for_ticket(paid, "4111111111111111")
+    _sell_out(service)
+    server = airline.BookingServer(service)
+    request = {"op": "waitlist", "passport_no": "111", "flight_number": 452, "tier": 99}
+    joined = asyncio.run(server._dispatch(json.dumps(request).encode()))
+    assert joined["ok"] and joined["value"]["tier"] == 0
+    assert service.join_waitlist(bob, 452).value["tier"] == 1
+    assert [entry["passport_no"] for entry in service.waitlist_for(452)] == ["222", "111"]
+
+
+def test_waitlists_survive_recovery(airline, tmp_path):
+    service, journal, _ = airline.open_durable_service(str(tmp_path), flush_interval=0)
+    service.register_passenger("Alice", 30, "0100000000", "Cairo", "111")
+    service.register_passenger("Bob", 40, "0100000001", "Cairo", "222")
+    service.create_flight(452, "Cairo", "London", "2am")
+    service.add_seats(452, [airline.Seat(1, "Economy", 400)])
+    ticket_number = service.book_seat(service.login("111").value, 452).value.get_ticket_number()
+    service.join_waitlist(service.login("222").value, 452)
+    journal.close()
+    recovered, journal, _ = airline.open_durable_service(str(tmp_path), flush_interval=0)
+    assert [entry["passport_no"] for entry in recovered.waitlist_for(452)] == ["222"]
+    recovered.cancel_ticket(ticket_number)
+    assert [ticket.get_passenger().get_passport_no() for ticket in recovered.get_ticket_store().for_flight(452)] \
+        == ["222"]
+    journal.close()